@@ -1,9 +1,22 @@
+import time
+
+# 启动计时起点：在导入界面模块之前记录
+STARTED_AT = time.perf_counter()
+
+import os
 from s_aes_gui import SAESGUI
 import tkinter as tk
 
+
+def print_startup_time(stage, seconds):
+    print(f"[startup] {stage}: {seconds * 1000:.1f} ms")
+
+
 def main():
     root = tk.Tk()
-    app = SAESGUI(root)
+    # 设置环境变量 SAES_STARTUP_TRACE=1 时输出启动各阶段耗时
+    on_startup = print_startup_time if os.environ.get('SAES_STARTUP_TRACE') else None
+    SAESGUI(root, started_at=STARTED_AT, on_startup=on_startup)
     root.mainloop()
 
 if __name__ == "__main__":
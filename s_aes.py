@@ -3,6 +3,112 @@ S-AES (Simplified Advanced Encryption Standard) 实现
 支持基本加解密、ASCII字符串加解密、多重加密和CBC模式
 """
 
+from array import array
+from bisect import bisect_left
+
+
+class CandidateKeySet:
+    """
+    候选密钥对集合
+    以 k1<<16|k2 打包存放在 array('I') 中（已排序），每个密钥对只占4字节，
+    避免中间相遇攻击返回数万个 (k1, k2) 元组带来的内存开销
+    """
+
+    def __init__(self, packed=None, presorted=False):
+        if isinstance(packed, CandidateKeySet):
+            data = array('I', packed._data)
+        elif isinstance(packed, array) and packed.typecode == 'I':
+            data = packed if presorted else array('I', sorted(packed))
+        else:
+            data = array('I', sorted(packed) if packed is not None else ())
+        self._data = data
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """由 (k1, k2) 元组序列构造"""
+        return cls(array('I', [(k1 << 16) | k2 for k1, k2 in pairs]))
+
+    @staticmethod
+    def pack(k1, k2):
+        """将密钥对打包为32位整数"""
+        return ((k1 & 0xFFFF) << 16) | (k2 & 0xFFFF)
+
+    @staticmethod
+    def unpack(value):
+        """将32位整数拆分为密钥对"""
+        return (value >> 16) & 0xFFFF, value & 0xFFFF
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        for value in self._data:
+            yield (value >> 16, value & 0xFFFF)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # 正向切片结果仍为有序数组，无需重新排序；逆向切片是降序的，需要重新排序
+            return CandidateKeySet(self._data[index], presorted=index.step is None or index.step > 0)
+        value = self._data[index]
+        return (value >> 16, value & 0xFFFF)
+
+    def __contains__(self, item):
+        if isinstance(item, tuple):
+            item = self.pack(*item)
+        i = bisect_left(self._data, item)
+        return i < len(self._data) and self._data[i] == item
+
+    def __eq__(self, other):
+        if isinstance(other, CandidateKeySet):
+            return self._data == other._data
+        return NotImplemented
+
+    def __and__(self, other):
+        return self.intersection(other)
+
+    def __repr__(self):
+        preview = ', '.join(f"({k1:04X}, {k2:04X})" for k1, k2 in self[:3])
+        more = ', ...' if len(self) > 3 else ''
+        return f"CandidateKeySet([{preview}{more}], size={len(self)})"
+
+    def intersection(self, other):
+        """
+        与另一个候选集合求交集
+        常用于用多组明密文对逐步缩小候选范围
+        """
+        if not isinstance(other, CandidateKeySet):
+            other = CandidateKeySet.from_pairs(other)
+        small, large = (self, other) if len(self) <= len(other) else (other, self)
+        lookup = set(small._data)
+        return CandidateKeySet(array('I', [v for v in large._data if v in lookup]), presorted=True)
+
+    def packed(self):
+        """返回底层打包数组（不复制）"""
+        return self._data
+
+    def tolist(self):
+        """转换为 (k1, k2) 元组列表"""
+        return list(self)
+
+    def to_bytes(self):
+        """导出为原始字节（本机字节序的uint32序列）"""
+        return self._data.tobytes()
+
+    def to_memoryview(self):
+        """零拷贝导出为memoryview"""
+        return memoryview(self._data)
+
+    def to_numpy(self):
+        """
+        零拷贝导出为NumPy uint32数组（与本集合共享内存）
+        需要安装NumPy
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("导出为NumPy数组需要安装numpy")
+        return np.frombuffer(self._data, dtype=np.uint32)
+
 
 class SAES:
     def __init__(self):
@@ -237,51 +343,27 @@ class SAES:
         """
         ASCII字符串加密
         将字符串按2字节分组进行加密
+        各分组用查表批量引擎加密（不做引擎基准测试，也不读写磁盘；
+        需要自动选择最快引擎的批量场景使用 s_aes_engine）
         """
-        # 将字符串转换为字节
-        plaintext_bytes = plaintext_str.encode('utf-8')
-        ciphertext_blocks = []
-        
-        # 按2字节分组加密
-        for i in range(0, len(plaintext_bytes), 2):
-            # 获取2字节数据
-            if i + 1 < len(plaintext_bytes):
-                block = (plaintext_bytes[i] << 8) | plaintext_bytes[i + 1]
-            else:
-                # 如果是奇数个字节，最后一个字节补0
-                block = (plaintext_bytes[i] << 8)
-            
-            # 加密这个块
-            encrypted_block = self.encrypt(block, key)
-            ciphertext_blocks.append(encrypted_block)
-        
-        return ciphertext_blocks
+        from s_aes_batch import get_batch_engine
+
+        # 按2字节分组，奇数个字节时最后一个字节补0
+        plaintext_blocks = self.string_to_blocks(plaintext_str)
+
+        # 批量加密所有块
+        return list(get_batch_engine().encrypt_blocks(plaintext_blocks, key))
     
     def decrypt_ascii(self, ciphertext_blocks, key):
         """
         ASCII字符串解密
         将密文块解密并转换回字符串
         """
-        plaintext_bytes = []
-        
-        for block in ciphertext_blocks:
-            # 解密块
-            decrypted_block = self.decrypt(block, key)
-            
-            # 提取2个字节
-            byte1 = (decrypted_block >> 8) & 0xFF
-            byte2 = decrypted_block & 0xFF
-            
-            plaintext_bytes.append(byte1)
-            if byte2 != 0:  # 如果第二个字节不是填充的0
-                plaintext_bytes.append(byte2)
-        
-        # 转换回字符串
-        try:
-            return bytes(plaintext_bytes).decode('utf-8')
-        except UnicodeDecodeError:
-            # 如果无法解码为UTF-8，返回原始字节的十六进制表示
-            return ' '.join([f"{b:02X}" for b in plaintext_bytes])
+        from s_aes_batch import get_batch_engine
+
+        # 批量解密所有块，再按2字节拼回字符串（去掉填充的0）
+        decrypted_blocks = get_batch_engine().decrypt_blocks(list(ciphertext_blocks), key)
+        return self.blocks_to_string(decrypted_blocks)
 
     # ============== 第4关：多重加密 ==============
     
@@ -306,7 +388,7 @@ class SAES:
         """
         中间相遇攻击
         给定明文-密文对，尝试找到密钥对(K1, K2)
-        返回所有可能的密钥对列表
+        返回所有可能的密钥对，类型为CandidateKeySet（可迭代出(K1, K2)元组）
         """
         # 建立中间值字典：存储 E_K1(P) -> K1 的映射
         middle_values = {}
@@ -325,20 +407,31 @@ class SAES:
                 print(f"阶段1进度: {k1/0x10000*100:.1f}%")
         
         # 第二阶段：对所有可能的K2，计算D_K2(C)并查找匹配
-        possible_keys = []
+        # 候选密钥对以 k1<<16|k2 打包存储，避免大量元组对象
+        packed_keys = array('I')
         for k2 in range(0x10000):  # 遍历所有16位密钥
             middle = self.decrypt(ciphertext, k2)
             if middle in middle_values:
                 # 找到匹配的中间值
                 for k1 in middle_values[middle]:
-                    possible_keys.append((k1, k2))
+                    packed_keys.append((k1 << 16) | k2)
             
             if k2 % 0x1000 == 0:
                 print(f"阶段2进度: {k2/0x10000*100:.1f}%")
         
+        possible_keys = CandidateKeySet(packed_keys)
         print(f"找到 {len(possible_keys)} 个可能的密钥对")
         return possible_keys
-    
+
+    def brute_force_attack(self, pairs):
+        """
+        单重加密穷举攻击
+        给定多组明文-密文对，批量遍历全部16位密钥并逐组筛选
+        返回KeyRecoveryResult（含唯一密钥、候选列表与计时统计）
+        """
+        from s_aes_attack import recover_key
+        return recover_key(pairs)
+
     def triple_encrypt_32bit(self, plaintext, key1, key2):
         """
         三重加密（32位密钥模式）：E_K1(D_K2(E_K1(P)))
@@ -0,0 +1,398 @@
+"""
+S-AES 密码分析工具
+S盒的差分分布表（DDT）与线性逼近表（LAT），
+以及基于批量引擎完整码本的整体密码差分统计、雪崩（扩散）统计和置换结构分析
+"""
+
+import hashlib
+import math
+import os
+import random
+import sys
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from s_aes import SAES
+from s_aes_batch import KEY_SPACE, get_batch_engine, mode_layers
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _parity(value):
+    return bin(value).count('1') & 1
+
+
+@lru_cache(maxsize=None)
+def sbox_table(inverse=False):
+    """将4×4的S盒（或逆S盒）展开为长度16的一维表"""
+    saes = SAES()
+    s_box = saes.INV_S_BOX if inverse else saes.S_BOX
+    return tuple(s_box[x >> 2][x & 0x3] for x in range(16))
+
+
+# ============== S盒差分与线性分析 ==============
+
+@lru_cache(maxsize=None)
+def difference_distribution_table(inverse=False):
+    """
+    差分分布表 DDT[Δx][Δy] = #{x : S(x) ⊕ S(x ⊕ Δx) = Δy}
+    结果被缓存，返回16×16的元组
+    """
+    sbox = sbox_table(inverse)
+    table = [[0] * 16 for _ in range(16)]
+    for dx in range(16):
+        row = table[dx]
+        for x in range(16):
+            row[sbox[x] ^ sbox[x ^ dx]] += 1
+    return tuple(tuple(row) for row in table)
+
+
+@lru_cache(maxsize=None)
+def linear_approximation_table(inverse=False):
+    """
+    线性逼近表 LAT[a][b] = #{x : a·x = b·S(x)} - 8（偏差形式）
+    结果被缓存，返回16×16的元组
+    """
+    sbox = sbox_table(inverse)
+    return tuple(
+        tuple(sum(1 for x in range(16) if _parity(a & x) == _parity(b & sbox[x])) - 8
+              for b in range(16))
+        for a in range(16))
+
+
+def differential_uniformity(inverse=False):
+    """差分均匀度：DDT中除 Δx=0 外的最大值"""
+    ddt = difference_distribution_table(inverse)
+    return max(max(row) for row in ddt[1:])
+
+
+def linearity(inverse=False):
+    """线性度：LAT中除 a=0 外绝对值的最大值"""
+    lat = linear_approximation_table(inverse)
+    return max(abs(v) for row in lat[1:] for v in row)
+
+
+# ============== 整体密码差分统计 ==============
+
+def cipher_difference_counts(key, input_diff, engine=None):
+    """
+    在给定密钥下对全部2^16个明文统计输出差分
+    返回长度65536的计数表 counts[Δy] = #{P : E(P) ⊕ E(P ⊕ Δx) = Δy}
+    """
+    engine = engine if engine is not None else get_batch_engine()
+    codebook = engine.codebook(key)
+    if np is not None and isinstance(codebook, np.ndarray):
+        partner = codebook[np.arange(KEY_SPACE, dtype=np.uint16) ^ np.uint16(input_diff)]
+        return np.bincount(codebook ^ partner, minlength=KEY_SPACE)
+    counts = array('L', bytes(array('L').itemsize * KEY_SPACE))
+    for diff, count in Counter([c ^ codebook[p ^ input_diff] for p, c in enumerate(codebook)]).items():
+        counts[diff] = count
+    return counts
+
+
+def cipher_differential_statistics(input_diff, keys, top=10, engine=None):
+    """
+    对多个密钥累加输出差分计数
+    返回字典：total为累加计数表，best为出现次数最多的top个 (Δy, 次数)，
+    max_probability为最大差分概率（按每个密钥2^16个明文归一化）
+    """
+    engine = engine if engine is not None else get_batch_engine()
+    keys = list(keys)
+    total = None
+    for key in keys:
+        counts = cipher_difference_counts(key, input_diff, engine)
+        if total is None:
+            total = counts.copy() if hasattr(counts, 'copy') else array('L', counts)
+        elif np is not None and isinstance(total, np.ndarray):
+            total += counts
+        else:
+            for diff, count in enumerate(counts):
+                if count:
+                    total[diff] += count
+    if total is None:
+        raise ValueError("至少需要一个密钥")
+    best = sorted(((diff, int(count)) for diff, count in enumerate(total) if count),
+                  key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'input_diff': input_diff,
+        'keys': len(keys),
+        'total': total,
+        'best': best,
+        'max_probability': best[0][1] / (KEY_SPACE * len(keys)) if best else 0.0,
+    }
+
+
+# ============== 雪崩与扩散统计 ==============
+
+AVALANCHE_MODES = ('encrypt', 'decrypt', 'double', 'triple_32bit', 'triple_48bit')
+_MODE_KEY_COUNT = {'encrypt': 1, 'decrypt': 1, 'double': 2, 'triple_32bit': 2, 'triple_48bit': 3}
+_MODE_NAMES = {
+    'encrypt': 'encrypt',
+    'decrypt': 'decrypt',
+    'double': 'double_encrypt',
+    'triple_32bit': 'triple_encrypt_32bit',
+    'triple_48bit': 'triple_encrypt_48bit',
+}
+
+
+def mode_codebook(mode, keys, engine=None):
+    """
+    构建某种加密方式在给定密钥下的完整码本（2^16置换表）
+    mode: 'encrypt'/'decrypt'/'double'/'triple_32bit'/'triple_48bit'
+    keys: 对应方式所需的密钥元组（单密钥方式也可直接传整数）
+    """
+    if mode not in _MODE_NAMES:
+        raise ValueError(f"不支持的加密方式: {mode}")
+    engine = engine if engine is not None else get_batch_engine()
+    return engine.cascade_codebook(mode_layers(_MODE_NAMES[mode], keys))
+
+
+def _bit_flip_counts(diffs):
+    """统计差值序列中每个比特位为1的次数，返回长度16的列表（第j项对应 1<<j）"""
+    if np is not None and isinstance(diffs, np.ndarray):
+        bits = np.unpackbits(diffs.astype('<u2').view(np.uint8).reshape(-1, 2),
+                             axis=1, bitorder='little')
+        return [int(v) for v in bits.sum(axis=0, dtype=np.int64)]
+    # 纯Python：按高/低字节分别做直方图，再在256个取值上累加各比特
+    data = array('H', diffs)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    raw = data.tobytes()
+    counts = [0] * 16
+    for offset, histogram in ((0, Counter(raw[0::2])), (8, Counter(raw[1::2]))):
+        for value, count in histogram.items():
+            for j in range(8):
+                if (value >> j) & 1:
+                    counts[offset + j] += count
+    return counts
+
+
+def _avalanche_counts(codebook):
+    """对一个码本统计全部明文上翻转输入比特i时输出比特j的翻转次数（16×16）"""
+    matrix = []
+    if np is not None and isinstance(codebook, np.ndarray):
+        index = np.arange(KEY_SPACE, dtype=np.uint16)
+        for i in range(16):
+            matrix.append(_bit_flip_counts(codebook ^ codebook[index ^ np.uint16(1 << i)]))
+        return matrix
+    for i in range(16):
+        mask = 1 << i
+        matrix.append(_bit_flip_counts([c ^ codebook[p ^ mask] for p, c in enumerate(codebook)]))
+    return matrix
+
+
+def _sample_keys(mode, samples, seed):
+    rng = random.Random(seed)
+    n = _MODE_KEY_COUNT[mode]
+    return [tuple(rng.randrange(KEY_SPACE) for _ in range(n)) for _ in range(samples)]
+
+
+def avalanche_matrix(mode='encrypt', keys=None, samples=16, seed=None, engine=None):
+    """
+    雪崩矩阵：matrix[i][j] 为翻转输入比特i（1<<i）时输出比特j（1<<j）翻转的概率
+    对每个密钥遍历全部2^16个明文；密钥按流式逐个处理并累加计数，内存占用恒定
+    keys: 密钥（或密钥元组）序列；为None时随机抽取samples个；
+          为'all'时遍历全部单密钥（仅适用于encrypt/decrypt）
+    返回字典：matrix、counts、trials（每个输入比特的试验次数）、
+    mean（平均翻转概率，理想值0.5）、min/max
+    """
+    if mode not in AVALANCHE_MODES:
+        raise ValueError(f"不支持的加密方式: {mode}")
+    engine = engine if engine is not None else get_batch_engine()
+    if keys is None:
+        keys = _sample_keys(mode, samples, seed)
+    elif keys == 'all':
+        if _MODE_KEY_COUNT[mode] != 1:
+            raise ValueError("只有单密钥方式可以遍历全部密钥")
+        keys = range(KEY_SPACE)
+
+    counts = [[0] * 16 for _ in range(16)]
+    n_keys = 0
+    for key in keys:
+        partial = _avalanche_counts(mode_codebook(mode, key, engine))
+        for i in range(16):
+            row, part = counts[i], partial[i]
+            for j in range(16):
+                row[j] += part[j]
+        n_keys += 1
+    if not n_keys:
+        raise ValueError("至少需要一个密钥")
+
+    trials = n_keys * KEY_SPACE
+    matrix = [[c / trials for c in row] for row in counts]
+    flat = [v for row in matrix for v in row]
+    return {
+        'mode': mode,
+        'keys': n_keys,
+        'trials': trials,
+        'counts': counts,
+        'matrix': matrix,
+        'mean': sum(flat) / len(flat),
+        'min': min(flat),
+        'max': max(flat),
+    }
+
+
+def cbc_error_propagation(keys=None, samples=16, messages=4096, length=3, seed=None, engine=None):
+    """
+    CBC模式错误传播统计
+    随机生成messages条长度为length的密文，翻转C_0的第i位后做CBC解密，
+    统计每个明文块位置上各比特的翻转概率
+    返回字典：matrices[t][i][j] 为翻转C_0比特i时P_t比特j翻转的概率；
+    理论上P_0呈完全扩散、P_1恰好翻转同一比特、之后的块不受影响
+    """
+    engine = engine if engine is not None else get_batch_engine()
+    rng = random.Random(seed)
+    if keys is None:
+        keys = [rng.randrange(KEY_SPACE) for _ in range(samples)]
+
+    counts = [[[0] * 16 for _ in range(16)] for _ in range(length)]
+    n_keys = 0
+    for key in keys:
+        iv = rng.randrange(KEY_SPACE)
+        cipher = [array('H', [rng.randrange(KEY_SPACE) for _ in range(messages)]) for _ in range(length)]
+        plain = _cbc_decrypt_columns(engine, cipher, key, iv)
+        for i in range(16):
+            mask = 1 << i
+            tampered = list(cipher)
+            tampered[0] = array('H', [c ^ mask for c in cipher[0]])
+            tampered_plain = _cbc_decrypt_columns(engine, tampered, key, iv)
+            for t in range(length):
+                flips = _bit_flip_counts([a ^ b for a, b in zip(plain[t], tampered_plain[t])])
+                row = counts[t][i]
+                for j in range(16):
+                    row[j] += flips[j]
+        n_keys += 1
+    if not n_keys:
+        raise ValueError("至少需要一个密钥")
+
+    trials = n_keys * messages
+    return {
+        'keys': n_keys,
+        'trials': trials,
+        'counts': counts,
+        'matrices': [[[c / trials for c in row] for row in block] for block in counts],
+    }
+
+
+def _cbc_decrypt_columns(engine, cipher, key, iv):
+    """
+    按块位置批量做CBC解密：cipher[t]为所有消息第t块组成的数组
+    P_t = D_K(C_t) ⊕ C_{t-1}，C_{-1} = IV
+    """
+    plain = []
+    previous = None
+    for column in cipher:
+        decrypted = engine.decrypt_blocks(column, key)
+        if previous is None:
+            plain.append(array('H', [d ^ iv for d in decrypted]))
+        else:
+            plain.append(array('H', [d ^ c for d, c in zip(decrypted, previous)]))
+        previous = column
+    return plain
+
+
+# ============== 码本置换结构分析 ==============
+
+def cycle_structure(codebook):
+    """
+    对一个2^16置换做轮换分解
+    访问标记使用8KB的位图（每个块1比特）
+    返回 (轮换长度计数Counter, 不动点列表)
+    """
+    if np is not None and isinstance(codebook, np.ndarray):
+        codebook = codebook.tolist()
+    visited = bytearray(KEY_SPACE // 8)
+    lengths = Counter()
+    fixed_points = []
+    for start in range(KEY_SPACE):
+        if (visited[start >> 3] >> (start & 7)) & 1:
+            continue
+        length = 0
+        x = start
+        while not (visited[x >> 3] >> (x & 7)) & 1:
+            visited[x >> 3] |= 1 << (x & 7)
+            x = codebook[x]
+            length += 1
+        lengths[length] += 1
+        if length == 1:
+            fixed_points.append(start)
+    return lengths, fixed_points
+
+
+def codebook_digest(codebook):
+    """码本摘要，用于检测产生相同置换的等价密钥"""
+    if np is not None and isinstance(codebook, np.ndarray):
+        data = codebook.astype('<u2').tobytes()
+    else:
+        data = array('H', codebook)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        data = data.tobytes()
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def permutation_summary(key, engine=None):
+    """
+    单个密钥所定义置换的结构摘要
+    返回字典：key、cycles（轮换个数）、cycle_lengths（长度→个数）、longest、
+    order（置换的阶，即各轮换长度的最小公倍数）、fixed_points、involution、digest
+    """
+    engine = engine if engine is not None else get_batch_engine()
+    codebook = engine.codebook(key)
+    lengths, fixed_points = cycle_structure(codebook)
+    order = 1
+    for length in lengths:
+        order = order * length // math.gcd(order, length)
+    return {
+        'key': key,
+        'cycles': sum(lengths.values()),
+        'cycle_lengths': dict(lengths),
+        'longest': max(lengths),
+        'order': order,
+        'fixed_points': fixed_points,
+        'involution': max(lengths) <= 2,
+        'digest': codebook_digest(codebook),
+    }
+
+
+def _survey_keys(keys):
+    engine = get_batch_engine()
+    return [permutation_summary(key, engine) for key in keys]
+
+
+def permutation_survey(keys=None, workers=None, chunk_size=1024, fixed_threshold=8):
+    """
+    在多个密钥（默认全部65536个）上统计置换结构，密钥区间分块后多进程并行
+    弱密钥判定：置换为对合（加密即解密），或不动点个数不少于fixed_threshold
+    等价密钥判定：码本摘要相同的密钥
+    返回字典：summaries（按密钥排序）、weak_keys、equivalent_keys（密钥组列表）、
+    total_fixed_points、cycle_count_histogram
+    """
+    keys = range(KEY_SPACE) if keys is None else sorted(set(keys))
+    chunks = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    if workers <= 1:
+        summaries = [item for chunk in chunks for item in _survey_keys(chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            summaries = [item for part in pool.map(_survey_keys, chunks) for item in part]
+
+    by_digest = {}
+    for summary in summaries:
+        by_digest.setdefault(summary['digest'], []).append(summary['key'])
+    weak_keys = [s['key'] for s in summaries
+                 if s['involution'] or len(s['fixed_points']) >= fixed_threshold]
+
+    return {
+        'summaries': summaries,
+        'weak_keys': weak_keys,
+        'equivalent_keys': [group for group in by_digest.values() if len(group) > 1],
+        'total_fixed_points': sum(len(s['fixed_points']) for s in summaries),
+        'cycle_count_histogram': dict(Counter(s['cycles'] for s in summaries)),
+    }
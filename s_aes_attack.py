@@ -0,0 +1,292 @@
+"""
+S-AES 密钥恢复攻击
+基于批量引擎对16位密钥空间进行穷举，支持已知明文攻击、唯密文攻击和CBC模式密钥恢复
+"""
+
+import heapq
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from s_aes import SAES
+from s_aes_batch import KEY_SPACE, get_batch_engine
+
+
+class KeyRecoveryResult:
+    """
+    密钥恢复结果
+    key: 唯一确定的密钥（候选不唯一或无候选时为None）
+    candidates: 通过全部筛选的候选密钥列表
+    stats: 计时与筛选统计
+    """
+
+    def __init__(self, key, candidates, stats):
+        self.key = key
+        self.candidates = candidates
+        self.stats = stats
+
+    @property
+    def found(self):
+        return self.key is not None
+
+    def __repr__(self):
+        key = f"{self.key:04X}" if self.key is not None else None
+        return (f"KeyRecoveryResult(key={key}, candidates={len(self.candidates)}, "
+                f"total_time={self.stats['total_time']:.4f}s)")
+
+
+def recover_key(pairs, engine=None):
+    """
+    已知明文攻击：由多组 (明文, 密文) 对恢复单重S-AES的16位密钥
+    1. 用第一组明密文对在全部65536个密钥上批量加密，保留匹配的密钥
+    2. 用后续明密文对逐组筛选剩余候选
+    """
+    pairs = list(pairs)
+    if not pairs:
+        raise ValueError("至少需要一组明密文对")
+    engine = engine if engine is not None else get_batch_engine()
+
+    start = time.perf_counter()
+
+    # 第一阶段：全密钥空间遍历
+    plaintext, ciphertext = pairs[0]
+    candidates = engine.match_keys(plaintext, ciphertext)
+    sweep_time = time.perf_counter() - start
+    survivors = [len(candidates)]
+
+    # 第二阶段：用后续明密文对筛选候选
+    filter_start = time.perf_counter()
+    for plaintext, ciphertext in pairs[1:]:
+        if not candidates:
+            break
+        candidates = engine.match_keys(plaintext, ciphertext, candidates)
+        survivors.append(len(candidates))
+    end = time.perf_counter()
+
+    stats = {
+        'sweep_time': sweep_time,
+        'filter_time': end - filter_start,
+        'total_time': end - start,
+        'pairs_used': len(survivors),
+        'survivors': survivors,
+        'keys_per_second': 0x10000 / sweep_time if sweep_time > 0 else float('inf'),
+    }
+    key = candidates[0] if len(candidates) == 1 else None
+    return KeyRecoveryResult(key, candidates, stats)
+
+
+# ============== 唯密文攻击 ==============
+
+def _build_byte_scores():
+    """
+    单字节评分模型：英文文本中常见的字节得分高，
+    控制字符和UTF-8中不可能出现的字节得分很低
+    """
+    scores = [-20] * 256
+    for b in range(0x20, 0x7F):
+        scores[b] = 1
+    for b in b'abcdefghijklmnopqrstuvwxyz':
+        scores[b] = 4
+    for b in b'etaoinshr':
+        scores[b] = 6
+    for b in b'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789':
+        scores[b] = 3
+    for b in b' ':
+        scores[b] = 7
+    for b in b'.,;:\'"!?-()':
+        scores[b] = 2
+    for b in b'\t\n\r':
+        scores[b] = 1
+    # UTF-8多字节序列的续字节与首字节（如中文）
+    for b in range(0x80, 0xC0):
+        scores[b] = 3
+    for b in range(0xC2, 0xF5):
+        scores[b] = 2
+    # 常用汉字的UTF-8首字节
+    for b in range(0xE4, 0xEA):
+        scores[b] = 5
+    return scores
+
+
+BYTE_SCORES = _build_byte_scores()
+
+_block_scores = None
+
+
+def _pair_penalty(high, low):
+    """块内两个字节违反UTF-8结构时的罚分：ASCII后接续字节，或首字节后不接续字节"""
+    low_is_cont = 0x80 <= low < 0xC0
+    if high < 0x80 and low_is_cont:
+        return -20
+    if 0xC2 <= high < 0xF5 and not low_is_cont:
+        return -20
+    return 0
+
+
+def block_scores():
+    """16位块评分表（两个字节得分之和加上UTF-8结构罚分），首次调用时构建"""
+    global _block_scores
+    if _block_scores is None:
+        _block_scores = [BYTE_SCORES[h] + BYTE_SCORES[l] + _pair_penalty(h, l)
+                         for h in range(256) for l in range(256)]
+    return _block_scores
+
+
+def _score_key_range(prefix, start, stop, top_k):
+    """
+    对密钥区间[start, stop)打分，返回区间内得分最高的top_k个 (得分, 密钥)
+    prefix中的每个密文块都在整个区间上批量解密
+    """
+    engine = get_batch_engine()
+    table = block_scores()
+    scores = [0] * (stop - start)
+    for block in prefix:
+        plain = engine.decrypt_all_keys(block, start, stop)
+        scores = [s + table[v] for s, v in zip(scores, plain)]
+    return heapq.nlargest(top_k, zip(scores, range(start, stop)))
+
+
+def _is_valid_utf8(data):
+    try:
+        data.decode('utf-8')
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def ciphertext_only_attack(ciphertext_blocks, prefix_blocks=8, top_k=32, workers=None):
+    """
+    唯密文攻击：针对 encrypt_ascii 的输出，在未知密钥的情况下恢复明文
+    1. 取前 prefix_blocks 个密文块，在全部密钥上批量解密并按字节频率模型打分
+    2. 密钥空间按进程数切分并行计算，各进程保留局部top_k，再合并为全局top_k
+    3. 只对得分最高的候选密钥完整解密（与 decrypt_ascii 语义一致），
+       能正确解码为UTF-8的候选排在前面
+    返回KeyRecoveryResult，candidates为 (密钥, 得分, 明文) 列表，key为最佳候选
+    """
+    ciphertext_blocks = list(ciphertext_blocks)
+    if not ciphertext_blocks:
+        raise ValueError("密文不能为空")
+    prefix = ciphertext_blocks[:prefix_blocks]
+    # 末尾块可能含填充的0字节，不参与打分
+    if len(prefix) == len(ciphertext_blocks) and len(prefix) > 1:
+        prefix = prefix[:-1]
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    start = time.perf_counter()
+    if workers <= 1:
+        best = _score_key_range(prefix, 0, KEY_SPACE, top_k)
+    else:
+        step = -(-KEY_SPACE // workers)
+        bounds = [(lo, min(lo + step, KEY_SPACE)) for lo in range(0, KEY_SPACE, step)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_score_key_range, prefix, lo, hi, top_k) for lo, hi in bounds]
+            partial = [item for future in futures for item in future.result()]
+        best = heapq.nlargest(top_k, partial)
+    search_time = time.perf_counter() - start
+
+    # 只对胜出的候选密钥完整解密
+    engine = get_batch_engine()
+    saes = engine.saes
+    candidates = []
+    for score, key in best:
+        plain_blocks = engine.decrypt_blocks(ciphertext_blocks, key)
+        raw = bytes(b for block in plain_blocks for b in (block >> 8, block & 0xFF))
+        valid = _is_valid_utf8(raw.rstrip(b'\x00'))
+        candidates.append((valid, score, key, saes.blocks_to_string(plain_blocks)))
+    candidates.sort(key=lambda c: (c[0], c[1]), reverse=True)
+    end = time.perf_counter()
+
+    stats = {
+        'search_time': search_time,
+        'decrypt_time': end - start - search_time,
+        'total_time': end - start,
+        'prefix_blocks': len(prefix),
+        'workers': workers,
+    }
+    candidates = [(key, score, text) for _, score, key, text in candidates]
+    key = candidates[0][0] if candidates else None
+    return KeyRecoveryResult(key, candidates, stats)
+
+
+# ============== CBC模式密钥恢复 ==============
+
+def cbc_known_plaintext_attack(plaintext_blocks, ciphertext_blocks, iv=None):
+    """
+    CBC模式已知明文攻击，无需知道IV
+    对 i >= 1 有 C_i = E_K(P_i ⊕ C_{i-1})，因此 (P_i ⊕ C_{i-1}, C_i)
+    就是普通的已知明密文对，可直接用批量密钥遍历恢复K；
+    再由 IV = D_K(C_0) ⊕ P_0 推出初始向量
+    plaintext_blocks: 已知的明文前缀块（至少2块，已知IV时至少1块）
+    返回KeyRecoveryResult，stats['iv']为推导出的IV
+    """
+    plaintext_blocks = list(plaintext_blocks)
+    ciphertext_blocks = list(ciphertext_blocks)
+    n = min(len(plaintext_blocks), len(ciphertext_blocks))
+    pairs = [(plaintext_blocks[i] ^ ciphertext_blocks[i - 1], ciphertext_blocks[i])
+             for i in range(1, n)]
+    if iv is not None and n > 0:
+        pairs.insert(0, (plaintext_blocks[0] ^ iv, ciphertext_blocks[0]))
+    if not pairs:
+        raise ValueError("未知IV时至少需要2个已知明文块")
+
+    result = recover_key(pairs)
+    if result.found and n > 0:
+        engine = get_batch_engine()
+        result.stats['iv'] = engine.decrypt_block(ciphertext_blocks[0], result.key) ^ plaintext_blocks[0]
+    else:
+        result.stats['iv'] = iv
+    return result
+
+
+def cbc_batch_attack(messages):
+    """
+    批量CBC密钥恢复
+    messages: (已知明文前缀块, 密文块) 的序列，每条消息可使用不同的密钥和IV
+    返回与输入顺序一致的KeyRecoveryResult列表
+    """
+    # 各消息的密钥遍历共用同一个批量引擎和全部轮密钥表
+    get_batch_engine().all_round_keys()
+    return [cbc_known_plaintext_attack(p, c) for p, c in messages]
+
+
+def _naive_cbc_key_search(saes, plaintext_blocks, ciphertext_blocks):
+    """逐个密钥调用 SAES.cbc_decrypt 验证的朴素做法，作为基准对照"""
+    n = min(len(plaintext_blocks), len(ciphertext_blocks))
+    keys = []
+    for key in range(KEY_SPACE):
+        # 从第2块开始解密，C_0 充当IV，无需知道真实IV
+        if saes.cbc_decrypt(ciphertext_blocks[1:n], key, ciphertext_blocks[0]) == plaintext_blocks[1:n]:
+            keys.append(key)
+    return keys
+
+
+def benchmark_cbc_attack(n_blocks=4, key=None, iv=None):
+    """
+    对比批量CBC攻击与朴素逐密钥循环的耗时
+    返回包含两种方法耗时、加速比和恢复结果的字典
+    """
+    saes = SAES()
+    key = key if key is not None else random.randint(0, 0xFFFF)
+    iv = iv if iv is not None else random.randint(0, 0xFFFF)
+    plaintext_blocks = [random.randint(0, 0xFFFF) for _ in range(n_blocks)]
+    ciphertext_blocks = saes.cbc_encrypt(plaintext_blocks, key, iv)
+
+    get_batch_engine().all_round_keys()  # 排除一次性建表开销
+    start = time.perf_counter()
+    result = cbc_known_plaintext_attack(plaintext_blocks, ciphertext_blocks)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    naive_keys = _naive_cbc_key_search(saes, plaintext_blocks, ciphertext_blocks)
+    naive_time = time.perf_counter() - start
+
+    return {
+        'key': key,
+        'iv': iv,
+        'recovered_key': result.key,
+        'recovered_iv': result.stats['iv'],
+        'batch_time': batch_time,
+        'naive_time': naive_time,
+        'speedup': naive_time / batch_time if batch_time > 0 else float('inf'),
+        'naive_keys': naive_keys,
+    }
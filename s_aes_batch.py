@@ -0,0 +1,551 @@
+"""
+S-AES 批量运算引擎
+将轮函数预先展开为与密钥无关的65536项查找表，
+支持对大量数据块、或对全部65536个密钥进行批量加解密（密钥遍历）
+安装了NumPy时自动使用向量化实现，否则使用纯Python查表实现
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+from s_aes import SAES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+KEY_SPACE = 0x10000
+
+# 多层加密时，数据块数超过该值则先复合出整张码本再逐块查表
+# （复合码本需对全部65536个值各跑一遍流水线）
+COMPOSE_THRESHOLD = 0x18000
+
+# 批量密钥扩展时不同密钥数超过该值，直接使用全部密钥的轮密钥表（首次需计算65536个密钥）
+MANY_KEYS = 0x2000
+
+# 每个方向的两个轮函数查找表（按执行顺序）
+_LAYER_TABLES = {
+    'E': ('enc_round1', 'enc_round2'),
+    'D': ('dec_round2', 'dec_round1'),
+}
+
+# SAES中各加解密方法对应的层序列：(密钥序号, 方向)
+MODE_LAYERS = {
+    'encrypt': ((0, 'E'),),
+    'decrypt': ((0, 'D'),),
+    'double_encrypt': ((0, 'E'), (1, 'E')),
+    'double_decrypt': ((1, 'D'), (0, 'D')),
+    'triple_encrypt_32bit': ((0, 'E'), (1, 'D'), (0, 'E')),
+    'triple_decrypt_32bit': ((0, 'D'), (1, 'E'), (0, 'D')),
+    'triple_encrypt_48bit': ((0, 'E'), (1, 'D'), (2, 'E')),
+    'triple_decrypt_48bit': ((2, 'D'), (1, 'E'), (0, 'D')),
+}
+
+
+def mode_layers(mode, keys):
+    """
+    返回SAES某个加解密方法（按方法名）在给定密钥下的层序列
+    keys: 密钥元组，单密钥方法也可直接传整数
+    """
+    if mode not in MODE_LAYERS:
+        raise ValueError(f"不支持的加密方式: {mode}")
+    if isinstance(keys, int):
+        keys = (keys,)
+    return [(keys[index], direction) for index, direction in MODE_LAYERS[mode]]
+
+
+class SAESBatch:
+    """
+    基于查表的S-AES批量引擎
+
+    加密: E_K(P) = F2[F1[P ⊕ K0] ⊕ K1] ⊕ K2
+        F1 = 列混淆 ∘ 行移位 ∘ 半字节替换（第1轮，与密钥无关）
+        F2 = 行移位 ∘ 半字节替换（第2轮，与密钥无关）
+    解密: D_K(C) = G2[G1[C ⊕ K2] ⊕ K1] ⊕ K0
+    """
+
+    def __init__(self, saes=None, use_numpy=True):
+        self.saes = saes if saes is not None else SAES()
+        self.use_numpy = use_numpy and np is not None
+        self._build_tables()
+        self._all_round_keys = None
+
+    def _build_tables(self):
+        """
+        构建查找表
+        半字节替换按字节拆分，行移位和列混淆在GF(2)上是线性的，
+        因此整张表可由高/低字节的两张256项子表异或得到
+        """
+        saes = self.saes
+
+        sub_hi = [saes.sub_nibbles(h << 8) & 0xFF00 for h in range(256)]
+        sub_lo = [saes.sub_nibbles(l) & 0x00FF for l in range(256)]
+        inv_sub_hi = [saes.sub_nibbles(h << 8, inverse=True) & 0xFF00 for h in range(256)]
+        inv_sub_lo = [saes.sub_nibbles(l, inverse=True) & 0x00FF for l in range(256)]
+
+        def combine(hi, lo):
+            return array('H', [a ^ b for a in hi for b in lo])
+
+        # 加密第1轮：列混淆(行移位(半字节替换(x)))
+        self.enc_round1 = combine(
+            [saes.mix_columns(saes.shift_rows(v)) for v in sub_hi],
+            [saes.mix_columns(saes.shift_rows(v)) for v in sub_lo])
+        # 加密第2轮：行移位(半字节替换(x))
+        self.enc_round2 = combine(
+            [saes.shift_rows(v) for v in sub_hi],
+            [saes.shift_rows(v) for v in sub_lo])
+
+        # 解密第2轮逆：逆半字节替换(行移位(x))，两者可交换
+        self.dec_round2 = combine(
+            [saes.shift_rows(v) for v in inv_sub_hi],
+            [saes.shift_rows(v) for v in inv_sub_lo])
+        # 解密第1轮逆：逆半字节替换(行移位(逆列混淆(x)))
+        inv_mix_shift = combine(
+            [saes.shift_rows(saes.mix_columns(h << 8, inverse=True)) for h in range(256)],
+            [saes.shift_rows(saes.mix_columns(l, inverse=True)) for l in range(256)])
+        inv_sub = combine(inv_sub_hi, inv_sub_lo)
+        self.dec_round1 = array('H', [inv_sub[v] for v in inv_mix_shift])
+
+        # 密钥扩展中的 g 函数表
+        self.g1 = [saes.RCON[0] ^ saes.sub_word(saes.rot_nib(w)) for w in range(256)]
+        self.g2 = [saes.RCON[1] ^ saes.sub_word(saes.rot_nib(w)) for w in range(256)]
+
+        if self.use_numpy:
+            self._np_enc_round1 = np.frombuffer(self.enc_round1, dtype=np.uint16)
+            self._np_enc_round2 = np.frombuffer(self.enc_round2, dtype=np.uint16)
+            self._np_dec_round1 = np.frombuffer(self.dec_round1, dtype=np.uint16)
+            self._np_dec_round2 = np.frombuffer(self.dec_round2, dtype=np.uint16)
+            # 查找表构建后只读，可被多个线程共享
+            for table in (self._np_enc_round1, self._np_enc_round2,
+                          self._np_dec_round1, self._np_dec_round2):
+                table.setflags(write=False)
+
+    # ============== 密钥扩展 ==============
+
+    def expand_key(self, key):
+        """快速密钥扩展，返回 (K0, K1, K2)，与 SAES.key_expansion 结果一致"""
+        w0 = (key >> 8) & 0xFF
+        w1 = key & 0xFF
+        w2 = w0 ^ self.g1[w1]
+        w3 = w2 ^ w1
+        w4 = w2 ^ self.g2[w3]
+        w5 = w4 ^ w3
+        return key & 0xFFFF, (w2 << 8) | w3, (w4 << 8) | w5
+
+    def all_round_keys(self):
+        """
+        全部65536个密钥的轮密钥（首次调用时计算并缓存）
+        返回 (K1数组, K2数组)，下标即主密钥，K0等于主密钥本身
+        """
+        if self._all_round_keys is None:
+            g1, g2 = self.g1, self.g2
+            k1_all = array('H', bytes(2 * KEY_SPACE))
+            k2_all = array('H', bytes(2 * KEY_SPACE))
+            for key in range(KEY_SPACE):
+                w1 = key & 0xFF
+                w2 = (key >> 8) ^ g1[w1]
+                w3 = w2 ^ w1
+                w4 = w2 ^ g2[w3]
+                k1_all[key] = (w2 << 8) | w3
+                k2_all[key] = (w4 << 8) | (w4 ^ w3)
+            self._all_round_keys = (k1_all, k2_all)
+        return self._all_round_keys
+
+    def _np_round_keys(self, keys=None, start=0, stop=KEY_SPACE):
+        """以NumPy数组形式返回 (K0, K1, K2)，keys为None时取密钥区间[start, stop)"""
+        k1_all, k2_all = self.all_round_keys()
+        k1_all = np.frombuffer(k1_all, dtype=np.uint16)
+        k2_all = np.frombuffer(k2_all, dtype=np.uint16)
+        if keys is None:
+            return np.arange(start, stop, dtype=np.uint16), k1_all[start:stop], k2_all[start:stop]
+        keys = np.asarray(keys, dtype=np.uint16)
+        return keys, k1_all[keys], k2_all[keys]
+
+    # ============== 单密钥、多数据块 ==============
+
+    def encrypt_block(self, block, key):
+        """加密单个数据块"""
+        k0, k1, k2 = self.expand_key(key)
+        return self.enc_round2[self.enc_round1[block ^ k0] ^ k1] ^ k2
+
+    def decrypt_block(self, block, key):
+        """解密单个数据块"""
+        k0, k1, k2 = self.expand_key(key)
+        return self.dec_round1[self.dec_round2[block ^ k2] ^ k1] ^ k0
+
+    def encrypt_blocks(self, blocks, key):
+        """
+        用同一密钥批量加密数据块（ECB）
+        输入为NumPy数组时返回NumPy数组，否则返回array('H')
+        """
+        k0, k1, k2 = self.expand_key(key)
+        if self.use_numpy and isinstance(blocks, np.ndarray):
+            blocks = blocks.astype(np.uint16, copy=False)
+            return self._np_enc_round2[self._np_enc_round1[blocks ^ k0] ^ k1] ^ np.uint16(k2)
+        t1, t2 = self.enc_round1, self.enc_round2
+        return array('H', [t2[t1[b ^ k0] ^ k1] ^ k2 for b in blocks])
+
+    def decrypt_blocks(self, blocks, key):
+        """
+        用同一密钥批量解密数据块（ECB）
+        输入为NumPy数组时返回NumPy数组，否则返回array('H')
+        """
+        k0, k1, k2 = self.expand_key(key)
+        if self.use_numpy and isinstance(blocks, np.ndarray):
+            blocks = blocks.astype(np.uint16, copy=False)
+            return self._np_dec_round1[self._np_dec_round2[blocks ^ k2] ^ k1] ^ np.uint16(k0)
+        t1, t2 = self.dec_round1, self.dec_round2
+        return array('H', [t1[t2[b ^ k2] ^ k1] ^ k0 for b in blocks])
+
+    def codebook(self, key):
+        """
+        完整码本：全部65536个明文在该密钥下的密文，下标即明文
+        安装NumPy时返回NumPy数组，否则返回array('H')
+        """
+        if self.use_numpy:
+            return self.encrypt_blocks(np.arange(KEY_SPACE, dtype=np.uint16), key)
+        return self.encrypt_blocks(range(KEY_SPACE), key)
+
+    def inverse_codebook(self, key):
+        """逆码本：全部65536个密文在该密钥下的明文，下标即密文"""
+        if self.use_numpy:
+            return self.decrypt_blocks(np.arange(KEY_SPACE, dtype=np.uint16), key)
+        return self.decrypt_blocks(range(KEY_SPACE), key)
+
+    # ============== 多层加密（双重/三重） ==============
+
+    def compile_layers(self, layers):
+        """
+        将 (密钥, 方向) 层序列编译为查表步骤，方向为'E'（加密）或'D'（解密）
+        每个密钥只扩展一次，相邻两层衔接处的两次轮密钥异或合并为一次
+        返回 (初始异或常量, [(查找表名, 异或常量), ...])
+        """
+        initial = 0
+        steps = []
+        for key, direction in layers:
+            if direction not in _LAYER_TABLES:
+                raise ValueError(f"层方向必须是'E'或'D': {direction}")
+            k0, k1, k2 = self.expand_key(key)
+            first_table, second_table = _LAYER_TABLES[direction]
+            if direction == 'E':
+                whitening, rounds = k0, [(first_table, k1), (second_table, k2)]
+            else:
+                whitening, rounds = k2, [(first_table, k1), (second_table, k0)]
+            if steps:
+                table, constant = steps[-1]
+                steps[-1] = (table, constant ^ whitening)
+            else:
+                initial ^= whitening
+            steps.extend(rounds)
+        return initial, steps
+
+    def run_steps(self, blocks, initial, steps):
+        """
+        执行编译好的查表步骤
+        输入为NumPy数组时返回NumPy数组，否则返回array('H')
+        """
+        if self.use_numpy and isinstance(blocks, np.ndarray):
+            data = blocks.astype(np.uint16) ^ np.uint16(initial)
+            for table, constant in steps:
+                data = getattr(self, '_np_' + table)[data] ^ np.uint16(constant)
+            return data
+        if not steps:
+            return array('H', [b ^ initial for b in blocks])
+        table, constant = steps[0]
+        table = getattr(self, table)
+        data = [table[b ^ initial] ^ constant for b in blocks]
+        for table, constant in steps[1:]:
+            table = getattr(self, table)
+            data = [table[v] ^ constant for v in data]
+        return array('H', data)
+
+    def cascade_codebook(self, layers):
+        """多层变换复合后的完整码本（2^16置换表），下标即输入块"""
+        initial, steps = self.compile_layers(layers)
+        if self.use_numpy:
+            return self.run_steps(np.arange(KEY_SPACE, dtype=np.uint16), initial, steps)
+        return self.run_steps(range(KEY_SPACE), initial, steps)
+
+    def cascade_blocks(self, blocks, layers):
+        """
+        对数据块依次施加多层变换
+        块数较少时逐层批量查表；块数超过COMPOSE_THRESHOLD时先复合出整张码本，
+        每个块只需一次查表
+        """
+        if not isinstance(blocks, (list, array, range)) and not (
+                self.use_numpy and isinstance(blocks, np.ndarray)):
+            blocks = list(blocks)
+        if len(blocks) >= COMPOSE_THRESHOLD:
+            codebook = self.cascade_codebook(layers)
+            if self.use_numpy and isinstance(blocks, np.ndarray):
+                return codebook[blocks.astype(np.uint16, copy=False)]
+            return array('H', [codebook[b] for b in blocks])
+        initial, steps = self.compile_layers(layers)
+        return self.run_steps(blocks, initial, steps)
+
+    def double_encrypt_blocks(self, blocks, key1, key2):
+        """批量双重加密：E_K2(E_K1(P))"""
+        return self.cascade_blocks(blocks, mode_layers('double_encrypt', (key1, key2)))
+
+    def double_decrypt_blocks(self, blocks, key1, key2):
+        """批量双重解密：D_K1(D_K2(C))"""
+        return self.cascade_blocks(blocks, mode_layers('double_decrypt', (key1, key2)))
+
+    def triple_encrypt_32bit_blocks(self, blocks, key1, key2):
+        """批量三重加密（32位密钥）：E_K1(D_K2(E_K1(P)))"""
+        return self.cascade_blocks(blocks, mode_layers('triple_encrypt_32bit', (key1, key2)))
+
+    def triple_decrypt_32bit_blocks(self, blocks, key1, key2):
+        """批量三重解密（32位密钥）：D_K1(E_K2(D_K1(C)))"""
+        return self.cascade_blocks(blocks, mode_layers('triple_decrypt_32bit', (key1, key2)))
+
+    def triple_encrypt_48bit_blocks(self, blocks, key1, key2, key3):
+        """批量三重加密（48位密钥）：E_K3(D_K2(E_K1(P)))"""
+        return self.cascade_blocks(blocks, mode_layers('triple_encrypt_48bit', (key1, key2, key3)))
+
+    def triple_decrypt_48bit_blocks(self, blocks, key1, key2, key3):
+        """批量三重解密（48位密钥）：D_K1(E_K2(D_K3(C)))"""
+        return self.cascade_blocks(blocks, mode_layers('triple_decrypt_48bit', (key1, key2, key3)))
+
+    # ============== 单数据块、多密钥（密钥遍历） ==============
+
+    def encrypt_all_keys(self, plaintext, start=0, stop=KEY_SPACE):
+        """
+        计算同一明文在密钥区间[start, stop)（默认全部65536个密钥）下的密文，
+        结果下标为 密钥 - start
+        安装NumPy时返回NumPy数组，否则返回array('H')
+        """
+        if self.use_numpy:
+            k0, k1, k2 = self._np_round_keys(start=start, stop=stop)
+            return self._np_enc_round2[self._np_enc_round1[k0 ^ plaintext] ^ k1] ^ k2
+        k1_all, k2_all = self.all_round_keys()
+        t1, t2 = self.enc_round1, self.enc_round2
+        return array('H', [t2[t1[plaintext ^ k0] ^ k1] ^ k2
+                           for k0, k1, k2 in zip(range(start, stop), k1_all[start:stop], k2_all[start:stop])])
+
+    def decrypt_all_keys(self, ciphertext, start=0, stop=KEY_SPACE):
+        """
+        计算同一密文在密钥区间[start, stop)（默认全部65536个密钥）下的解密结果，
+        结果下标为 密钥 - start
+        安装NumPy时返回NumPy数组，否则返回array('H')
+        """
+        if self.use_numpy:
+            k0, k1, k2 = self._np_round_keys(start=start, stop=stop)
+            return self._np_dec_round1[self._np_dec_round2[k2 ^ ciphertext] ^ k1] ^ k0
+        k1_all, k2_all = self.all_round_keys()
+        t1, t2 = self.dec_round1, self.dec_round2
+        return array('H', [t1[t2[ciphertext ^ k2] ^ k1] ^ k0
+                           for k0, k1, k2 in zip(range(start, stop), k1_all[start:stop], k2_all[start:stop])])
+
+    def encrypt_keys(self, plaintext, keys):
+        """计算同一明文在指定密钥列表下的密文，返回顺序与keys一致"""
+        if self.use_numpy and isinstance(keys, np.ndarray):
+            k0, k1, k2 = self._np_round_keys(keys)
+            return self._np_enc_round2[self._np_enc_round1[k0 ^ plaintext] ^ k1] ^ k2
+        k1_all, k2_all = self.all_round_keys()
+        t1, t2 = self.enc_round1, self.enc_round2
+        return array('H', [t2[t1[plaintext ^ k] ^ k1_all[k]] ^ k2_all[k] for k in keys])
+
+    def match_keys(self, plaintext, ciphertext, keys=None):
+        """
+        返回满足 E_K(plaintext) == ciphertext 的密钥列表
+        keys为None时遍历全部密钥空间，否则只在给定密钥中筛选
+        """
+        if keys is None:
+            results = self.encrypt_all_keys(plaintext)
+            if self.use_numpy:
+                return [int(k) for k in np.flatnonzero(results == ciphertext)]
+            return [k for k, c in enumerate(results) if c == ciphertext]
+        keys = list(keys)
+        results = self.encrypt_keys(plaintext, keys)
+        return [k for k, c in zip(keys, results) if c == ciphertext]
+
+    # ============== 多数据块、逐块密钥 ==============
+
+    def expand_keys(self, keys):
+        """
+        批量密钥扩展：返回与keys等长的 (K0, K1, K2)
+        启用NumPy时为NumPy数组，否则为array('H')
+        每个不同的密钥只扩展一次；不同密钥很多时直接索引全部密钥的轮密钥表
+        """
+        if not self.use_numpy:
+            cache = {}
+            k0, k1, k2 = array('H'), array('H'), array('H')
+            for key in keys:
+                key &= 0xFFFF
+                round_keys = cache.get(key)
+                if round_keys is None:
+                    round_keys = cache[key] = self.expand_key(key)
+                k0.append(key)
+                k1.append(round_keys[1])
+                k2.append(round_keys[2])
+            return k0, k1, k2
+        keys = np.asarray(keys, dtype=np.uint16)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        if len(unique) > MANY_KEYS:
+            return self._np_round_keys(keys)
+        schedule = np.array([self.expand_key(int(k)) for k in unique], dtype=np.uint16).reshape(-1, 3)
+        return keys, schedule[inverse, 1], schedule[inverse, 2]
+
+    def encrypt_blocks_keyed(self, blocks, schedule):
+        """
+        逐块用不同密钥加密：schedule为 expand_keys 的结果，与blocks等长
+        输入为NumPy数组时返回NumPy数组，否则返回array('H')
+        """
+        k0, k1, k2 = schedule
+        if self.use_numpy and isinstance(blocks, np.ndarray):
+            return self._np_enc_round2[self._np_enc_round1[blocks ^ k0] ^ k1] ^ k2
+        t1, t2 = self.enc_round1, self.enc_round2
+        return array('H', [t2[t1[b ^ a] ^ c] ^ d for b, a, c, d in zip(blocks, k0, k1, k2)])
+
+    def decrypt_blocks_keyed(self, blocks, schedule):
+        """
+        逐块用不同密钥解密：schedule为 expand_keys 的结果，与blocks等长
+        输入为NumPy数组时返回NumPy数组，否则返回array('H')
+        """
+        k0, k1, k2 = schedule
+        if self.use_numpy and isinstance(blocks, np.ndarray):
+            return self._np_dec_round1[self._np_dec_round2[blocks ^ k2] ^ k1] ^ k0
+        t1, t2 = self.dec_round1, self.dec_round2
+        return array('H', [t1[t2[b ^ c] ^ d] ^ a for b, a, d, c in zip(blocks, k0, k1, k2)])
+
+
+class CodebookCache:
+    """
+    复合码本的LRU缓存
+    以层序列（如双重/三重加密的密钥元组）为键缓存复合后的2^16置换表，
+    同一多密钥配置下的大批量数据每个块只需一次查表
+    max_bytes: 缓存占用内存上限（字节），每张码本约128KB
+    build_threshold: 同一配置累计处理的块数达到该值时才构建码本，
+                     否则直接走逐层查表流水线
+    """
+
+    def __init__(self, engine=None, max_bytes=8 * 1024 * 1024, build_threshold=COMPOSE_THRESHOLD):
+        self.engine = engine if engine is not None else get_batch_engine()
+        self.max_bytes = max_bytes
+        self.build_threshold = build_threshold
+        self._tables = OrderedDict()
+        self._traffic = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'builds': 0,
+            'evictions': 0,
+            'blocks_via_table': 0,
+            'blocks_via_pipeline': 0,
+        }
+
+    @staticmethod
+    def _table_bytes(table):
+        return len(table) * table.itemsize
+
+    def _lookup(self, cache_key):
+        with self._lock:
+            table = self._tables.get(cache_key)
+            if table is not None:
+                self._tables.move_to_end(cache_key)
+                self._stats['hits'] += 1
+            else:
+                self._stats['misses'] += 1
+            return table
+
+    def _should_build(self, cache_key, n_blocks):
+        """累计该配置的流量，达到阈值即值得构建码本"""
+        with self._lock:
+            total = self._traffic.pop(cache_key, 0) + n_blocks
+            if total >= self.build_threshold:
+                return True
+            self._traffic[cache_key] = total
+            # 流量计数只保留最近的若干配置
+            while len(self._traffic) > 1024:
+                self._traffic.popitem(last=False)
+            return False
+
+    def _store(self, cache_key, table):
+        size = self._table_bytes(table)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if cache_key in self._tables:
+                return
+            while self._tables and self._bytes + size > self.max_bytes:
+                _, evicted = self._tables.popitem(last=False)
+                self._bytes -= self._table_bytes(evicted)
+                self._stats['evictions'] += 1
+            self._tables[cache_key] = table
+            self._bytes += size
+            self._stats['builds'] += 1
+
+    def get(self, layers):
+        """取得（必要时构建并缓存）层序列对应的复合码本"""
+        cache_key = tuple((key, direction) for key, direction in layers)
+        table = self._lookup(cache_key)
+        if table is None:
+            table = self.engine.cascade_codebook(cache_key)
+            self._store(cache_key, table)
+        return table
+
+    def apply(self, blocks, layers):
+        """
+        对数据块施加多层变换
+        已缓存码本时直接查表；否则根据累计流量决定是构建码本还是走流水线
+        """
+        engine = self.engine
+        cache_key = tuple((key, direction) for key, direction in layers)
+        if not isinstance(blocks, (list, array, range)) and not (
+                engine.use_numpy and isinstance(blocks, np.ndarray)):
+            blocks = list(blocks)
+        n_blocks = len(blocks)
+
+        table = self._lookup(cache_key)
+        if table is None and self._should_build(cache_key, n_blocks):
+            table = engine.cascade_codebook(cache_key)
+            self._store(cache_key, table)
+
+        if table is None:
+            with self._lock:
+                self._stats['blocks_via_pipeline'] += n_blocks
+            initial, steps = engine.compile_layers(cache_key)
+            return engine.run_steps(blocks, initial, steps)
+
+        with self._lock:
+            self._stats['blocks_via_table'] += n_blocks
+        if engine.use_numpy and isinstance(blocks, np.ndarray):
+            return table[blocks.astype(np.uint16, copy=False)]
+        return array('H', [table[b] for b in blocks])
+
+    def apply_mode(self, blocks, mode, keys):
+        """按SAES方法名施加变换，如 apply_mode(blocks, 'triple_encrypt_48bit', (k1, k2, k3))"""
+        return self.apply(blocks, mode_layers(mode, keys))
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self._traffic.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """返回统计信息：命中/未命中/构建/淘汰次数、各路径处理的块数、当前占用"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._tables)
+            stats['bytes_used'] = self._bytes
+            stats['max_bytes'] = self.max_bytes
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+_default_batch = None
+
+
+def get_batch_engine():
+    """返回共享的默认批量引擎（首次调用时构建查找表）"""
+    global _default_batch
+    if _default_batch is None:
+        _default_batch = SAESBatch()
+    return _default_batch
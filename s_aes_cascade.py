@@ -0,0 +1,156 @@
+"""
+S-AES 任意层数级联加密
+接受任意长度的 (密钥, 方向) 层序列，编译一次后对批量数据或数据流加解密
+"""
+
+import threading
+from array import array
+from s_aes_batch import KEY_SPACE, get_batch_engine
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_INVERSE_DIRECTION = {'E': 'D', 'D': 'E'}
+
+
+def simplify_layers(layers):
+    """
+    化简层序列：相邻的同密钥加密/解密互为逆运算，直接抵消
+    例如 [(K, 'E'), (K, 'D')] 化简为空序列
+    """
+    result = []
+    for key, direction in layers:
+        if direction not in _INVERSE_DIRECTION:
+            raise ValueError(f"层方向必须是'E'或'D': {direction}")
+        key &= 0xFFFF
+        if result and result[-1] == (key, _INVERSE_DIRECTION[direction]):
+            result.pop()
+        else:
+            result.append((key, direction))
+    return result
+
+
+def invert_layers(layers):
+    """逆变换的层序列：顺序反转，方向互换"""
+    return [(key, _INVERSE_DIRECTION[direction]) for key, direction in reversed(layers)]
+
+
+class Cascade:
+    """
+    N层级联加密
+    layers: (密钥, 方向) 序列，方向为'E'或'D'，按顺序施加于明文
+    compose: True 立即复合为整张码本；False 始终逐层查表；
+             'auto' 累计处理的块数足以摊销建表开销后再复合
+    编译计划：先抵消互逆的相邻层，再把每层展开为查表步骤（相邻层的轮密钥异或合并），
+    复合后每个块只需一次查表
+    """
+
+    def __init__(self, layers, engine=None, compose='auto'):
+        self.engine = engine if engine is not None else get_batch_engine()
+        self.layers = [(key & 0xFFFF, direction) for key, direction in layers]
+        self.plan_layers = simplify_layers(self.layers)
+        self.compose = compose
+        self._forward = self.engine.compile_layers(self.plan_layers)
+        self._backward = self.engine.compile_layers(invert_layers(self.plan_layers))
+        n_steps = len(self._forward[1])
+        # 逐层查表每块需n_steps次查表，复合后只需1次，建表需65536×n_steps次
+        if n_steps > 1:
+            self.compose_threshold = KEY_SPACE * n_steps // (n_steps - 1)
+        else:
+            self.compose_threshold = None
+        self._codebook = None
+        self._inverse_codebook = None
+        self._traffic = 0
+        self._lock = threading.Lock()
+        if compose is True and self.compose_threshold is not None:
+            self._build_codebooks()
+
+    def __len__(self):
+        return len(self.layers)
+
+    def __repr__(self):
+        layers = ', '.join(f"{direction}({key:04X})" for key, direction in self.layers)
+        return f"Cascade([{layers}])"
+
+    def inverse(self):
+        """返回逆级联（解密方向）"""
+        return Cascade(invert_layers(self.layers), self.engine, self.compose)
+
+    def plan(self):
+        """描述编译后的执行计划"""
+        return {
+            'layers': len(self.layers),
+            'effective_layers': len(self.plan_layers),
+            'steps': len(self._forward[1]),
+            'codebook': self._codebook is not None,
+            'compose_threshold': self.compose_threshold,
+            'traffic': self._traffic,
+        }
+
+    def _build_codebooks(self):
+        engine = self.engine
+        codebook = engine.cascade_codebook(self.plan_layers)
+        if engine.use_numpy and isinstance(codebook, np.ndarray):
+            inverse = np.empty_like(codebook)
+            inverse[codebook] = np.arange(KEY_SPACE, dtype=np.uint16)
+        else:
+            inverse = array('H', bytes(2 * KEY_SPACE))
+            for x, y in enumerate(codebook):
+                inverse[y] = x
+        # 读取方只检查 _codebook，因此先发布逆码本，再发布正向码本
+        self._inverse_codebook = inverse
+        self._codebook = codebook
+
+    def _use_codebook(self, n_blocks):
+        if self._codebook is not None:
+            return True
+        if self.compose != 'auto':
+            return False
+        if self.compose_threshold is None:
+            return False
+        with self._lock:
+            self._traffic += n_blocks
+            if self._codebook is None and self._traffic >= self.compose_threshold:
+                self._build_codebooks()
+        return self._codebook is not None
+
+    def _apply(self, blocks, compiled, codebook_attr):
+        engine = self.engine
+        is_numpy = engine.use_numpy and isinstance(blocks, np.ndarray)
+        if not is_numpy and not isinstance(blocks, (list, array, range)):
+            blocks = list(blocks)
+        if self._use_codebook(len(blocks)):
+            table = getattr(self, codebook_attr)
+            if is_numpy:
+                return table[blocks.astype(np.uint16, copy=False)]
+            return array('H', [table[b] for b in blocks])
+        initial, steps = compiled
+        return engine.run_steps(blocks, initial, steps)
+
+    def encrypt_blocks(self, blocks):
+        """批量加密（依次施加各层）"""
+        return self._apply(blocks, self._forward, '_codebook')
+
+    def decrypt_blocks(self, blocks):
+        """批量解密（逆序施加各层的逆）"""
+        return self._apply(blocks, self._backward, '_inverse_codebook')
+
+    def encrypt(self, block):
+        """加密单个数据块"""
+        return self.encrypt_blocks([block])[0]
+
+    def decrypt(self, block):
+        """解密单个数据块"""
+        return self.decrypt_blocks([block])[0]
+
+    def encrypt_stream(self, chunks):
+        """流式加密：chunks为数据块序列的可迭代对象，逐段产出密文块数组"""
+        for chunk in chunks:
+            yield self.encrypt_blocks(chunk)
+
+    def decrypt_stream(self, chunks):
+        """流式解密：chunks为密文块序列的可迭代对象，逐段产出明文块数组"""
+        for chunk in chunks:
+            yield self.decrypt_blocks(chunk)
@@ -0,0 +1,373 @@
+"""
+S-AES 二进制容器格式
+把加密结果连同模式、IV、原始长度和分段索引一起保存，大文件可以按分段并行解密、随机读取，
+不需要从头扫描
+
+文件布局（整数均为大端序）：
+    文件头  magic 'SAES' | 版本 u8 | 模式 u8 | 保留 u16 | 密钥标识 u32 | IV u16 | 保留 u16 |
+            分段大小 u32 | 文件头CRC32 u32                                     （24字节）
+    分段数据  各分段的密文依次排列（每2字节一个块，最后一个分段的奇数字节补0后加密）
+    分段索引  每个分段：偏移 u64 | 明文长度 u32 | 密文CRC32 u32 | 起始IV u16 | 保留 u16
+                                                                          （每项20字节）
+    文件尾  原始长度 u64 | 索引偏移 u64 | 分段数 u32 | 索引CRC32 u32 | 文件尾CRC32 u32 |
+            magic 'SAEI'                                                      （32字节）
+
+模式：
+    ecb   各块独立
+    cbc   在整个文件上连续链接，加密只能顺序进行；索引中记录每个分段开始时的链接值
+          （即前一分段的最后一个密文块），解密仍可按分段并行
+    scbc  分段CBC：每个分段是一段独立的标准CBC（与 SAES.cbc_encrypt 相同），
+          IV由基础IV和分段号派生并记录在索引中，加密和解密都可以按分段并行
+密钥标识由调用方指定（默认为0），不会从密钥推导：16位密钥的任何指纹都可以被穷举反推
+"""
+
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from s_aes_batch import get_batch_engine
+from s_aes_hex import blocks_to_bytes, bytes_to_blocks
+from s_aes_stream import StreamEncryptor
+
+MAGIC = b'SAES'
+FOOTER_MAGIC = b'SAEI'
+VERSION = 2
+
+MODES = {'ecb': 0, 'cbc': 1, 'scbc': 2}
+MODE_NAMES = {value: name for name, value in MODES.items()}
+
+# 默认分段大小（明文字节数，必须为偶数）
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_HEADER = struct.Struct('>4sBBHIHHI')
+_HEADER_CRC = struct.Struct('>I')
+_INDEX_ENTRY = struct.Struct('>QIIHH')
+_FOOTER = struct.Struct('>QQIII4s')
+
+HEADER_SIZE = _HEADER.size + _HEADER_CRC.size
+FOOTER_SIZE = _FOOTER.size
+
+
+class ContainerError(ValueError):
+    """容器格式错误或校验失败"""
+
+
+def _xor_bytes(a, b):
+    return (int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
+
+
+def derive_segment_iv(key, iv, index):
+    """分段CBC中第index个分段的IV：用密钥加密 (基础IV + 分段号) mod 2^16"""
+    return get_batch_engine().encrypt_block((iv + index) & 0xFFFF, key)
+
+
+def _encrypt_segment(data, key, iv):
+    """把一个分段的明文作为独立的CBC消息加密（奇数字节补0），返回密文字节"""
+    encryptor = StreamEncryptor(key, 'cbc', iv)
+    blocks = encryptor.update(data)
+    blocks.extend(encryptor.finalize())
+    return blocks_to_bytes(blocks)
+
+
+def _decrypt_chunk(ciphertext, iv, key, mode):
+    """
+    解密一个分段的密文字节
+    iv: CBC/分段CBC模式下该分段开始时的链接值
+    """
+    from s_aes_engine import decrypt_blocks
+    plain = blocks_to_bytes(decrypt_blocks(bytes_to_blocks(ciphertext), key))
+    if mode != 'ecb' and ciphertext:
+        # 各块与前一个密文块异或，整段一次完成
+        plain = _xor_bytes(plain, iv.to_bytes(2, 'big') + ciphertext[:-2])
+    return plain
+
+
+class ContainerWriter:
+    """
+    流式写入容器
+    write(data) 可多次调用，凑满一个分段就加密写出；close() 写出最后一个分段、索引和文件尾
+    目标文件只需支持顺序写入；分段CBC模式下也可以用 append_segment 写入在别处加密好的分段
+    """
+
+    def __init__(self, fileobj, key, mode='ecb', iv=None, key_id=0, chunk_size=DEFAULT_CHUNK_SIZE):
+        if mode not in MODES:
+            raise ValueError(f"不支持的模式: {mode}")
+        if mode != 'ecb' and iv is None:
+            raise ValueError("CBC模式需要提供IV")
+        if chunk_size <= 0 or chunk_size % 2:
+            raise ValueError("分段大小必须是正偶数")
+        self._file = fileobj
+        self.mode = mode
+        self.iv = iv if iv is not None else 0
+        self.key_id = key_id
+        self.chunk_size = chunk_size
+        self.key = key & 0xFFFF
+        # 连续CBC整个文件共用一个加密器；ECB无状态，也共用
+        self._encryptor = StreamEncryptor(key, mode, iv) if mode != 'scbc' else None
+        self._buffer = bytearray()
+        self._index = []
+        self.length = 0
+        self._closed = False
+
+        header = _HEADER.pack(MAGIC, VERSION, MODES[mode], 0, key_id & 0xFFFFFFFF,
+                              self.iv & 0xFFFF, 0, chunk_size)
+        self._file.write(header + _HEADER_CRC.pack(zlib.crc32(header)))
+        self._offset = HEADER_SIZE
+
+    def next_segment_iv(self):
+        """下一个分段（分段CBC）的派生IV"""
+        return derive_segment_iv(self.key, self.iv, len(self._index))
+
+    def _append(self, ciphertext, plain_len, iv):
+        self._file.write(ciphertext)
+        self._index.append((self._offset, plain_len, zlib.crc32(ciphertext), iv, 0))
+        self._offset += len(ciphertext)
+        self.length += plain_len
+
+    def append_segment(self, ciphertext, plain_len):
+        """
+        分段CBC：写入用 next_segment_iv() 加密好的一个分段
+        除最后一个分段外，plain_len 必须等于分段大小
+        """
+        if self.mode != 'scbc':
+            raise ValueError("只有分段CBC模式可以直接写入分段")
+        if self._buffer or (self._index and self._index[-1][1] != self.chunk_size):
+            raise ValueError("只有最后一个分段可以小于分段大小")
+        if plain_len > self.chunk_size or len(ciphertext) != (plain_len + 1) // 2 * 2:
+            raise ValueError("分段长度与密文长度不符")
+        self._append(ciphertext, plain_len, self.next_segment_iv())
+
+    def _write_chunk(self, data, final=False):
+        if self.mode == 'scbc':
+            iv = self.next_segment_iv()
+            self._append(_encrypt_segment(data, self.key, iv), len(data), iv)
+            return
+        iv = self._encryptor.previous if self.mode == 'cbc' else 0
+        blocks = self._encryptor.update(data)
+        if final:
+            blocks.extend(self._encryptor.finalize())
+        self._append(blocks_to_bytes(blocks), len(data), iv)
+
+    def write(self, data):
+        """追加明文"""
+        if self._closed:
+            raise ValueError("容器已关闭")
+        self._buffer += data
+        size = self.chunk_size
+        if len(self._buffer) >= size:
+            full = len(self._buffer) // size * size
+            view = memoryview(self._buffer)
+            for start in range(0, full, size):
+                self._write_chunk(bytes(view[start:start + size]))
+            view.release()
+            del self._buffer[:full]
+
+    def close(self):
+        """写出剩余数据、分段索引和文件尾"""
+        if self._closed:
+            return
+        if self._buffer or not self._index:
+            self._write_chunk(bytes(self._buffer), final=True)
+            self._buffer = bytearray()
+        index = b''.join(_INDEX_ENTRY.pack(*entry) for entry in self._index)
+        self._file.write(index)
+        fields = (self.length, self._offset, len(self._index), zlib.crc32(index))
+        footer_crc = zlib.crc32(struct.pack('>QQII', *fields))
+        self._file.write(_FOOTER.pack(*fields, footer_crc, FOOTER_MAGIC))
+        self._closed = True
+
+    @property
+    def chunk_count(self):
+        return len(self._index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        return False
+
+
+class ContainerReader:
+    """
+    读取容器：打开时只读取文件头、文件尾和分段索引
+    read_chunk(i, key) 解密单个分段，read(key, offset, size) 随机读取明文区间
+    """
+
+    def __init__(self, fileobj):
+        self._file = fileobj
+        fileobj.seek(0)
+        raw = fileobj.read(HEADER_SIZE)
+        if len(raw) < HEADER_SIZE or raw[:4] != MAGIC:
+            raise ContainerError("不是S-AES容器文件")
+        header, (header_crc,) = raw[:_HEADER.size], _HEADER_CRC.unpack(raw[_HEADER.size:])
+        if zlib.crc32(header) != header_crc:
+            raise ContainerError("文件头校验失败")
+        _, version, mode, _, self.key_id, self.iv, _, self.chunk_size = _HEADER.unpack(header)
+        if version != VERSION:
+            raise ContainerError(f"不支持的容器版本: {version}")
+        if mode not in MODE_NAMES:
+            raise ContainerError(f"未知的加密模式: {mode}")
+        self.mode = MODE_NAMES[mode]
+
+        fileobj.seek(0, os.SEEK_END)
+        size = fileobj.tell()
+        if size < HEADER_SIZE + FOOTER_SIZE:
+            raise ContainerError("容器文件不完整")
+        fileobj.seek(size - FOOTER_SIZE)
+        footer = fileobj.read(FOOTER_SIZE)
+        (self.length, index_offset, chunk_count, index_crc,
+         footer_crc, footer_magic) = _FOOTER.unpack(footer)
+        if footer_magic != FOOTER_MAGIC:
+            raise ContainerError("缺少文件尾（文件可能被截断）")
+        if zlib.crc32(footer[:24]) != footer_crc:
+            raise ContainerError("文件尾校验失败")
+        index_size = chunk_count * _INDEX_ENTRY.size
+        if index_offset + index_size + FOOTER_SIZE != size:
+            raise ContainerError("分段索引位置与文件大小不符")
+        fileobj.seek(index_offset)
+        index = fileobj.read(index_size)
+        if zlib.crc32(index) != index_crc:
+            raise ContainerError("分段索引校验失败")
+        self.index = [_INDEX_ENTRY.unpack_from(index, i * _INDEX_ENTRY.size)
+                      for i in range(chunk_count)]
+
+    @property
+    def chunk_count(self):
+        return len(self.index)
+
+    def read_chunk(self, i, key):
+        """解密第i个分段，返回明文字节"""
+        return _read_chunk(self._file, i, self.index[i], key, self.mode)
+
+    def read(self, key, offset=0, size=-1):
+        """随机读取明文区间 [offset, offset+size)，只解密涉及的分段"""
+        end = self.length if size < 0 else min(self.length, offset + size)
+        if offset >= end:
+            return b''
+        first, last = offset // self.chunk_size, (end - 1) // self.chunk_size
+        data = b''.join(self.read_chunk(i, key) for i in range(first, last + 1))
+        start = offset - first * self.chunk_size
+        return data[start:start + end - offset]
+
+    def iter_chunks(self, key):
+        """按顺序逐段解密"""
+        for i in range(self.chunk_count):
+            yield self.read_chunk(i, key)
+
+
+def _read_chunk(fileobj, i, entry, key, mode):
+    """按索引项读取第i个分段的密文，校验CRC后解密，返回明文字节"""
+    offset, plain_len, crc, iv, _ = entry
+    cipher_len = (plain_len + 1) // 2 * 2
+    fileobj.seek(offset)
+    ciphertext = fileobj.read(cipher_len)
+    if len(ciphertext) != cipher_len or zlib.crc32(ciphertext) != crc:
+        raise ContainerError(f"第{i}个分段校验失败")
+    return _decrypt_chunk(ciphertext, iv, key, mode)[:plain_len]
+
+
+def _decrypt_chunk_from_path(path, i, entry, key, mode):
+    """工作进程：按主进程解析好的索引项直接读取并解密第i个分段，不再解析文件头和索引"""
+    with open(path, 'rb') as f:
+        return _read_chunk(f, i, entry, key, mode)
+
+
+def _read_segments(src, size):
+    """按分段大小读取文件（短读时继续读满），逐段产出"""
+    while True:
+        data = src.read(size)
+        while data and len(data) < size:
+            more = src.read(size - len(data))
+            if not more:
+                break
+            data += more
+        if not data:
+            return
+        yield data
+
+
+def encrypt_file(source, target, key, mode='ecb', iv=None, key_id=0,
+                 chunk_size=DEFAULT_CHUNK_SIZE, workers=1, progress=None):
+    """
+    把source流式加密为容器文件target
+    workers: 分段CBC模式下的工作进程数（None为CPU核数），大于1时各分段并行加密，
+             同时在途的分段不超过工作进程数的2倍；其他模式加密总是在当前进程中进行
+    progress(已处理字节数) 在每段完成后调用；返回原始长度
+    """
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    done = 0
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        with ContainerWriter(dst, key, mode, iv, key_id, chunk_size) as writer:
+            if mode == 'scbc' and workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    pending = deque()
+                    segments = _read_segments(src, chunk_size)
+                    while True:
+                        data = next(segments, None)
+                        if data is not None:
+                            index = writer.chunk_count + len(pending)
+                            segment_iv = derive_segment_iv(writer.key, writer.iv, index)
+                            pending.append((executor.submit(_encrypt_segment, data, writer.key, segment_iv),
+                                            len(data)))
+                            if len(pending) < 2 * workers:
+                                continue
+                        if not pending:
+                            break
+                        future, size = pending.popleft()
+                        writer.append_segment(future.result(), size)
+                        done += size
+                        if progress is not None:
+                            progress(done)
+            else:
+                for data in _read_segments(src, chunk_size):
+                    writer.write(data)
+                    done += len(data)
+                    if progress is not None:
+                        progress(done)
+    return done
+
+
+def decrypt_file(source, target, key, workers=None, progress=None):
+    """
+    解密容器文件source到target
+    workers: 工作进程数，默认为CPU核数；大于1且分段多于1个时，主进程解析一次索引，
+             各工作进程按索引项自行读取分段并行解密，同时在途的分段不超过工作进程数的2倍，
+             结果按顺序写出
+    progress(已写出字节数) 在每段写出后调用；返回原始长度
+    """
+    with open(source, 'rb') as f:
+        reader = ContainerReader(f)
+        count = reader.chunk_count
+        workers = workers if workers is not None else (os.cpu_count() or 1)
+        done = 0
+        with open(target, 'wb') as dst:
+            if workers <= 1 or count <= 1:
+                chunks = reader.iter_chunks(key)
+                executor = None
+            else:
+                executor = ProcessPoolExecutor(max_workers=min(workers, count))
+                chunks = _map_bounded(executor, source, reader.index, key, reader.mode, 2 * workers)
+            try:
+                for chunk in chunks:
+                    dst.write(chunk)
+                    done += len(chunk)
+                    if progress is not None:
+                        progress(done)
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+        return reader.length
+
+
+def _map_bounded(executor, path, index, key, mode, limit):
+    """按顺序产出各分段的明文，同时提交的分段不超过limit个"""
+    pending = deque()
+    for i, entry in enumerate(index):
+        pending.append(executor.submit(_decrypt_chunk_from_path, path, i, entry, key, mode))
+        if len(pending) >= limit:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,183 @@
+"""
+S-AES 线程安全的共享加密上下文
+构造完成后不可修改，所有查找表与全部65536个密钥的轮密钥在构造时一次算好，
+多线程可以共享同一个实例，无需为每个线程复制
+
+关于GIL（使用NumPy引擎时）：
+- 对NumPy数组的批量加解密（encrypt_blocks/decrypt_blocks等传入ndarray）
+  主要由整数花式索引（查表）和按位异或组成，这两类操作在NumPy内部执行时会释放GIL，
+  大数组上多线程可以真正并行
+- 单块运算、ASCII/CBC等逐块链式运算、以及传入Python列表的批量运算在Python层循环，
+  始终持有GIL；CBC加密本身是顺序的，无法从多线程获益
+- 码本缓存的查找/插入持有对应分段的锁，但建表计算在锁外进行
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+from s_aes_batch import KEY_SPACE, SAESBatch, mode_layers
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class _StripedCodebookCache:
+    """
+    分段加锁的码本缓存：按密钥配置的哈希分到若干段，每段一把锁和一个小LRU，
+    不同段的访问互不阻塞
+    """
+
+    def __init__(self, stripes, per_stripe):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._tables = [OrderedDict() for _ in range(stripes)]
+        self._per_stripe = per_stripe
+
+    def get(self, cache_key, build):
+        index = hash(cache_key) % len(self._locks)
+        lock, tables = self._locks[index], self._tables[index]
+        with lock:
+            table = tables.get(cache_key)
+            if table is not None:
+                tables.move_to_end(cache_key)
+                return table
+        # 建表在锁外进行，并发时可能重复构建，但结果相同
+        table = build()
+        with lock:
+            tables[cache_key] = table
+            tables.move_to_end(cache_key)
+            while len(tables) > self._per_stripe:
+                tables.popitem(last=False)
+        return table
+
+
+class SAESContext:
+    """
+    线程安全、构造后不可变的S-AES上下文
+    方法与SAES保持一致（encrypt/decrypt/encrypt_ascii/cbc_encrypt/...），
+    并提供批量接口；轮密钥直接查预先算好的全表，无锁
+    数据量足够大时（不少于codebook_threshold块）使用分段加锁缓存的完整码本
+    """
+
+    __slots__ = ('_engine', '_saes', '_k1_all', '_k2_all', '_codebooks', '_codebook_threshold')
+
+    def __init__(self, engine=None, codebook_stripes=16, codebooks_per_stripe=4,
+                 codebook_threshold=KEY_SPACE):
+        engine = engine if engine is not None else SAESBatch()
+        k1_all, k2_all = engine.all_round_keys()
+        set_attr = object.__setattr__
+        set_attr(self, '_engine', engine)
+        set_attr(self, '_saes', engine.saes)
+        set_attr(self, '_k1_all', k1_all)
+        set_attr(self, '_k2_all', k2_all)
+        set_attr(self, '_codebooks', _StripedCodebookCache(codebook_stripes, codebooks_per_stripe))
+        set_attr(self, '_codebook_threshold', codebook_threshold)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SAESContext构造后不可修改")
+
+    def __delattr__(self, name):
+        raise AttributeError("SAESContext构造后不可修改")
+
+    @property
+    def engine(self):
+        return self._engine
+
+    # ============== 基本加解密 ==============
+
+    def key_expansion(self, key):
+        """查表得到轮密钥 [K0, K1, K2]"""
+        key &= 0xFFFF
+        return [key, self._k1_all[key], self._k2_all[key]]
+
+    def encrypt(self, plaintext, key):
+        key &= 0xFFFF
+        engine = self._engine
+        return engine.enc_round2[engine.enc_round1[plaintext ^ key] ^ self._k1_all[key]] ^ self._k2_all[key]
+
+    def decrypt(self, ciphertext, key):
+        key &= 0xFFFF
+        engine = self._engine
+        return engine.dec_round1[engine.dec_round2[ciphertext ^ self._k2_all[key]] ^ self._k1_all[key]] ^ key
+
+    def _apply(self, blocks, layers):
+        engine = self._engine
+        is_numpy = engine.use_numpy and isinstance(blocks, np.ndarray)
+        if not is_numpy and not isinstance(blocks, (list, array, range)):
+            blocks = list(blocks)
+        if len(blocks) >= self._codebook_threshold:
+            cache_key = tuple(layers)
+            table = self._codebooks.get(cache_key, lambda: engine.cascade_codebook(cache_key))
+            if is_numpy:
+                return table[blocks.astype(np.uint16, copy=False)]
+            return array('H', [table[b] for b in blocks])
+        return engine.cascade_blocks(blocks, layers)
+
+    def encrypt_blocks(self, blocks, key):
+        """批量加密（ECB）"""
+        return self._apply(blocks, mode_layers('encrypt', key))
+
+    def decrypt_blocks(self, blocks, key):
+        """批量解密（ECB）"""
+        return self._apply(blocks, mode_layers('decrypt', key))
+
+    def mode_blocks(self, blocks, mode, keys):
+        """按SAES方法名批量处理，如 mode_blocks(blocks, 'triple_encrypt_48bit', (k1, k2, k3))"""
+        return self._apply(blocks, mode_layers(mode, keys))
+
+    # ============== ASCII字符串加解密 ==============
+
+    def string_to_blocks(self, text):
+        return self._saes.string_to_blocks(text)
+
+    def blocks_to_string(self, blocks):
+        return self._saes.blocks_to_string(blocks)
+
+    def encrypt_ascii(self, plaintext_str, key):
+        return list(self.encrypt_blocks(self.string_to_blocks(plaintext_str), key))
+
+    def decrypt_ascii(self, ciphertext_blocks, key):
+        return self.blocks_to_string(self.decrypt_blocks(ciphertext_blocks, key))
+
+    # ============== 多重加密 ==============
+
+    def double_encrypt(self, plaintext, key1, key2):
+        return self.encrypt(self.encrypt(plaintext, key1), key2)
+
+    def double_decrypt(self, ciphertext, key1, key2):
+        return self.decrypt(self.decrypt(ciphertext, key2), key1)
+
+    def triple_encrypt_32bit(self, plaintext, key1, key2):
+        return self.encrypt(self.decrypt(self.encrypt(plaintext, key1), key2), key1)
+
+    def triple_decrypt_32bit(self, ciphertext, key1, key2):
+        return self.decrypt(self.encrypt(self.decrypt(ciphertext, key1), key2), key1)
+
+    def triple_encrypt_48bit(self, plaintext, key1, key2, key3):
+        return self.encrypt(self.decrypt(self.encrypt(plaintext, key1), key2), key3)
+
+    def triple_decrypt_48bit(self, ciphertext, key1, key2, key3):
+        return self.decrypt(self.encrypt(self.decrypt(ciphertext, key3), key2), key1)
+
+    # ============== CBC模式 ==============
+
+    def cbc_encrypt(self, plaintext_blocks, key, iv):
+        """CBC加密（顺序链式，逐块查表）"""
+        key &= 0xFFFF
+        engine = self._engine
+        t1, t2 = engine.enc_round1, engine.enc_round2
+        k1, k2 = self._k1_all[key], self._k2_all[key]
+        ciphertext_blocks = []
+        previous_block = iv
+        for block in plaintext_blocks:
+            previous_block = t2[t1[block ^ previous_block ^ key] ^ k1] ^ k2
+            ciphertext_blocks.append(previous_block)
+        return ciphertext_blocks
+
+    def cbc_decrypt(self, ciphertext_blocks, key, iv):
+        """CBC解密：各块的分组解密相互独立，先批量解密再与前一密文块异或"""
+        ciphertext_blocks = list(ciphertext_blocks)
+        decrypted = self.decrypt_blocks(ciphertext_blocks, key)
+        previous = [iv] + ciphertext_blocks[:-1]
+        return [d ^ p for d, p in zip(decrypted, previous)]
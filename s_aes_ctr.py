@@ -0,0 +1,315 @@
+"""
+S-AES CTR模式与密钥流预生成池
+计数器块为 (nonce + i) mod 2^16，第i个密钥流块为 E_K(nonce + i)；
+每个 (密钥, nonce) 最多有65536个块（128KB）的密钥流，超出即计数器回绕，会抛出ValueError
+
+CTRKeystreamPool 在后台线程中为登记的 (密钥, nonce) 预先生成密钥流（总量受字节预算限制），
+加密短消息时只需与已就绪的密钥流异或；池中没有足够密钥流时当场补算（记为未命中），
+并统计命中率和补充延迟。只有用 prepare() 登记的 (密钥, nonce) 才会保留条目并在后台补充，
+条目数有上限；未登记的按一次性nonce当场生成，不占用池。
+池记住每个用过的 (密钥, nonce) 消耗到的位置（条目被移除后也保留），同一段密钥流绝不会用两次
+"""
+
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from s_aes_hex import blocks_to_bytes
+
+# 每个 (密钥, nonce) 的计数器空间（块数）
+COUNTER_SPACE = 0x10000
+
+# 预生成池的默认字节预算
+DEFAULT_POOL_BYTES = 1 << 20
+
+# 每个 (密钥, nonce) 默认预先准备的密钥流字节数
+DEFAULT_AHEAD_BYTES = 4096
+
+# 预生成池默认最多保留的 (密钥, nonce) 条目数
+DEFAULT_MAX_ENTRIES = 256
+
+
+def _xor_bytes(a, b):
+    return (int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
+
+
+def ctr_keystream(key, nonce, offset, size):
+    """(密钥, nonce) 的密钥流中从字节位置offset开始的size个字节"""
+    if size <= 0:
+        return b''
+    first, last = offset // 2, (offset + size + 1) // 2
+    if last > COUNTER_SPACE:
+        raise ValueError("CTR计数器空间耗尽：同一 (密钥, nonce) 最多加密128KB")
+    from s_aes_engine import encrypt_blocks
+    start = (nonce + first) & 0xFFFF
+    stop = start + last - first
+    if stop <= COUNTER_SPACE:
+        counters = array('H', range(start, stop))
+    else:
+        counters = array('H', range(start, COUNTER_SPACE)) + array('H', range(stop - COUNTER_SPACE))
+    stream = blocks_to_bytes(array('H', encrypt_blocks(counters, key)))
+    skip = offset - 2 * first
+    return stream[skip:skip + size]
+
+
+def ctr_encrypt(data, key, nonce, offset=0):
+    """CTR加密（解密与加密相同）；offset为data在该 (密钥, nonce) 密钥流中的字节位置"""
+    data = bytes(data)
+    return _xor_bytes(data, ctr_keystream(key, nonce, offset, len(data))) if data else b''
+
+
+ctr_decrypt = ctr_encrypt
+
+
+class _PoolEntry:
+    """池中一个 (密钥, nonce) 的状态：已消耗到的位置和其后已就绪的密钥流"""
+
+    def __init__(self, key, nonce, ahead, position):
+        self.key = key
+        self.nonce = nonce
+        self.ahead = ahead
+        self.position = position
+        self.ready = b''
+        self.queued = False
+        self.requested_at = None
+
+
+class CTRKeystreamPool:
+    """
+    CTR密钥流预生成池
+    prepare(key, nonce) 登记并在后台预生成密钥流；encrypt(key, nonce, data) 从该 (密钥, nonce)
+    当前位置起消耗密钥流，同一 (密钥, nonce) 的多次调用相当于对拼接后的数据做CTR
+    （接收方按相同顺序调用decrypt，或用 ctr_decrypt 指定位置解密）
+    未登记的 (密钥, nonce) 按一次性nonce处理：从位置0当场生成，不保留条目；
+    用过的 (密钥, nonce) 不在池中时（一次性使用过、被release或因条目数上限被移除）再次加密
+    会抛出ValueError，重新prepare后从上次的位置继续；计数器空间用完的则始终拒绝
+    budget_bytes: 所有条目已就绪密钥流的总字节上限，超出时先清空最久未用条目的缓冲
+    ahead_bytes: 每个条目默认保持就绪的字节数
+    max_entries: 最多保留的条目数，登记新条目超出时移除最久未用的条目
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_POOL_BYTES, ahead_bytes=DEFAULT_AHEAD_BYTES,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.budget_bytes = budget_bytes
+        self.ahead_bytes = ahead_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # 不在池中的用过的 (密钥, nonce) -> 已消耗到的字节位置
+        self._used = {}
+        self._queue = deque()
+        self._bytes = 0
+        self._busy = False
+        self._closed = False
+        self._thread = None
+        self._cond = threading.Condition()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'bytes_from_pool': 0,
+            'bytes_generated_inline': 0,
+            'refills': 0,
+            'bytes_refilled': 0,
+            'evictions': 0,
+            'entries_evicted': 0,
+            'one_shot': 0,
+            'refill_latency_total': 0.0,
+            'refill_latency_max': 0.0,
+        }
+
+    # ============== 后台补充 ==============
+
+    def _schedule(self, entry):
+        """把条目放入补充队列（调用方持有锁）"""
+        if entry.queued or self._closed:
+            return
+        entry.queued = True
+        entry.requested_at = time.perf_counter()
+        self._queue.append(entry)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refill_loop, daemon=True)
+            self._thread.start()
+        self._cond.notify_all()
+
+    def _evict_for(self, entry, need):
+        """预算不足时清空最久未用的其他条目的缓冲（调用方持有锁），返回可用字节数"""
+        for other in list(self._entries.values()):
+            if self.budget_bytes - self._bytes >= need:
+                break
+            if other is entry or not other.ready:
+                continue
+            self._bytes -= len(other.ready)
+            other.ready = b''
+            self._stats['evictions'] += 1
+        return self.budget_bytes - self._bytes
+
+    def _refill_loop(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._busy = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+                if self._closed:
+                    self._busy = False
+                    self._cond.notify_all()
+                    return
+                self._busy = True
+                entry = self._queue.popleft()
+                entry.queued = False
+                start = entry.position + len(entry.ready)
+                need = min(entry.ahead - len(entry.ready), 2 * COUNTER_SPACE - start)
+                if need > 0:
+                    need = min(need, self._evict_for(entry, need))
+                if need <= 0 or self._entries.get((entry.key, entry.nonce)) is not entry:
+                    continue
+                requested_at = entry.requested_at
+            stream = ctr_keystream(entry.key, entry.nonce, start, need)
+            with self._cond:
+                # 生成期间条目被当场补算消耗或被移除时，这段密钥流已经过时
+                if (self._entries.get((entry.key, entry.nonce)) is entry
+                        and entry.position + len(entry.ready) == start):
+                    entry.ready += stream
+                    self._bytes += len(stream)
+                    latency = time.perf_counter() - requested_at
+                    self._stats['refills'] += 1
+                    self._stats['bytes_refilled'] += len(stream)
+                    self._stats['refill_latency_total'] += latency
+                    self._stats['refill_latency_max'] = max(self._stats['refill_latency_max'], latency)
+
+    # ============== 对外接口 ==============
+
+    def _entry(self, key, nonce, create=False):
+        """取得条目并标记为最近使用，未登记时按create创建或返回None（调用方持有锁）"""
+        cache_key = (key & 0xFFFF, nonce & 0xFFFF)
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            self._entries.move_to_end(cache_key)
+        elif create:
+            # 用过的 (密钥, nonce) 从上次消耗到的位置继续
+            position = self._used.pop(cache_key, 0)
+            entry = _PoolEntry(cache_key[0], cache_key[1], self.ahead_bytes, position)
+            self._entries[cache_key] = entry
+            # 条目数超出上限时移除最久未用的条目
+            while len(self._entries) > max(self.max_entries, 1):
+                self._drop(next(iter(self._entries.values())))
+                self._stats['entries_evicted'] += 1
+        return entry
+
+    def _drop(self, entry):
+        """移除条目及其就绪的密钥流，记住已消耗到的位置（调用方持有锁）"""
+        cache_key = (entry.key, entry.nonce)
+        if self._entries.get(cache_key) is entry:
+            del self._entries[cache_key]
+            self._bytes -= len(entry.ready)
+            entry.ready = b''
+            self._used[cache_key] = entry.position
+
+    def prepare(self, key, nonce, ahead_bytes=None):
+        """
+        登记 (密钥, nonce) 并在后台预生成ahead_bytes字节密钥流
+        用过的 (密钥, nonce) 从上次的位置继续；计数器空间已用完时抛出ValueError
+        """
+        with self._cond:
+            if self._used.get((key & 0xFFFF, nonce & 0xFFFF), 0) >= 2 * COUNTER_SPACE:
+                raise ValueError("CTR计数器空间耗尽：同一 (密钥, nonce) 最多加密128KB")
+            entry = self._entry(key, nonce, create=True)
+            if ahead_bytes is not None:
+                entry.ahead = ahead_bytes
+            self._schedule(entry)
+
+    def encrypt(self, key, nonce, data):
+        """
+        用 (密钥, nonce) 的下一段密钥流加密data（解密与加密相同）
+        已就绪的密钥流足够时只做一次异或；不足的部分当场生成，并安排后台补充；
+        未登记的 (密钥, nonce) 从位置0当场生成（一次性nonce），不创建条目也不安排补充；
+        用过而不在池中的 (密钥, nonce) 抛出ValueError，不会从头重用密钥流
+        """
+        data = bytes(data)
+        if not data:
+            return b''
+        with self._cond:
+            cache_key = (key & 0xFFFF, nonce & 0xFFFF)
+            entry = self._entry(key, nonce)
+            if entry is not None:
+                offset = entry.position
+            else:
+                offset = self._used.get(cache_key, 0)
+            if 2 * COUNTER_SPACE - offset < len(data):
+                raise ValueError("CTR计数器空间耗尽：同一 (密钥, nonce) 最多加密128KB")
+            if entry is None:
+                if cache_key in self._used:
+                    raise ValueError("该 (密钥, nonce) 已使用过：继续加密请先调用prepare，否则请换用新的nonce")
+                self._used[cache_key] = len(data)
+                take, stream = 0, b''
+                self._stats['one_shot'] += 1
+            else:
+                ready = entry.ready
+                take = min(len(ready), len(data))
+                stream, entry.ready = ready[:take], ready[take:]
+                self._bytes -= take
+                entry.position += len(data)
+                if entry.position >= 2 * COUNTER_SPACE:
+                    # 计数器空间已用完，条目不再有用
+                    self._drop(entry)
+                else:
+                    self._schedule(entry)
+            self._stats['bytes_from_pool'] += take
+            self._stats['hits' if take == len(data) else 'misses'] += 1
+        if take < len(data):
+            stream += ctr_keystream(key & 0xFFFF, nonce & 0xFFFF, offset + take, len(data) - take)
+            with self._cond:
+                self._stats['bytes_generated_inline'] += len(data) - take
+        return _xor_bytes(data, stream)
+
+    decrypt = encrypt
+
+    def release(self, key, nonce):
+        """移除 (密钥, nonce) 的条目及其就绪的密钥流（已消耗到的位置仍会记住）"""
+        with self._cond:
+            entry = self._entries.get((key & 0xFFFF, nonce & 0xFFFF))
+            if entry is not None:
+                self._drop(entry)
+
+    def wait_idle(self, timeout=None):
+        """等待补充队列清空，返回是否已空闲"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self):
+        """停止后台线程并清空池（用过的 (密钥, nonce) 仍会记住）"""
+        with self._cond:
+            self._closed = True
+            self._queue.clear()
+            for entry in list(self._entries.values()):
+                self._drop(entry)
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def stats(self):
+        """返回统计信息：命中/未命中次数、池内/当场生成的字节数、补充次数和延迟、当前占用"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['used_pairs'] = len(self._used) + len(self._entries)
+            stats['bytes_ready'] = self._bytes
+            stats['budget_bytes'] = self.budget_bytes
+            stats['max_entries'] = self.max_entries
+            requests = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / requests if requests else 0.0
+            refills = stats['refills']
+            stats['refill_latency_avg'] = stats['refill_latency_total'] / refills if refills else 0.0
+        return stats
@@ -0,0 +1,384 @@
+"""
+S-AES 引擎注册表
+不同的实现（参考实现、查表、bytes.translate整段查表、NumPy向量化等）在此注册；
+首次使用时用已知答案向量自检，按操作和数据规模用短时基准测试选出最快的正确引擎，
+调用方也可以查询或固定（pin）当前引擎
+
+基准测试只在第一次处理较大的数据（超过 CALIBRATION_MIN_BLOCKS 块）或显式调用 calibrate()
+时进行，耗时约数百毫秒；结果写入 ~/.cache/s_aes/engine_calibration.json
+（可用环境变量 SAES_ENGINE_CACHE 指定其他路径），运行环境不变时直接复用。
+在此之前的小数据使用默认引擎 DEFAULT_ENGINE
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+from array import array
+from s_aes import SAES
+from s_aes_batch import SAESBatch
+from s_aes_bulk import SAESBulk
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# 已知答案向量：(明文, 密钥, 密文)
+KNOWN_ANSWERS = (
+    (0x0000, 0x0000, 0x07B4),
+    (0xFFFF, 0xFFFF, 0x5455),
+    (0x1234, 0x5678, 0x0820),
+    (0x1234, 0x2D55, 0x1DB3),
+    (0xABCD, 0x1234, 0xE143),
+    (0x6F6B, 0xA73B, 0x09BE),
+    (0x0001, 0x8000, 0x41BA),
+)
+
+OPERATIONS = ('encrypt', 'decrypt')
+
+# 基准测试的数据规模档位（块数），实际规模向上取最近的档位
+SIZE_BUCKETS = (1, 16, 256, 4096, 65536)
+
+# 尚未做基准测试时，不超过该块数的数据直接使用默认引擎，不触发基准测试
+CALIBRATION_MIN_BLOCKS = 256
+
+# 未做基准测试时小数据使用的引擎（查表实现，无额外依赖，小数据上足够快）
+DEFAULT_ENGINE = 'table'
+
+
+class ReferenceEngine:
+    """参考实现：逐块调用 SAES.encrypt/decrypt"""
+
+    description = "SAES参考实现（逐块计算）"
+
+    def __init__(self):
+        self.saes = SAES()
+
+    def encrypt_blocks(self, blocks, key):
+        return array('H', [self.saes.encrypt(b, key) for b in blocks])
+
+    def decrypt_blocks(self, blocks, key):
+        return array('H', [self.saes.decrypt(b, key) for b in blocks])
+
+
+class TableEngine:
+    """纯Python查表实现"""
+
+    description = "轮函数查找表（纯Python）"
+
+    def __init__(self):
+        self.batch = SAESBatch(use_numpy=False)
+
+    def encrypt_blocks(self, blocks, key):
+        return self.batch.encrypt_blocks(blocks, key)
+
+    def decrypt_blocks(self, blocks, key):
+        return self.batch.decrypt_blocks(blocks, key)
+
+
+class TranslateEngine:
+    """bytes.translate 整段查表实现（纯标准库）"""
+
+    description = SAESBulk.description
+
+    def __init__(self):
+        self.bulk = SAESBulk()
+
+    def encrypt_blocks(self, blocks, key):
+        return self.bulk.encrypt_blocks(blocks, key)
+
+    def decrypt_blocks(self, blocks, key):
+        return self.bulk.decrypt_blocks(blocks, key)
+
+
+class NumpyEngine:
+    """NumPy向量化查表实现；输入不是ndarray时结果转为array('H')"""
+
+    description = "轮函数查找表（NumPy向量化）"
+
+    def __init__(self):
+        self.batch = SAESBatch(use_numpy=True)
+
+    def _run(self, method, blocks, key):
+        if isinstance(blocks, np.ndarray):
+            return method(blocks, key)
+        if isinstance(blocks, array) and blocks.typecode == 'H':
+            data = np.frombuffer(blocks, dtype=np.uint16)
+        else:
+            data = np.fromiter(blocks, dtype=np.uint16)
+        return array('H', method(data, key).tobytes())
+
+    def encrypt_blocks(self, blocks, key):
+        return self._run(self.batch.encrypt_blocks, blocks, key)
+
+    def decrypt_blocks(self, blocks, key):
+        return self._run(self.batch.decrypt_blocks, blocks, key)
+
+
+class EngineRegistry:
+    """
+    引擎注册表
+    register() 登记引擎工厂；引擎在首次使用时实例化并自检，未通过自检的引擎不会被选用
+    select() 按操作和数据规模返回引擎名：优先使用固定的引擎，否则使用基准测试结果
+    """
+
+    def __init__(self, cache_path=None):
+        self._factories = {}
+        self._instances = {}
+        self._failed = {}
+        self._pinned = None
+        self._choices = None
+        self._timings = None
+        self._lock = threading.RLock()
+        self.cache_path = cache_path
+
+    # ============== 注册与查询 ==============
+
+    def register(self, name, factory, available=None):
+        """
+        登记引擎
+        factory: 无参可调用对象，返回带 encrypt_blocks/decrypt_blocks 的引擎实例
+        available: 可选的无参函数，返回False时该引擎不参与选择（如缺少依赖）
+        """
+        with self._lock:
+            self._factories[name] = (factory, available)
+            self._choices = None
+
+    def names(self):
+        """已登记且当前环境可用的引擎名"""
+        return [name for name, (_, available) in self._factories.items()
+                if available is None or available()]
+
+    def get(self, name):
+        """取得引擎实例（首次使用时自检），自检失败抛出RuntimeError"""
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            if name in self._failed:
+                raise RuntimeError(f"引擎 {name} 未通过自检: {self._failed[name]}")
+            if name not in self.names():
+                raise KeyError(f"未知或不可用的引擎: {name}")
+            factory, _ = self._factories[name]
+            try:
+                engine = factory()
+                self_test(engine)
+            except Exception as e:
+                self._failed[name] = str(e)
+                raise RuntimeError(f"引擎 {name} 未通过自检: {e}")
+            self._instances[name] = engine
+            return engine
+
+    def verified(self):
+        """通过自检的引擎名"""
+        result = []
+        for name in self.names():
+            try:
+                self.get(name)
+            except RuntimeError:
+                continue
+            result.append(name)
+        return result
+
+    # ============== 固定引擎 ==============
+
+    def pin(self, name):
+        """固定使用某个引擎（会先完成自检）"""
+        self.get(name)
+        self._pinned = name
+
+    def unpin(self):
+        self._pinned = None
+
+    @property
+    def pinned(self):
+        return self._pinned
+
+    # ============== 自动选择 ==============
+
+    def _signature(self):
+        numpy_version = np.__version__ if np is not None else None
+        return {
+            'python': sys.version.split()[0],
+            'numpy': numpy_version,
+            'engines': sorted(self.names()),
+        }
+
+    def _default_cache_path(self):
+        if self.cache_path:
+            return self.cache_path
+        env_path = os.environ.get('SAES_ENGINE_CACHE')
+        if env_path:
+            return env_path
+        return os.path.join(os.path.expanduser('~'), '.cache', 's_aes', 'engine_calibration.json')
+
+    def _load_cache(self):
+        try:
+            with open(self._default_cache_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('signature') != self._signature():
+            return None
+        choices = data.get('choices')
+        if not isinstance(choices, dict):
+            return None
+        verified = set(self.verified())
+        # 缓存必须覆盖每个操作和每个规模档位，且选中的引擎都通过了自检，否则重新测试
+        for op in OPERATIONS:
+            per_size = choices.get(op)
+            if not isinstance(per_size, dict):
+                return None
+            for size in SIZE_BUCKETS:
+                if per_size.get(str(size)) not in verified:
+                    return None
+        return data
+
+    def _save_cache(self, data):
+        path = self._default_cache_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        except OSError:
+            pass
+
+    def calibrate(self, force=False, repeat=3):
+        """
+        对每个操作和数据规模档位做短时基准测试，选出最快的引擎
+        结果缓存到磁盘（环境变量SAES_ENGINE_CACHE可指定路径），环境不变时直接复用
+        """
+        with self._lock:
+            if not force:
+                cached = self._load_cache()
+                if cached is not None:
+                    self._choices = cached['choices']
+                    self._timings = cached.get('timings', {})
+                    return self._choices
+
+            engines = {name: self.get(name) for name in self.verified()}
+            rng = random.Random(0)
+            choices = {}
+            timings = {}
+            for op in OPERATIONS:
+                choices[op] = {}
+                timings[op] = {}
+                slow = set()
+                for size in SIZE_BUCKETS:
+                    blocks = array('H', [rng.randrange(0x10000) for _ in range(size)])
+                    results = {}
+                    for name, engine in engines.items():
+                        if name in slow:
+                            continue
+                        method = getattr(engine, op + '_blocks')
+                        best = float('inf')
+                        for _ in range(repeat):
+                            start = time.perf_counter()
+                            method(blocks, 0x2D55)
+                            best = min(best, time.perf_counter() - start)
+                        results[name] = best
+                    fastest = min(results, key=results.get)
+                    # 比最快引擎慢10倍以上的引擎不再参加更大档位的测试
+                    slow.update(n for n, t in results.items() if t > 10 * results[fastest])
+                    choices[op][str(size)] = fastest
+                    timings[op][str(size)] = results
+            self._choices = choices
+            self._timings = timings
+            self._save_cache({'signature': self._signature(), 'choices': choices, 'timings': timings})
+            return choices
+
+    def _default_engine(self):
+        verified = self.verified()
+        return DEFAULT_ENGINE if DEFAULT_ENGINE in verified else verified[0]
+
+    def select(self, op, n_blocks):
+        """
+        返回某操作在给定数据规模下应使用的引擎名
+        尚未做基准测试时，小数据直接用默认引擎，大数据才触发基准测试
+        """
+        if self._pinned is not None:
+            return self._pinned
+        if op not in OPERATIONS:
+            raise ValueError(f"不支持的操作: {op}")
+        if self._choices is None:
+            if n_blocks <= CALIBRATION_MIN_BLOCKS:
+                return self._default_engine()
+            self.calibrate()
+        bucket = next((size for size in SIZE_BUCKETS if n_blocks <= size), SIZE_BUCKETS[-1])
+        return self._choices[op][str(bucket)]
+
+    def report(self):
+        """返回当前的选择结果与基准耗时"""
+        if self._choices is None:
+            self.calibrate()
+        return {
+            'pinned': self._pinned,
+            'verified': self.verified(),
+            'failed': dict(self._failed),
+            'choices': self._choices,
+            'timings': self._timings,
+        }
+
+    # ============== 分发 ==============
+
+    def encrypt_blocks(self, blocks, key):
+        """用自动选择（或固定）的引擎批量加密"""
+        if not hasattr(blocks, '__len__'):
+            blocks = list(blocks)
+        return self.get(self.select('encrypt', len(blocks))).encrypt_blocks(blocks, key)
+
+    def decrypt_blocks(self, blocks, key):
+        """用自动选择（或固定）的引擎批量解密"""
+        if not hasattr(blocks, '__len__'):
+            blocks = list(blocks)
+        return self.get(self.select('decrypt', len(blocks))).decrypt_blocks(blocks, key)
+
+
+def self_test(engine):
+    """用已知答案向量检验引擎的加密和解密，不通过时抛出AssertionError"""
+    for plaintext, key, ciphertext in KNOWN_ANSWERS:
+        encrypted = engine.encrypt_blocks([plaintext], key)[0]
+        if encrypted != ciphertext:
+            raise AssertionError(f"加密 {plaintext:04X} (K={key:04X}) 得到 {int(encrypted):04X}，应为 {ciphertext:04X}")
+        decrypted = engine.decrypt_blocks([ciphertext], key)[0]
+        if decrypted != plaintext:
+            raise AssertionError(f"解密 {ciphertext:04X} (K={key:04X}) 得到 {int(decrypted):04X}，应为 {plaintext:04X}")
+
+
+registry = EngineRegistry()
+registry.register('reference', ReferenceEngine)
+registry.register('table', TableEngine)
+registry.register('translate', TranslateEngine)
+registry.register('numpy', NumpyEngine, available=lambda: np is not None)
+
+
+def register_engine(name, factory, available=None):
+    registry.register(name, factory, available)
+
+
+def available_engines():
+    return registry.names()
+
+
+def active_engine(op='encrypt', n_blocks=1):
+    """查询某操作在给定数据规模下当前使用的引擎名"""
+    return registry.select(op, n_blocks)
+
+
+def pin_engine(name):
+    registry.pin(name)
+
+
+def unpin_engine():
+    registry.unpin()
+
+
+def encrypt_blocks(blocks, key):
+    return registry.encrypt_blocks(blocks, key)
+
+
+def decrypt_blocks(blocks, key):
+    return registry.decrypt_blocks(blocks, key)
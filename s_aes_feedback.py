@@ -0,0 +1,236 @@
+"""
+S-AES OFB/CFB 模式
+两者都是流模式：按字节处理，密文与明文等长，不需要填充
+
+OFB：密钥流 S_i = E_K(S_{i-1})，S_0 = IV，与数据无关
+    E_K是16位块上的置换，IV的轨道必然回到IV，密钥流是纯周期的（周期至多65536块）；
+    生成器在回到IV时检测到周期，此后任意位置的密钥流都直接从周期缓冲区中取，
+    也可以在数据到达之前用后台线程把整个周期预先算好
+CFB（16位反馈）：C_i = P_i ⊕ E_K(C_{i-1})，C_0 = IV
+    加密是链式的；解密时各块的 E_K(C_{i-1}) 互相独立，批量计算后一次异或；
+    最后不足一块的字节与 E_K(C_{n-1}) 的高字节异或
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+from s_aes_batch import get_batch_engine
+from s_aes_hex import blocks_to_bytes, bytes_to_blocks
+
+# 后台预计算时每次持锁生成的块数（让前台请求可以穿插进来）
+PREFETCH_SLICE = 0x1000
+
+# get_keystream 缓存的 (密钥, IV) 数
+KEYSTREAM_CACHE_SIZE = 16
+
+
+def _xor_bytes(a, b):
+    return (int.from_bytes(a, 'little') ^ int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
+
+
+class OFBKeystream:
+    """
+    OFB密钥流生成器（按块编号随机访问）
+    已生成的块保存在缓冲区中；生成的块回到IV时记录周期，缓冲区即为一个完整周期
+    prefetch=True 时立即在后台线程中预计算整个周期
+    """
+
+    def __init__(self, key, iv, prefetch=False):
+        engine = get_batch_engine()
+        self.key = key & 0xFFFF
+        self.iv = iv & 0xFFFF
+        self._t1, self._t2 = engine.enc_round1, engine.enc_round2
+        self._round_keys = engine.expand_key(self.key)
+        self._buffer = array('H')
+        self._cycle_bytes = None
+        self.period = None
+        self._lock = threading.Lock()
+        self._thread = None
+        if prefetch:
+            self.start_prefetch()
+
+    @property
+    def complete(self):
+        """是否已检测到周期"""
+        return self.period is not None
+
+    def _extend_to(self, count):
+        """生成密钥流直到缓冲区有count块或检测到周期"""
+        with self._lock:
+            buffer = self._buffer
+            if self.period is not None or len(buffer) >= count:
+                return
+            t1, t2 = self._t1, self._t2
+            k0, k1, k2 = self._round_keys
+            iv = self.iv
+            state = buffer[-1] if buffer else iv
+            for _ in range(count - len(buffer)):
+                state = t2[t1[state ^ k0] ^ k1] ^ k2
+                buffer.append(state)
+                if state == iv:
+                    # 先准备好周期缓冲区再公布周期，未持锁的读取方看到period时缓冲区已就绪
+                    self._cycle_bytes = blocks_to_bytes(buffer)
+                    self.period = len(buffer)
+                    break
+
+    def _prefetch(self):
+        while self.period is None:
+            self._extend_to(len(self._buffer) + PREFETCH_SLICE)
+
+    def start_prefetch(self):
+        """在后台线程中预计算整个周期（已在运行或已完成时不做任何事）"""
+        if self.period is None and self._thread is None:
+            self._thread = threading.Thread(target=self._prefetch, daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """等待后台预计算完成，返回是否已检测到周期"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.complete
+
+    def blocks(self, start, count):
+        """第start块起的count个密钥流块（从0编号，第0块为E_K(IV)）"""
+        if count <= 0:
+            return array('H')
+        if self.period is None:
+            self._extend_to(start + count)
+        if self.period is None:
+            return self._buffer[start:start + count]
+        return bytes_to_blocks(self.keystream_bytes(2 * start, 2 * count))
+
+    def keystream_bytes(self, offset, size):
+        """从字节位置offset开始的size个密钥流字节"""
+        if size <= 0:
+            return b''
+        first, last = offset // 2, (offset + size + 1) // 2
+        if self.period is None:
+            self._extend_to(last)
+        if self.period is None:
+            data = blocks_to_bytes(self._buffer[first:last])
+            return data[offset - 2 * first:offset - 2 * first + size]
+        cycle = self._cycle_bytes
+        start = offset % len(cycle)
+        repeats = (start + size) // len(cycle) + 1
+        return (cycle * repeats)[start:start + size] if repeats > 1 else cycle[start:start + size]
+
+
+_keystreams = OrderedDict()
+_keystreams_lock = threading.Lock()
+
+
+def get_keystream(key, iv, prefetch=False):
+    """返回 (密钥, IV) 共享的OFB密钥流生成器（最近使用的若干个会被缓存）"""
+    cache_key = (key & 0xFFFF, iv & 0xFFFF)
+    with _keystreams_lock:
+        keystream = _keystreams.get(cache_key)
+        if keystream is not None:
+            _keystreams.move_to_end(cache_key)
+        else:
+            keystream = OFBKeystream(*cache_key)
+            _keystreams[cache_key] = keystream
+            while len(_keystreams) > KEYSTREAM_CACHE_SIZE:
+                _keystreams.popitem(last=False)
+    if prefetch:
+        keystream.start_prefetch()
+    return keystream
+
+
+class OFBStream:
+    """
+    OFB流式加解密（两者相同）
+    update(data) 返回等长的输出，position 为已处理的字节数；seek() 可跳到任意位置
+    prefetch=True 时在构造时就开始后台预计算密钥流
+    """
+
+    def __init__(self, key, iv, prefetch=False):
+        self.keystream = get_keystream(key, iv, prefetch)
+        self.position = 0
+
+    def update(self, data):
+        data = bytes(data)
+        if not data:
+            return b''
+        stream = self.keystream.keystream_bytes(self.position, len(data))
+        self.position += len(data)
+        return _xor_bytes(data, stream)
+
+    def finalize(self):
+        return b''
+
+    def seek(self, position):
+        self.position = position
+
+
+def ofb_encrypt(data, key, iv):
+    """OFB加密字节串（解密与加密相同）"""
+    return OFBStream(key, iv).update(data)
+
+
+ofb_decrypt = ofb_encrypt
+
+
+class CFBStream:
+    """
+    CFB（16位反馈）流式加解密
+    update(data) 处理能凑成完整块的部分，末尾的奇数字节留到下一次；
+    finalize() 把最后一个奇数字节与 E_K(前一密文块) 的高字节异或后输出
+    """
+
+    def __init__(self, key, iv, decrypt=False):
+        engine = get_batch_engine()
+        self.key = key & 0xFFFF
+        self.decrypt = decrypt
+        self.previous = iv & 0xFFFF
+        self._t1, self._t2 = engine.enc_round1, engine.enc_round2
+        self._round_keys = engine.expand_key(self.key)
+        self._pending = b''
+
+    def _encrypt(self, data):
+        t1, t2 = self._t1, self._t2
+        k0, k1, k2 = self._round_keys
+        blocks = bytes_to_blocks(data)
+        previous = self.previous
+        for i, block in enumerate(blocks):
+            previous = block ^ t2[t1[previous ^ k0] ^ k1] ^ k2
+            blocks[i] = previous
+        self.previous = previous
+        return blocks_to_bytes(blocks)
+
+    def _decrypt(self, data):
+        # 各块的反馈输入就是前一个密文块，整段批量加密后与密文异或
+        from s_aes_engine import encrypt_blocks
+        blocks = bytes_to_blocks(data)
+        feedback = array('H', [self.previous]) + blocks[:-1]
+        self.previous = blocks[-1]
+        return _xor_bytes(data, blocks_to_bytes(array('H', encrypt_blocks(feedback, self.key))))
+
+    def update(self, data):
+        data = self._pending + bytes(data)
+        usable = len(data) & ~1
+        self._pending = data[usable:]
+        if not usable:
+            return b''
+        return self._decrypt(data[:usable]) if self.decrypt else self._encrypt(data[:usable])
+
+    def finalize(self):
+        if not self._pending:
+            return b''
+        t1, t2 = self._t1, self._t2
+        k0, k1, k2 = self._round_keys
+        stream = t2[t1[self.previous ^ k0] ^ k1] ^ k2
+        byte, self._pending = self._pending[0], b''
+        return bytes((byte ^ (stream >> 8),))
+
+
+def cfb_encrypt(data, key, iv):
+    """CFB加密字节串"""
+    stream = CFBStream(key, iv)
+    return stream.update(data) + stream.finalize()
+
+
+def cfb_decrypt(data, key, iv):
+    """CFB解密字节串"""
+    stream = CFBStream(key, iv, decrypt=True)
+    return stream.update(data) + stream.finalize()
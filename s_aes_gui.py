@@ -2,28 +2,107 @@
 S-AES GUI 界面
 提供完整的图形用户界面支持所有S-AES功能
 包括：基本加解密、ASCII加解密、多重加密、中间相遇攻击、CBC模式等
+参数校验和运算由操作层 s_aes_ops 完成，界面只负责读取输入和展示结果
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 from s_aes import SAES
+from s_aes_ops import (SAESOperations, OperationError, MissingInputError,
+                       parse_hex16, parse_text)
+from s_aes_hex import format_blocks
+import codecs
+import os
+import queue
 import random
+import threading
+import time
 
 
 class SAESGUI:
-    def __init__(self, root):
+    # 明文（解密时为密文文本）超过该字节数时改为后台分段处理，结果逐段追加到文本框
+    LARGE_TEXT_BYTES = 16 * 1024
+    # 后台任务结果的轮询间隔（毫秒）和每次轮询最多占用主线程的时间（秒）
+    JOB_POLL_MS = 30
+    JOB_SLICE_SECONDS = 0.02
+    # 大文本结果中最多列出的块详情数和明文预览长度
+    DETAIL_LIMIT = 64
+    PREVIEW_CHARS = 200
+
+    def __init__(self, root, started_at=None, on_startup=None):
+        """
+        started_at: 启动计时的起点（time.perf_counter()的值），默认为构造开始的时刻
+        on_startup: 启动计时回调 on_startup(阶段, 秒数)，阶段依次为
+                    'constructed'（界面构造完成）、'first_paint'（首次绘制完成）、
+                    'background_ready'（后台查找表/引擎初始化完成），
+                    以及首次打开某个标签页时的 'tab:<名称>'（该页的构建耗时）
+        """
         self.root = root
         self.root.title("S-AES 加密系统")
         self.root.geometry("950x750")
+
+        # 启动计时
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.on_startup = on_startup
+        self.startup_times = {}
         
         # 设置窗口图标颜色和样式
         self.setup_styles()
         
-        # 初始化S-AES实例
+        # 初始化S-AES实例和操作层
         self.saes = SAES()
+        self.ops = SAESOperations(self.saes)
         
         # 设置UI
         self.setup_ui()
+        self._record_startup('constructed')
+
+        # 各标签页正在运行的后台任务
+        self.jobs = {}
+
+        # 首次绘制后再在后台初始化查找表和引擎，不拖慢窗口出现
+        self.background_ready = threading.Event()
+        self.root.after_idle(self._after_first_paint)
+
+    # ==================== 启动计时与后台初始化 ====================
+
+    def _record_startup(self, stage, seconds=None):
+        """记录启动阶段耗时并通知回调"""
+        if seconds is None:
+            seconds = time.perf_counter() - self.started_at
+        self.startup_times[stage] = seconds
+        if self.on_startup is not None:
+            self.on_startup(stage, seconds)
+
+    def _after_first_paint(self):
+        """首次绘制完成后记录耗时，并启动后台初始化线程"""
+        self.root.update_idletasks()
+        self._record_startup('first_paint')
+        threading.Thread(target=self._background_init, name='saes-gui-init', daemon=True).start()
+        self.root.after(50, self._poll_background_init)
+
+    def _background_init(self):
+        """
+        后台线程：构建批量查找表、全部轮密钥并完成引擎自检/选择
+        只做计算，不访问任何Tk控件
+        """
+        try:
+            from s_aes_batch import get_batch_engine
+            from s_aes_engine import registry
+            get_batch_engine().all_round_keys()
+            registry.calibrate()
+        except Exception:
+            # 初始化失败不影响界面，首次使用时会再按需初始化
+            pass
+        finally:
+            self.background_ready.set()
+
+    def _poll_background_init(self):
+        """在主线程中轮询后台初始化是否完成（Tk控件只能在主线程访问）"""
+        if self.background_ready.is_set():
+            self._record_startup('background_ready')
+        else:
+            self.root.after(50, self._poll_background_init)
     
     def setup_styles(self):
         """设置全局样式"""
@@ -128,13 +207,16 @@ class SAESGUI:
             frame = tk.Frame(content_frame, bg=self.colors['bg'])
             self.frames[name] = frame
         
-        # 设置各个标签页内容
-        self.setup_basic_tab(self.frames['basic'])
-        self.setup_ascii_tab(self.frames['ascii'])
-        self.setup_double_tab(self.frames['double'])
-        self.setup_mitm_tab(self.frames['mitm'])
-        self.setup_triple_tab(self.frames['triple'])
-        self.setup_cbc_tab(self.frames['cbc'])
+        # 各个标签页的内容在首次显示时才构建
+        self.tab_builders = {
+            'basic': self.setup_basic_tab,
+            'ascii': self.setup_ascii_tab,
+            'double': self.setup_double_tab,
+            'mitm': self.setup_mitm_tab,
+            'triple': self.setup_triple_tab,
+            'cbc': self.setup_cbc_tab,
+        }
+        self.built_tabs = set()
         
         # 创建导航按钮
         self.nav_buttons = {}
@@ -169,8 +251,19 @@ class SAESGUI:
         self.current_frame = None
         self.show_frame('basic')
     
+    def build_tab(self, frame_name):
+        """构建标签页内容（只构建一次）"""
+        if frame_name in self.built_tabs:
+            return
+        start = time.perf_counter()
+        self.tab_builders[frame_name](self.frames[frame_name])
+        self.built_tabs.add(frame_name)
+        self._record_startup(f'tab:{frame_name}', time.perf_counter() - start)
+
     def show_frame(self, frame_name):
         """切换显示的框架"""
+        self.build_tab(frame_name)
+
         # 隐藏当前框架
         if self.current_frame:
             self.frames[self.current_frame].pack_forget()
@@ -192,6 +285,291 @@ class SAESGUI:
             font=('Microsoft YaHei UI', 10, 'bold')
         )
     
+    # ==================== 后台分段任务 ====================
+
+    def start_job(self, tab, work, on_item=None, on_done=None, on_cancel=None):
+        """
+        在后台线程运行 work(emit, cancelled)
+        work 通过 emit(item) 逐段交回结果，主线程按时间片取出并调用 on_item(item)，
+        结束后调用 on_done(work的返回值)；同一标签页启动新任务时取消旧任务，
+        任务被取消时调用 on_cancel()
+        """
+        self.cancel_job(tab)
+        job = {'cancel': threading.Event(), 'queue': queue.Queue(), 'on_cancel': on_cancel}
+        self.jobs[tab] = job
+
+        def run():
+            try:
+                result = work(lambda item: job['queue'].put(('item', item)), job['cancel'].is_set)
+                job['queue'].put(('done', result))
+            except Exception as e:
+                job['queue'].put(('error', e))
+
+        threading.Thread(target=run, name=f'saes-gui-{tab}', daemon=True).start()
+        self.root.after(self.JOB_POLL_MS, self._drain_job, tab, job, on_item, on_done)
+
+    def cancel_job(self, tab):
+        """取消某个标签页的后台任务"""
+        job = self.jobs.pop(tab, None)
+        if job is not None:
+            job['cancel'].set()
+            if job['on_cancel'] is not None:
+                job['on_cancel']()
+
+    def _drain_job(self, tab, job, on_item, on_done):
+        """主线程：在一个时间片内处理后台任务交回的结果，避免界面卡顿"""
+        if self.jobs.get(tab) is not job:
+            return
+        deadline = time.perf_counter() + self.JOB_SLICE_SECONDS
+        while time.perf_counter() < deadline:
+            if self.jobs.get(tab) is not job:
+                return
+            try:
+                kind, value = job['queue'].get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'item':
+                if on_item is not None:
+                    on_item(value)
+                continue
+            del self.jobs[tab]
+            if kind == 'error':
+                messagebox.showerror("错误", f"处理失败: {str(value)}")
+            elif on_done is not None:
+                on_done(value)
+            return
+        self.root.after(self.JOB_POLL_MS, self._drain_job, tab, job, on_item, on_done)
+
+    def _preview(self, text):
+        """长文本只显示开头部分"""
+        if len(text) <= self.PREVIEW_CHARS:
+            return text
+        return f"{text[:self.PREVIEW_CHARS]}...（共{len(text)}字符）"
+
+    def _show_status(self, widget, text):
+        widget.delete(1.0, tk.END)
+        widget.insert(tk.END, text)
+
+    def encrypt_text_in_background(self, tab, plaintext_str, key, mode, iv, cipher_widget, result_widget):
+        """
+        后台分段加密大文本：密文按段追加到cipher_widget（每行固定块数，避免超长行），
+        结果区只显示进度、预览和前若干块的详情
+        """
+        from s_aes_stream import iter_encrypt_blocks, format_hex_blocks
+
+        data = plaintext_str.encode('utf-8')
+        total_blocks = (len(data) + 1) // 2
+        title = "CBC加密" if mode == 'cbc' else "加密"
+        state = {'blocks': 0, 'cipher_head': [], 'started': time.perf_counter()}
+
+        def work(emit, cancelled):
+            head = None
+            for blocks in iter_encrypt_blocks(data, key, mode, iv):
+                if cancelled():
+                    return
+                # 只有第一段附带用于结果详情的前若干个块
+                emit((list(blocks[:self.DETAIL_LIMIT]) if head is None else None,
+                      len(blocks), format_hex_blocks(blocks)))
+                head = True
+
+        def on_item(item):
+            head, count, text = item
+            if head is not None:
+                state['cipher_head'] = head
+            if state['blocks']:
+                cipher_widget.insert(tk.END, '\n')
+            cipher_widget.insert(tk.END, text)
+            state['blocks'] += count
+            self._show_status(result_widget,
+                              f"=== 后台{title}中 ===\n"
+                              f"进度: {state['blocks']}/{total_blocks} 块 "
+                              f"({state['blocks'] * 100 // max(total_blocks, 1)}%)\n")
+
+        def on_done(_):
+            elapsed = time.perf_counter() - state['started']
+            result = (f"=== {title}成功 ===\n"
+                      f"明文: {self._preview(plaintext_str)}\n"
+                      f"明文长度: {len(plaintext_str)} 字符\n"
+                      f"密钥: {key:04X}\n")
+            if mode == 'cbc':
+                result += f"初始向量IV: {iv:04X}\n"
+            result += (f"密文块数: {state['blocks']}\n"
+                       f"耗时: {elapsed:.2f} 秒\n\n"
+                       f"前{min(self.DETAIL_LIMIT, state['blocks'])}个密文块详情:\n")
+            for i, block in enumerate(state['cipher_head']):
+                result += f"  C{i} = {block:04X}\n"
+            self._show_status(result_widget, result)
+
+        cipher_widget.delete(1.0, tk.END)
+        self._show_status(result_widget, f"=== 后台{title}中 ===\n进度: 0/{total_blocks} 块 (0%)\n")
+        self.start_job(tab, work, on_item, on_done)
+
+    def decrypt_text_in_background(self, tab, cipher_text, key, mode, iv, plain_widget, result_widget):
+        """
+        后台分段解密大段16进制密文：明文按段追加到plain_widget，
+        结果区只显示进度、预览和前若干个密文块的详情；明文不是有效的UTF-8时改为显示16进制字节
+        """
+        from s_aes_stream import DEFAULT_CHUNK_BLOCKS, HexBlockParser, StreamDecryptor
+        from s_aes_hex import strip_zero_low_bytes
+
+        total_chars = max(len(cipher_text), 1)
+        title = "CBC解密" if mode == 'cbc' else "解密"
+        state = {'chars': 0, 'blocks': 0, 'cipher_head': [], 'plaintext': [], 'length': 0,
+                 'started': time.perf_counter()}
+
+        def work(emit, cancelled):
+            parser = HexBlockParser()
+            decryptor = StreamDecryptor(key, mode, iv)
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            raw = bytearray()
+            valid = True
+            step = 5 * DEFAULT_CHUNK_BLOCKS
+            for start in range(0, len(cipher_text) + 1, step):
+                if cancelled():
+                    return None
+                text = cipher_text[start:start + step]
+                last = start + step > len(cipher_text)
+                blocks = parser.feed(text) if not last else parser.feed(text) + parser.finalize()
+                # 与小文本的 SAES.blocks_to_string 相同：每个块为0的低字节都去掉
+                data = strip_zero_low_bytes(decryptor.update(blocks))
+                data += decryptor.finalize() if last else b''
+                raw += data
+                piece = ''
+                if valid:
+                    try:
+                        piece = decoder.decode(data, final=last)
+                    except UnicodeDecodeError:
+                        valid = False
+                emit((list(blocks[:self.DETAIL_LIMIT]) if start == 0 else None,
+                      len(blocks), len(text), piece))
+            # 与 SAES.blocks_to_string 一致：不是有效的UTF-8时显示16进制字节
+            return None if valid else ' '.join(f"{b:02X}" for b in raw)
+
+        def on_item(item):
+            head, count, chars, piece = item
+            if head is not None:
+                state['cipher_head'] = head
+            if piece:
+                plain_widget.insert(tk.END, piece)
+                state['length'] += len(piece)
+                if sum(len(p) for p in state['plaintext']) < self.PREVIEW_CHARS:
+                    state['plaintext'].append(piece[:self.PREVIEW_CHARS])
+            state['blocks'] += count
+            state['chars'] += chars
+            self._show_status(result_widget,
+                              f"=== 后台{title}中 ===\n"
+                              f"进度: {min(state['chars'] * 100 // total_chars, 100)}%\n")
+
+        def on_done(fallback):
+            if fallback is not None:
+                self._show_status(plain_widget, fallback)
+            preview = fallback if fallback is not None else ''.join(state['plaintext'])
+            elapsed = time.perf_counter() - state['started']
+            result = (f"=== {title}成功 ===\n"
+                      f"密文块数: {state['blocks']}\n"
+                      f"密钥: {key:04X}\n")
+            if mode == 'cbc':
+                result += f"初始向量IV: {iv:04X}\n"
+            result += (f"明文: {self._preview(preview)}\n"
+                       f"明文长度: {len(fallback) if fallback is not None else state['length']} 字符\n"
+                       f"耗时: {elapsed:.2f} 秒\n\n"
+                       f"前{len(state['cipher_head'])}个密文块详情:\n")
+            for i, block in enumerate(state['cipher_head']):
+                result += f"  C{i} = {block:04X}\n"
+            self._show_status(result_widget, result)
+
+        plain_widget.delete(1.0, tk.END)
+        self._show_status(result_widget, f"=== 后台{title}中 ===\n进度: 0%\n")
+        self.start_job(tab, work, on_item, on_done)
+
+    def run_operation(self, func, *args):
+        """
+        调用操作层函数；缺少输入时弹出警告，参数无效或运算出错时弹出错误，这些情况都返回None
+        """
+        try:
+            return func(*args)
+        except MissingInputError as e:
+            messagebox.showwarning("警告", str(e))
+        except OperationError as e:
+            messagebox.showerror("错误", str(e))
+        except Exception as e:
+            messagebox.showerror("错误", f"处理失败: {str(e)}")
+        return None
+
+    def parse_inputs(self, *fields):
+        """按 (解析函数, 原始值, 显示名) 依次解析多个输入，返回解析结果列表"""
+        return [parser(value, name) for parser, value, name in fields]
+
+    def process_file(self, tab, encrypt, mode, key_entry, iv_entry, result_widget):
+        """
+        文件流式加解密：源文件和目标文件之间分段处理，数据不经过文本框；
+        结果先写入临时文件，完成后才替换目标文件，中途取消时目标文件保持原样
+        加密：任意文件 -> 16进制块文本；解密：16进制块文本 -> 原始字节
+        """
+        from s_aes_stream import encrypt_file_to_hex, decrypt_hex_file
+
+        fields = [(parse_hex16, key_entry.get(), '密钥')]
+        if iv_entry is not None:
+            fields.append((parse_hex16, iv_entry.get(), '初始向量IV'))
+        params = self.run_operation(self.parse_inputs, *fields)
+        if params is None:
+            return
+        key, iv = params[0], params[1] if iv_entry is not None else None
+        if encrypt:
+            source = filedialog.askopenfilename(title="选择要加密的文件")
+            if not source:
+                return
+            target = filedialog.asksaveasfilename(title="保存密文（16进制块文本）",
+                                                  defaultextension=".txt",
+                                                  filetypes=[("16进制文本", "*.txt"), ("所有文件", "*.*")])
+        else:
+            source = filedialog.askopenfilename(title="选择密文文件（16进制块文本）",
+                                                filetypes=[("16进制文本", "*.txt"), ("所有文件", "*.*")])
+            if not source:
+                return
+            target = filedialog.asksaveasfilename(title="保存解密结果")
+        if not target:
+            return
+
+        total = max(os.path.getsize(source), 1)
+        title = ("CBC" if mode == 'cbc' else "") + ("文件加密" if encrypt else "文件解密")
+        started = time.perf_counter()
+
+        def work(emit, cancelled):
+            process = encrypt_file_to_hex if encrypt else decrypt_hex_file
+            return process(source, target, key, mode, iv, progress=emit, cancelled=cancelled)
+
+        def on_item(done):
+            self._show_status(result_widget,
+                              f"=== {title}中 ===\n"
+                              f"源文件: {source}\n"
+                              f"进度: {min(done * 100 // total, 100)}%\n")
+
+        def on_done(blocks):
+            if blocks is None:
+                on_cancel()
+                return
+            result = (f"=== {title}完成 ===\n"
+                      f"源文件: {source}\n"
+                      f"目标文件: {target}\n"
+                      f"密钥: {key:04X}\n")
+            if mode == 'cbc':
+                result += f"初始向量IV: {iv:04X}\n"
+            result += (f"处理块数: {blocks}\n"
+                       f"耗时: {time.perf_counter() - started:.2f} 秒\n")
+            self._show_status(result_widget, result)
+
+        def on_cancel():
+            # 取消后目标文件不会被写入；其他操作可能随即覆盖结果区，因此同时弹出提示
+            self._show_status(result_widget,
+                              f"=== {title}已取消 ===\n"
+                              f"源文件: {source}\n"
+                              f"目标文件未写入: {target}\n")
+            messagebox.showinfo("提示", f"{title}已取消，目标文件未写入")
+
+        self._show_status(result_widget, f"=== {title}中 ===\n源文件: {source}\n进度: 0%\n")
+        self.start_job(tab, work, on_item, on_done, on_cancel)
+
     def create_header(self):
         """创建顶部标题栏"""
         header_frame = tk.Frame(self.root, bg=self.colors['primary'], height=70)
@@ -426,92 +804,63 @@ class SAESGUI:
     
     def basic_encrypt(self):
         """基本加密"""
-        try:
-            plaintext_str = self.basic_plaintext.get().strip()
-            key_str = self.basic_key.get().strip()
-            
-            if not plaintext_str or not key_str:
-                messagebox.showwarning("警告", "请输入明文和密钥")
-                return
-            
-            plaintext = int(plaintext_str, 16)
-            key = int(key_str, 16)
-            
-            # 验证范围
-            if plaintext > 0xFFFF or key > 0xFFFF:
-                messagebox.showerror("错误", "明文和密钥必须是16位（0000-FFFF）")
-                return
-
-            ciphertext = self.saes.encrypt(plaintext, key)
-            
-            self.basic_ciphertext.delete(0, tk.END)
-            self.basic_ciphertext.insert(0, f"{ciphertext:04X}")
-            
-            result = (f"{'='*65}\n"
-                     f"  加密成功\n"
-                     f"{'='*65}\n\n"
-                     f"明文 (Plaintext):\n"
-                     f"  十六进制: {plaintext:04X}\n"
-                     f"  十进制:   {plaintext}\n"
-                     f"  二进制:   {plaintext:016b}\n\n"
-                     f"密钥 (Key):\n"
-                     f"  十六进制: {key:04X}\n"
-                     f"  十进制:   {key}\n\n"
-                     f"密文 (Ciphertext):\n"
-                     f"  十六进制: {ciphertext:04X}\n"
-                     f"  十进制:   {ciphertext}\n"
-                     f"  二进制:   {ciphertext:016b}\n\n"
-                     f"{'='*65}\n")
-            
-            self.basic_result.delete(1.0, tk.END)
-            self.basic_result.insert(tk.END, result)
-
-        except ValueError:
-            messagebox.showerror("错误", "请输入有效的16进制数字")
+        r = self.run_operation(self.ops.basic_encrypt,
+                               self.basic_plaintext.get(), self.basic_key.get())
+        if r is None:
+            return
+        plaintext, key, ciphertext = r['plaintext'], r['key'], r['ciphertext']
+        
+        self.basic_ciphertext.delete(0, tk.END)
+        self.basic_ciphertext.insert(0, f"{ciphertext:04X}")
+        
+        result = (f"{'='*65}\n"
+                 f"  加密成功\n"
+                 f"{'='*65}\n\n"
+                 f"明文 (Plaintext):\n"
+                 f"  十六进制: {plaintext:04X}\n"
+                 f"  十进制:   {plaintext}\n"
+                 f"  二进制:   {plaintext:016b}\n\n"
+                 f"密钥 (Key):\n"
+                 f"  十六进制: {key:04X}\n"
+                 f"  十进制:   {key}\n\n"
+                 f"密文 (Ciphertext):\n"
+                 f"  十六进制: {ciphertext:04X}\n"
+                 f"  十进制:   {ciphertext}\n"
+                 f"  二进制:   {ciphertext:016b}\n\n"
+                 f"{'='*65}\n")
+        
+        self.basic_result.delete(1.0, tk.END)
+        self.basic_result.insert(tk.END, result)
 
     def basic_decrypt(self):
         """基本解密"""
-        try:
-            ciphertext_str = self.basic_ciphertext.get().strip()
-            key_str = self.basic_key.get().strip()
-            
-            if not ciphertext_str or not key_str:
-                messagebox.showwarning("警告", "请输入密文和密钥")
-                return
-            
-            ciphertext = int(ciphertext_str, 16)
-            key = int(key_str, 16)
-            
-            if ciphertext > 0xFFFF or key > 0xFFFF:
-                messagebox.showerror("错误", "密文和密钥必须是16位（0000-FFFF）")
-                return
-
-            plaintext = self.saes.decrypt(ciphertext, key)
-            
-            self.basic_plaintext.delete(0, tk.END)
-            self.basic_plaintext.insert(0, f"{plaintext:04X}")
-            
-            result = (f"{'='*65}\n"
-                     f"  解密成功\n"
-                     f"{'='*65}\n\n"
-                     f"密文 (Ciphertext):\n"
-                     f"  十六进制: {ciphertext:04X}\n"
-                     f"  十进制:   {ciphertext}\n"
-                     f"  二进制:   {ciphertext:016b}\n\n"
-                     f"密钥 (Key):\n"
-                     f"  十六进制: {key:04X}\n"
-                     f"  十进制:   {key}\n\n"
-                     f"明文 (Plaintext):\n"
-                     f"  十六进制: {plaintext:04X}\n"
-                     f"  十进制:   {plaintext}\n"
-                     f"  二进制:   {plaintext:016b}\n\n"
-                     f"{'='*65}\n")
-            
-            self.basic_result.delete(1.0, tk.END)
-            self.basic_result.insert(tk.END, result)
-            
-        except ValueError:
-            messagebox.showerror("错误", "请输入有效的16进制数字")
+        r = self.run_operation(self.ops.basic_decrypt,
+                               self.basic_ciphertext.get(), self.basic_key.get())
+        if r is None:
+            return
+        ciphertext, key, plaintext = r['ciphertext'], r['key'], r['plaintext']
+        
+        self.basic_plaintext.delete(0, tk.END)
+        self.basic_plaintext.insert(0, f"{plaintext:04X}")
+        
+        result = (f"{'='*65}\n"
+                 f"  解密成功\n"
+                 f"{'='*65}\n\n"
+                 f"密文 (Ciphertext):\n"
+                 f"  十六进制: {ciphertext:04X}\n"
+                 f"  十进制:   {ciphertext}\n"
+                 f"  二进制:   {ciphertext:016b}\n\n"
+                 f"密钥 (Key):\n"
+                 f"  十六进制: {key:04X}\n"
+                 f"  十进制:   {key}\n\n"
+                 f"明文 (Plaintext):\n"
+                 f"  十六进制: {plaintext:04X}\n"
+                 f"  十进制:   {plaintext}\n"
+                 f"  二进制:   {plaintext:016b}\n\n"
+                 f"{'='*65}\n")
+        
+        self.basic_result.delete(1.0, tk.END)
+        self.basic_result.insert(tk.END, result)
     
     def basic_clear(self):
         """清空基本加解密界面"""
@@ -549,6 +898,10 @@ class SAESGUI:
         ttk.Button(btn_frame, text="加密", command=self.ascii_encrypt).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="解密", command=self.ascii_decrypt).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="清空", command=self.ascii_clear).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="文件加密...", command=lambda: self.process_file(
+            'ascii', True, 'ecb', self.ascii_key, None, self.ascii_result)).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="文件解密...", command=lambda: self.process_file(
+            'ascii', False, 'ecb', self.ascii_key, None, self.ascii_result)).pack(side='left', padx=5)
         
         # 结果显示
         ttk.Label(frame, text="结果:").grid(row=5, column=0, padx=5, pady=5, sticky='ne')
@@ -559,90 +912,76 @@ class SAESGUI:
         info = ("说明：\n"
                "1. 输入任意ASCII/UTF-8字符串作为明文\n"
                "2. 字符串将按2字节（16位）分组加密\n"
-               "3. 密文显示为16进制块列表")
+               "3. 密文显示为16进制块列表\n"
+               "4. 大段文本在后台分段加密；文件加解密直接在文件之间流式处理")
         ttk.Label(frame, text=info, justify='left', foreground='blue').grid(
             row=6, column=0, columnspan=3, padx=10, pady=10)
     
     def ascii_encrypt(self):
         """ASCII加密"""
-        try:
-            plaintext_str = self.ascii_plaintext.get(1.0, tk.END).strip()
-            key_str = self.ascii_key.get().strip()
-            
-            if not plaintext_str or not key_str:
-                messagebox.showwarning("警告", "请输入明文和密钥")
-                return
-            
-            key = int(key_str, 16)
-            
-            if key > 0xFFFF:
-                messagebox.showerror("错误", "密钥必须是16位（0000-FFFF）")
-                return
-            
-            # 加密
-            ciphertext_blocks = self.saes.encrypt_ascii(plaintext_str, key)
-            
-            # 显示密文块
-            cipher_str = ' '.join([f"{block:04X}" for block in ciphertext_blocks])
-            self.ascii_ciphertext.delete(1.0, tk.END)
-            self.ascii_ciphertext.insert(1.0, cipher_str)
-            
-            # 显示结果
-            result = (f"=== 加密成功 ===\n"
-                     f"明文: {plaintext_str}\n"
-                     f"明文长度: {len(plaintext_str)} 字符\n"
-                     f"密钥: {key:04X}\n"
-                     f"密文块数: {len(ciphertext_blocks)}\n"
-                     f"密文 (16进制): {cipher_str}\n")
-            
-            self.ascii_result.delete(1.0, tk.END)
-            self.ascii_result.insert(tk.END, result)
-            
-        except ValueError:
-            messagebox.showerror("错误", "请输入有效的16进制密钥")
+        # 先取消本页仍在运行的后台任务，避免其结果继续追加到输出框
+        self.cancel_job('ascii')
+        params = self.run_operation(self.parse_inputs, 
+                                    (parse_text, self.ascii_plaintext.get(1.0, tk.END), '明文'),
+                                    (parse_hex16, self.ascii_key.get(), '密钥'))
+        if params is None:
+            return
+        plaintext_str, key = params
+        
+        # 大段文本在后台分段加密
+        if len(plaintext_str.encode('utf-8')) > self.LARGE_TEXT_BYTES:
+            self.encrypt_text_in_background('ascii', plaintext_str, key, 'ecb', None,
+                                            self.ascii_ciphertext, self.ascii_result)
+            return
+        
+        # 加密
+        r = self.run_operation(self.ops.ascii_encrypt, plaintext_str, key)
+        if r is None:
+            return
+        ciphertext_blocks = r['ciphertext']
+        
+        # 显示密文块
+        cipher_str = format_blocks(ciphertext_blocks)
+        self.ascii_ciphertext.delete(1.0, tk.END)
+        self.ascii_ciphertext.insert(1.0, cipher_str)
+        
+        # 显示结果
+        result = (f"=== 加密成功 ===\n"
+                 f"明文: {plaintext_str}\n"
+                 f"明文长度: {len(plaintext_str)} 字符\n"
+                 f"密钥: {key:04X}\n"
+                 f"密文块数: {len(ciphertext_blocks)}\n"
+                 f"密文 (16进制): {cipher_str}\n")
+        
+        self.ascii_result.delete(1.0, tk.END)
+        self.ascii_result.insert(tk.END, result)
     
     def ascii_decrypt(self):
         """ASCII解密"""
-        try:
-            cipher_str = self.ascii_ciphertext.get(1.0, tk.END).strip()
-            key_str = self.ascii_key.get().strip()
-            
-            if not cipher_str or not key_str:
-                messagebox.showwarning("警告", "请输入密文和密钥")
-                return
-            
-            key = int(key_str, 16)
-            
-            if key > 0xFFFF:
-                messagebox.showerror("错误", "密钥必须是16位（0000-FFFF）")
-                return
-            
-            # 解析密文块
-            cipher_parts = cipher_str.split()
-            ciphertext_blocks = [int(block, 16) for block in cipher_parts]
-            
-            # 解密
-            plaintext_str = self.saes.decrypt_ascii(ciphertext_blocks, key)
-            
-            # 显示明文
-            self.ascii_plaintext.delete(1.0, tk.END)
-            self.ascii_plaintext.insert(1.0, plaintext_str)
-            
-            # 显示结果
-            result = (f"=== 解密成功 ===\n"
-                     f"密文块数: {len(ciphertext_blocks)}\n"
-                     f"密钥: {key:04X}\n"
-                     f"明文: {plaintext_str}\n"
-                     f"明文长度: {len(plaintext_str)} 字符\n")
-            
-            self.ascii_result.delete(1.0, tk.END)
-            self.ascii_result.insert(tk.END, result)
-            
-        except ValueError as e:
-            messagebox.showerror("错误", f"请输入有效的16进制密文块: {str(e)}")
+        self.cancel_job('ascii')
+        r = self.run_operation(self.ops.ascii_decrypt,
+                               self.ascii_ciphertext.get(1.0, tk.END), self.ascii_key.get())
+        if r is None:
+            return
+        ciphertext_blocks, key, plaintext_str = r['ciphertext'], r['key'], r['plaintext']
+        
+        # 显示明文
+        self.ascii_plaintext.delete(1.0, tk.END)
+        self.ascii_plaintext.insert(1.0, plaintext_str)
+        
+        # 显示结果
+        result = (f"=== 解密成功 ===\n"
+                 f"密文块数: {len(ciphertext_blocks)}\n"
+                 f"密钥: {key:04X}\n"
+                 f"明文: {plaintext_str}\n"
+                 f"明文长度: {len(plaintext_str)} 字符\n")
+        
+        self.ascii_result.delete(1.0, tk.END)
+        self.ascii_result.insert(tk.END, result)
     
     def ascii_clear(self):
         """清空ASCII界面"""
+        self.cancel_job('ascii')
         self.ascii_plaintext.delete(1.0, tk.END)
         self.ascii_key.delete(0, tk.END)
         self.ascii_ciphertext.delete(1.0, tk.END)
@@ -698,79 +1037,47 @@ class SAESGUI:
     
     def double_encrypt(self):
         """双重加密"""
-        try:
-            plaintext_str = self.double_plaintext.get().strip()
-            key1_str = self.double_key1.get().strip()
-            key2_str = self.double_key2.get().strip()
-            
-            if not plaintext_str or not key1_str or not key2_str:
-                messagebox.showwarning("警告", "请输入明文和两个密钥")
-                return
-            
-            plaintext = int(plaintext_str, 16)
-            key1 = int(key1_str, 16)
-            key2 = int(key2_str, 16)
-            
-            if plaintext > 0xFFFF or key1 > 0xFFFF or key2 > 0xFFFF:
-                messagebox.showerror("错误", "所有值必须是16位（0000-FFFF）")
-                return
-            
-            ciphertext = self.saes.double_encrypt(plaintext, key1, key2)
-            
-            self.double_ciphertext.delete(0, tk.END)
-            self.double_ciphertext.insert(0, f"{ciphertext:04X}")
-            
-            result = (f"=== 双重加密成功 ===\n"
-                     f"明文 P: {plaintext:04X}\n"
-                     f"密钥 K1: {key1:04X}\n"
-                     f"密钥 K2: {key2:04X}\n"
-                     f"32位组合密钥: {key1:04X}{key2:04X}\n"
-                     f"中间值 E_K1(P): {self.saes.encrypt(plaintext, key1):04X}\n"
-                     f"密文 C = E_K2(E_K1(P)): {ciphertext:04X}\n")
-            
-            self.double_result.delete(1.0, tk.END)
-            self.double_result.insert(tk.END, result)
-            
-        except ValueError:
-            messagebox.showerror("错误", "请输入有效的16进制数字")
+        r = self.run_operation(self.ops.double_encrypt, self.double_plaintext.get(),
+                               self.double_key1.get(), self.double_key2.get())
+        if r is None:
+            return
+        plaintext, key1, key2, ciphertext = r['plaintext'], r['key1'], r['key2'], r['ciphertext']
+        
+        self.double_ciphertext.delete(0, tk.END)
+        self.double_ciphertext.insert(0, f"{ciphertext:04X}")
+        
+        result = (f"=== 双重加密成功 ===\n"
+                 f"明文 P: {plaintext:04X}\n"
+                 f"密钥 K1: {key1:04X}\n"
+                 f"密钥 K2: {key2:04X}\n"
+                 f"32位组合密钥: {key1:04X}{key2:04X}\n"
+                 f"中间值 E_K1(P): {r['middle']:04X}\n"
+                 f"密文 C = E_K2(E_K1(P)): {ciphertext:04X}\n")
+        
+        self.double_result.delete(1.0, tk.END)
+        self.double_result.insert(tk.END, result)
     
     def double_decrypt(self):
         """双重解密"""
-        try:
-            ciphertext_str = self.double_ciphertext.get().strip()
-            key1_str = self.double_key1.get().strip()
-            key2_str = self.double_key2.get().strip()
-            
-            if not ciphertext_str or not key1_str or not key2_str:
-                messagebox.showwarning("警告", "请输入密文和两个密钥")
-                return
-            
-            ciphertext = int(ciphertext_str, 16)
-            key1 = int(key1_str, 16)
-            key2 = int(key2_str, 16)
-            
-            if ciphertext > 0xFFFF or key1 > 0xFFFF or key2 > 0xFFFF:
-                messagebox.showerror("错误", "所有值必须是16位（0000-FFFF）")
-                return
-            
-            plaintext = self.saes.double_decrypt(ciphertext, key1, key2)
-            
-            self.double_plaintext.delete(0, tk.END)
-            self.double_plaintext.insert(0, f"{plaintext:04X}")
-            
-            result = (f"=== 双重解密成功 ===\n"
-                     f"密文 C: {ciphertext:04X}\n"
-                     f"密钥 K1: {key1:04X}\n"
-                     f"密钥 K2: {key2:04X}\n"
-                     f"32位组合密钥: {key1:04X}{key2:04X}\n"
-                     f"中间值 D_K2(C): {self.saes.decrypt(ciphertext, key2):04X}\n"
-                     f"明文 P = D_K1(D_K2(C)): {plaintext:04X}\n")
-            
-            self.double_result.delete(1.0, tk.END)
-            self.double_result.insert(tk.END, result)
-            
-        except ValueError:
-            messagebox.showerror("错误", "请输入有效的16进制数字")
+        r = self.run_operation(self.ops.double_decrypt, self.double_ciphertext.get(),
+                               self.double_key1.get(), self.double_key2.get())
+        if r is None:
+            return
+        ciphertext, key1, key2, plaintext = r['ciphertext'], r['key1'], r['key2'], r['plaintext']
+        
+        self.double_plaintext.delete(0, tk.END)
+        self.double_plaintext.insert(0, f"{plaintext:04X}")
+        
+        result = (f"=== 双重解密成功 ===\n"
+                 f"密文 C: {ciphertext:04X}\n"
+                 f"密钥 K1: {key1:04X}\n"
+                 f"密钥 K2: {key2:04X}\n"
+                 f"32位组合密钥: {key1:04X}{key2:04X}\n"
+                 f"中间值 D_K2(C): {r['middle']:04X}\n"
+                 f"明文 P = D_K1(D_K2(C)): {plaintext:04X}\n")
+        
+        self.double_result.delete(1.0, tk.END)
+        self.double_result.insert(tk.END, result)
     
     def double_clear(self):
         """清空双重加密界面"""
@@ -826,26 +1133,21 @@ class SAESGUI:
     
     def mitm_generate(self):
         """生成测试数据"""
-        # 随机生成明文和密钥
-        plaintext = random.randint(0, 0xFFFF)
-        key1 = random.randint(0, 0xFFFF)
-        key2 = random.randint(0, 0xFFFF)
-        
-        # 进行双重加密
-        ciphertext = self.saes.double_encrypt(plaintext, key1, key2)
+        # 随机生成明文和密钥，并进行双重加密
+        r = self.ops.mitm_generate()
         
         # 填充数据
         self.mitm_plaintext.delete(0, tk.END)
-        self.mitm_plaintext.insert(0, f"{plaintext:04X}")
+        self.mitm_plaintext.insert(0, f"{r['plaintext']:04X}")
         self.mitm_ciphertext.delete(0, tk.END)
-        self.mitm_ciphertext.insert(0, f"{ciphertext:04X}")
+        self.mitm_ciphertext.insert(0, f"{r['ciphertext']:04X}")
         
         # 显示正确密钥
         result = (f"=== 测试数据已生成 ===\n"
-                 f"明文: {plaintext:04X}\n"
-                 f"正确密钥 K1: {key1:04X}\n"
-                 f"正确密钥 K2: {key2:04X}\n"
-                 f"密文: {ciphertext:04X}\n"
+                 f"明文: {r['plaintext']:04X}\n"
+                 f"正确密钥 K1: {r['key1']:04X}\n"
+                 f"正确密钥 K2: {r['key2']:04X}\n"
+                 f"密文: {r['ciphertext']:04X}\n"
                  f"\n现在点击'开始攻击'尝试破解密钥\n")
         
         self.mitm_result.delete(1.0, tk.END)
@@ -853,55 +1155,44 @@ class SAESGUI:
     
     def mitm_attack(self):
         """执行中间相遇攻击"""
-        try:
-            plaintext_str = self.mitm_plaintext.get().strip()
-            ciphertext_str = self.mitm_ciphertext.get().strip()
-            
-            if not plaintext_str or not ciphertext_str:
-                messagebox.showwarning("警告", "请输入明文和密文")
-                return
-            
-            plaintext = int(plaintext_str, 16)
-            ciphertext = int(ciphertext_str, 16)
-            
-            if plaintext > 0xFFFF or ciphertext > 0xFFFF:
-                messagebox.showerror("错误", "明文和密文必须是16位（0000-FFFF）")
-                return
-            
-            # 显示开始信息
-            self.mitm_result.delete(1.0, tk.END)
-            self.mitm_result.insert(tk.END, "正在执行中间相遇攻击...\n")
-            self.mitm_result.insert(tk.END, "这可能需要几秒钟时间，请耐心等待...\n\n")
-            self.root.update()
-            
-            # 执行攻击
-            self.mitm_progress['value'] = 0
-            possible_keys = self.saes.meet_in_middle_attack(plaintext, ciphertext)
-            self.mitm_progress['value'] = 100
-            
-            # 显示结果
-            result = f"\n=== 攻击完成 ===\n"
-            result += f"找到 {len(possible_keys)} 个可能的密钥对\n\n"
-            
-            if possible_keys:
-                result += "可能的密钥对 (K1, K2):\n"
-                for i, (k1, k2) in enumerate(possible_keys[:30]):  # 只显示前30个
-                    result += f"{i+1}. K1={k1:04X}, K2={k2:04X}\n"
-                    # 验证密钥
-                    test_cipher = self.saes.double_encrypt(plaintext, k1, k2)
-                    if test_cipher == ciphertext:
-                        result += f"   ✓ 验证通过\n"
-                
-                if len(possible_keys) > 30:
-                    result += f"\n... 还有 {len(possible_keys) - 30} 个密钥对未显示\n"
-            else:
-                result += "未找到有效的密钥对\n"
-            
-            self.mitm_result.delete(1.0, tk.END)
-            self.mitm_result.insert(tk.END, result)
-
-        except ValueError:
-            messagebox.showerror("错误", "请输入有效的16进制数字")
+        params = self.run_operation(self.parse_inputs,
+                                    (parse_hex16, self.mitm_plaintext.get(), '明文'),
+                                    (parse_hex16, self.mitm_ciphertext.get(), '密文'))
+        if params is None:
+            return
+        plaintext, ciphertext = params
+        
+        # 显示开始信息
+        self.mitm_result.delete(1.0, tk.END)
+        self.mitm_result.insert(tk.END, "正在执行中间相遇攻击...\n")
+        self.mitm_result.insert(tk.END, "这可能需要几秒钟时间，请耐心等待...\n\n")
+        self.root.update()
+        
+        # 执行攻击
+        self.mitm_progress['value'] = 0
+        r = self.ops.mitm_attack(plaintext, ciphertext)
+        possible_keys = r['candidates']
+        self.mitm_progress['value'] = 100
+        
+        # 显示结果
+        result = "\n=== 攻击完成 ===\n"
+        result += f"找到 {r['count']} 个可能的密钥对\n\n"
+        
+        if possible_keys:
+            result += "可能的密钥对 (K1, K2):\n"
+            for i, (k1, k2) in enumerate(possible_keys[:30]):  # 只显示前30个
+                result += f"{i+1}. K1={k1:04X}, K2={k2:04X}\n"
+                # 验证密钥
+                if self.ops.verify_double_key(plaintext, ciphertext, k1, k2):
+                    result += "   ✓ 验证通过\n"
+            
+            if len(possible_keys) > 30:
+                result += f"\n... 还有 {len(possible_keys) - 30} 个密钥对未显示\n"
+        else:
+            result += "未找到有效的密钥对\n"
+        
+        self.mitm_result.delete(1.0, tk.END)
+        self.mitm_result.insert(tk.END, result)
 
     def mitm_clear(self):
         """清空中间相遇攻击界面"""
@@ -979,121 +1270,71 @@ class SAESGUI:
     
     def triple_encrypt(self):
         """三重加密"""
-        try:
-            plaintext_str = self.triple_plaintext.get().strip()
-            key1_str = self.triple_key1.get().strip()
-            key2_str = self.triple_key2.get().strip()
-            
-            if not plaintext_str or not key1_str or not key2_str:
-                messagebox.showwarning("警告", "请输入明文和密钥")
-                return
-            
-            plaintext = int(plaintext_str, 16)
-            key1 = int(key1_str, 16)
-            key2 = int(key2_str, 16)
-            
-            if plaintext > 0xFFFF or key1 > 0xFFFF or key2 > 0xFFFF:
-                messagebox.showerror("错误", "所有值必须是16位（0000-FFFF）")
-                return
-            
-            if self.triple_mode.current() == 0:  # 32位模式
-                ciphertext = self.saes.triple_encrypt_32bit(plaintext, key1, key2)
-                temp1 = self.saes.encrypt(plaintext, key1)
-                temp2 = self.saes.decrypt(temp1, key2)
-                
-                result = (f"=== 三重加密成功 (32位模式) ===\n"
-                         f"明文 P: {plaintext:04X}\n"
-                         f"密钥 K1: {key1:04X}\n"
-                         f"密钥 K2: {key2:04X}\n"
-                         f"中间值1 E_K1(P): {temp1:04X}\n"
-                         f"中间值2 D_K2(E_K1(P)): {temp2:04X}\n"
-                         f"密文 C = E_K1(D_K2(E_K1(P))): {ciphertext:04X}\n")
-            else:  # 48位模式
-                key3_str = self.triple_key3.get().strip()
-                if not key3_str:
-                    messagebox.showwarning("警告", "48位模式需要输入K3")
-                    return
-                key3 = int(key3_str, 16)
-                if key3 > 0xFFFF:
-                    messagebox.showerror("错误", "K3必须是16位（0000-FFFF）")
-                    return
-                
-                ciphertext = self.saes.triple_encrypt_48bit(plaintext, key1, key2, key3)
-                temp1 = self.saes.encrypt(plaintext, key1)
-                temp2 = self.saes.decrypt(temp1, key2)
-                
-                result = (f"=== 三重加密成功 (48位模式) ===\n"
-                         f"明文 P: {plaintext:04X}\n"
-                         f"密钥 K1: {key1:04X}\n"
-                         f"密钥 K2: {key2:04X}\n"
-                         f"密钥 K3: {key3:04X}\n"
-                         f"中间值1 E_K1(P): {temp1:04X}\n"
-                         f"中间值2 D_K2(E_K1(P)): {temp2:04X}\n"
-                         f"密文 C = E_K3(D_K2(E_K1(P))): {ciphertext:04X}\n")
-            
-            self.triple_ciphertext.delete(0, tk.END)
-            self.triple_ciphertext.insert(0, f"{ciphertext:04X}")
-            
-            self.triple_result.delete(1.0, tk.END)
-            self.triple_result.insert(tk.END, result)
-
-        except ValueError:
-            messagebox.showerror("错误", "请输入有效的16进制数字")
+        # 32位模式不使用K3
+        key3 = self.triple_key3.get() if self.triple_mode.current() == 1 else None
+        if key3 is not None and not key3.strip():
+            messagebox.showwarning("警告", "48位模式需要输入K3")
+            return
+        r = self.run_operation(self.ops.triple_encrypt, self.triple_plaintext.get(),
+                               self.triple_key1.get(), self.triple_key2.get(), key3)
+        if r is None:
+            return
+        
+        if r['mode'] == '32bit':
+            result = (f"=== 三重加密成功 (32位模式) ===\n"
+                     f"明文 P: {r['plaintext']:04X}\n"
+                     f"密钥 K1: {r['key1']:04X}\n"
+                     f"密钥 K2: {r['key2']:04X}\n"
+                     f"中间值1 E_K1(P): {r['middle1']:04X}\n"
+                     f"中间值2 D_K2(E_K1(P)): {r['middle2']:04X}\n"
+                     f"密文 C = E_K1(D_K2(E_K1(P))): {r['ciphertext']:04X}\n")
+        else:
+            result = (f"=== 三重加密成功 (48位模式) ===\n"
+                     f"明文 P: {r['plaintext']:04X}\n"
+                     f"密钥 K1: {r['key1']:04X}\n"
+                     f"密钥 K2: {r['key2']:04X}\n"
+                     f"密钥 K3: {r['key3']:04X}\n"
+                     f"中间值1 E_K1(P): {r['middle1']:04X}\n"
+                     f"中间值2 D_K2(E_K1(P)): {r['middle2']:04X}\n"
+                     f"密文 C = E_K3(D_K2(E_K1(P))): {r['ciphertext']:04X}\n")
+        
+        self.triple_ciphertext.delete(0, tk.END)
+        self.triple_ciphertext.insert(0, f"{r['ciphertext']:04X}")
+        
+        self.triple_result.delete(1.0, tk.END)
+        self.triple_result.insert(tk.END, result)
 
     def triple_decrypt(self):
         """三重解密"""
-        try:
-            ciphertext_str = self.triple_ciphertext.get().strip()
-            key1_str = self.triple_key1.get().strip()
-            key2_str = self.triple_key2.get().strip()
-            
-            if not ciphertext_str or not key1_str or not key2_str:
-                messagebox.showwarning("警告", "请输入密文和密钥")
-                return
-            
-            ciphertext = int(ciphertext_str, 16)
-            key1 = int(key1_str, 16)
-            key2 = int(key2_str, 16)
-            
-            if ciphertext > 0xFFFF or key1 > 0xFFFF or key2 > 0xFFFF:
-                messagebox.showerror("错误", "所有值必须是16位（0000-FFFF）")
-                return
-            
-            if self.triple_mode.current() == 0:  # 32位模式
-                plaintext = self.saes.triple_decrypt_32bit(ciphertext, key1, key2)
-                
-                result = (f"=== 三重解密成功 (32位模式) ===\n"
-                         f"密文 C: {ciphertext:04X}\n"
-                         f"密钥 K1: {key1:04X}\n"
-                         f"密钥 K2: {key2:04X}\n"
-                         f"明文 P = D_K1(E_K2(D_K1(C))): {plaintext:04X}\n")
-            else:  # 48位模式
-                key3_str = self.triple_key3.get().strip()
-                if not key3_str:
-                    messagebox.showwarning("警告", "48位模式需要输入K3")
-                    return
-                key3 = int(key3_str, 16)
-                if key3 > 0xFFFF:
-                    messagebox.showerror("错误", "K3必须是16位（0000-FFFF）")
-                    return
-                
-                plaintext = self.saes.triple_decrypt_48bit(ciphertext, key1, key2, key3)
-                
-                result = (f"=== 三重解密成功 (48位模式) ===\n"
-                         f"密文 C: {ciphertext:04X}\n"
-                         f"密钥 K1: {key1:04X}\n"
-                         f"密钥 K2: {key2:04X}\n"
-                         f"密钥 K3: {key3:04X}\n"
-                         f"明文 P = D_K1(E_K2(D_K3(C))): {plaintext:04X}\n")
-            
-            self.triple_plaintext.delete(0, tk.END)
-            self.triple_plaintext.insert(0, f"{plaintext:04X}")
-            
-            self.triple_result.delete(1.0, tk.END)
-            self.triple_result.insert(tk.END, result)
-            
-        except ValueError:
-            messagebox.showerror("错误", "请输入有效的16进制数字")
+        # 32位模式不使用K3
+        key3 = self.triple_key3.get() if self.triple_mode.current() == 1 else None
+        if key3 is not None and not key3.strip():
+            messagebox.showwarning("警告", "48位模式需要输入K3")
+            return
+        r = self.run_operation(self.ops.triple_decrypt, self.triple_ciphertext.get(),
+                               self.triple_key1.get(), self.triple_key2.get(), key3)
+        if r is None:
+            return
+        
+        if r['mode'] == '32bit':
+            result = (f"=== 三重解密成功 (32位模式) ===\n"
+                     f"密文 C: {r['ciphertext']:04X}\n"
+                     f"密钥 K1: {r['key1']:04X}\n"
+                     f"密钥 K2: {r['key2']:04X}\n"
+                     f"明文 P = D_K1(E_K2(D_K1(C))): {r['plaintext']:04X}\n")
+        else:
+            result = (f"=== 三重解密成功 (48位模式) ===\n"
+                     f"密文 C: {r['ciphertext']:04X}\n"
+                     f"密钥 K1: {r['key1']:04X}\n"
+                     f"密钥 K2: {r['key2']:04X}\n"
+                     f"密钥 K3: {r['key3']:04X}\n"
+                     f"明文 P = D_K1(E_K2(D_K3(C))): {r['plaintext']:04X}\n")
+        
+        self.triple_plaintext.delete(0, tk.END)
+        self.triple_plaintext.insert(0, f"{r['plaintext']:04X}")
+        
+        self.triple_result.delete(1.0, tk.END)
+        self.triple_result.insert(tk.END, result)
     
     def triple_clear(self):
         """清空三重加密界面"""
@@ -1141,6 +1382,10 @@ class SAESGUI:
         ttk.Button(btn_frame, text="CBC解密", command=self.cbc_decrypt).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="篡改测试", command=self.cbc_tamper_test).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="清空", command=self.cbc_clear).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="文件加密...", command=lambda: self.process_file(
+            'cbc', True, 'cbc', self.cbc_key, self.cbc_iv, self.cbc_result)).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="文件解密...", command=lambda: self.process_file(
+            'cbc', False, 'cbc', self.cbc_key, self.cbc_iv, self.cbc_result)).pack(side='left', padx=5)
         
         # 结果显示
         ttk.Label(frame, text="结果:").grid(row=6, column=0, padx=5, pady=5, sticky='ne')
@@ -1163,181 +1408,144 @@ class SAESGUI:
     
     def cbc_encrypt(self):
         """CBC加密"""
-        try:
-            plaintext_str = self.cbc_plaintext.get(1.0, tk.END).strip()
-            key_str = self.cbc_key.get().strip()
-            iv_str = self.cbc_iv.get().strip()
-            
-            if not plaintext_str or not key_str or not iv_str:
-                messagebox.showwarning("警告", "请输入明文、密钥和IV")
-                return
-            
-            key = int(key_str, 16)
-            iv = int(iv_str, 16)
-            
-            if key > 0xFFFF or iv > 0xFFFF:
-                messagebox.showerror("错误", "密钥和IV必须是16位（0000-FFFF）")
-                return
-            
-            # 转换为块
-            plaintext_blocks = self.saes.string_to_blocks(plaintext_str)
-            
-            # CBC加密
-            ciphertext_blocks = self.saes.cbc_encrypt(plaintext_blocks, key, iv)
-            
-            # 显示密文
-            cipher_str = ' '.join([f"{block:04X}" for block in ciphertext_blocks])
-            self.cbc_ciphertext.delete(1.0, tk.END)
-            self.cbc_ciphertext.insert(1.0, cipher_str)
-            
-            # 显示结果
-            result = (f"=== CBC加密成功 ===\n"
-                     f"明文: {plaintext_str}\n"
-                     f"明文块数: {len(plaintext_blocks)}\n"
-                     f"密钥: {key:04X}\n"
-                     f"初始向量IV: {iv:04X}\n"
-                     f"密文块: {cipher_str}\n\n"
-                     f"明文块详情:\n")
-            
-            for i, block in enumerate(plaintext_blocks):
-                result += f"  P{i} = {block:04X}\n"
-            
-            result += f"\n密文块详情:\n"
-            for i, block in enumerate(ciphertext_blocks):
-                result += f"  C{i} = {block:04X}\n"
-            
-            self.cbc_result.delete(1.0, tk.END)
-            self.cbc_result.insert(tk.END, result)
-            
-        except ValueError:
-            messagebox.showerror("错误", "请输入有效的数据")
+        # 先取消本页仍在运行的后台任务，避免其结果继续追加到输出框
+        self.cancel_job('cbc')
+        params = self.run_operation(self.parse_inputs,
+                                    (parse_text, self.cbc_plaintext.get(1.0, tk.END), '明文'),
+                                    (parse_hex16, self.cbc_key.get(), '密钥'),
+                                    (parse_hex16, self.cbc_iv.get(), '初始向量IV'))
+        if params is None:
+            return
+        plaintext_str, key, iv = params
+        
+        # 大段文本在后台分段加密
+        if len(plaintext_str.encode('utf-8')) > self.LARGE_TEXT_BYTES:
+            self.encrypt_text_in_background('cbc', plaintext_str, key, 'cbc', iv,
+                                            self.cbc_ciphertext, self.cbc_result)
+            return
+        
+        # CBC加密
+        r = self.run_operation(self.ops.cbc_encrypt, plaintext_str, key, iv)
+        if r is None:
+            return
+        plaintext_blocks, ciphertext_blocks = r['plaintext_blocks'], r['ciphertext']
+        
+        # 显示密文
+        cipher_str = format_blocks(ciphertext_blocks)
+        self.cbc_ciphertext.delete(1.0, tk.END)
+        self.cbc_ciphertext.insert(1.0, cipher_str)
+        
+        # 显示结果
+        result = (f"=== CBC加密成功 ===\n"
+                 f"明文: {plaintext_str}\n"
+                 f"明文块数: {len(plaintext_blocks)}\n"
+                 f"密钥: {key:04X}\n"
+                 f"初始向量IV: {iv:04X}\n"
+                 f"密文块: {cipher_str}\n\n"
+                 f"明文块详情:\n")
+        
+        for i, block in enumerate(plaintext_blocks):
+            result += f"  P{i} = {block:04X}\n"
+        
+        result += "\n密文块详情:\n"
+        for i, block in enumerate(ciphertext_blocks):
+            result += f"  C{i} = {block:04X}\n"
+        
+        self.cbc_result.delete(1.0, tk.END)
+        self.cbc_result.insert(tk.END, result)
     
     def cbc_decrypt(self):
         """CBC解密"""
-        try:
-            cipher_str = self.cbc_ciphertext.get(1.0, tk.END).strip()
-            key_str = self.cbc_key.get().strip()
-            iv_str = self.cbc_iv.get().strip()
-            
-            if not cipher_str or not key_str or not iv_str:
-                messagebox.showwarning("警告", "请输入密文、密钥和IV")
+        self.cancel_job('cbc')
+        cipher_text = self.cbc_ciphertext.get(1.0, tk.END)
+        
+        # 大段密文在后台分段解密，不逐块列出详情
+        if len(cipher_text) > self.LARGE_TEXT_BYTES:
+            params = self.run_operation(self.parse_inputs,
+                                        (parse_hex16, self.cbc_key.get(), '密钥'),
+                                        (parse_hex16, self.cbc_iv.get(), '初始向量IV'))
+            if params is None:
                 return
-            
-            key = int(key_str, 16)
-            iv = int(iv_str, 16)
-            
-            if key > 0xFFFF or iv > 0xFFFF:
-                messagebox.showerror("错误", "密钥和IV必须是16位（0000-FFFF）")
-                return
-            
-            # 解析密文块
-            cipher_parts = cipher_str.split()
-            ciphertext_blocks = [int(block, 16) for block in cipher_parts]
-            
-            # CBC解密
-            plaintext_blocks = self.saes.cbc_decrypt(ciphertext_blocks, key, iv)
-            
-            # 转换为字符串
-            plaintext_str = self.saes.blocks_to_string(plaintext_blocks)
-            
-            # 显示明文
-            self.cbc_plaintext.delete(1.0, tk.END)
-            self.cbc_plaintext.insert(1.0, plaintext_str)
-            
-            # 显示结果
-            result = (f"=== CBC解密成功 ===\n"
-                     f"密文块数: {len(ciphertext_blocks)}\n"
-                     f"密钥: {key:04X}\n"
-                     f"初始向量IV: {iv:04X}\n"
-                     f"明文: {plaintext_str}\n\n"
-                     f"密文块详情:\n")
-            
-            for i, block in enumerate(ciphertext_blocks):
-                result += f"  C{i} = {block:04X}\n"
-            
-            result += f"\n明文块详情:\n"
-            for i, block in enumerate(plaintext_blocks):
-                result += f"  P{i} = {block:04X}\n"
-            
-            self.cbc_result.delete(1.0, tk.END)
-            self.cbc_result.insert(tk.END, result)
-            
-        except ValueError as e:
-            messagebox.showerror("错误", f"请输入有效的数据: {str(e)}")
+            key, iv = params
+            self.decrypt_text_in_background('cbc', cipher_text, key, 'cbc', iv,
+                                            self.cbc_plaintext, self.cbc_result)
+            return
+        
+        r = self.run_operation(self.ops.cbc_decrypt, cipher_text,
+                               self.cbc_key.get(), self.cbc_iv.get())
+        if r is None:
+            return
+        ciphertext_blocks, plaintext_blocks = r['ciphertext'], r['plaintext_blocks']
+        plaintext_str = r['plaintext']
+        
+        # 显示明文
+        self.cbc_plaintext.delete(1.0, tk.END)
+        self.cbc_plaintext.insert(1.0, plaintext_str)
+        
+        # 显示结果
+        result = (f"=== CBC解密成功 ===\n"
+                 f"密文块数: {len(ciphertext_blocks)}\n"
+                 f"密钥: {r['key']:04X}\n"
+                 f"初始向量IV: {r['iv']:04X}\n"
+                 f"明文: {plaintext_str}\n\n"
+                 f"密文块详情:\n")
+        
+        for i, block in enumerate(ciphertext_blocks):
+            result += f"  C{i} = {block:04X}\n"
+        
+        result += "\n明文块详情:\n"
+        for i, block in enumerate(plaintext_blocks):
+            result += f"  P{i} = {block:04X}\n"
+        
+        self.cbc_result.delete(1.0, tk.END)
+        self.cbc_result.insert(tk.END, result)
     
     def cbc_tamper_test(self):
         """CBC篡改测试"""
-        try:
-            cipher_str = self.cbc_ciphertext.get(1.0, tk.END).strip()
-            key_str = self.cbc_key.get().strip()
-            iv_str = self.cbc_iv.get().strip()
-            
-            if not cipher_str or not key_str or not iv_str:
-                messagebox.showwarning("警告", "请先进行CBC加密")
-                return
-            
-            key = int(key_str, 16)
-            iv = int(iv_str, 16)
-            
-            # 解析密文块
-            cipher_parts = cipher_str.split()
-            ciphertext_blocks = [int(block, 16) for block in cipher_parts]
-            
-            if len(ciphertext_blocks) < 2:
-                messagebox.showwarning("警告", "密文块数量不足，请使用更长的明文")
-                return
-            
-            # 原始解密
-            original_plaintext_blocks = self.saes.cbc_decrypt(ciphertext_blocks, key, iv)
-            original_plaintext = self.saes.blocks_to_string(original_plaintext_blocks)
-            
-            # 篡改第一个密文块（翻转一位）
-            tampered_blocks = ciphertext_blocks.copy()
-            tampered_blocks[0] ^= 0x0001  # 翻转最低位
-            
-            # 篡改后解密
-            tampered_plaintext_blocks = self.saes.cbc_decrypt(tampered_blocks, key, iv)
-            tampered_plaintext = self.saes.blocks_to_string(tampered_plaintext_blocks)
-            
-            # 显示对比结果
-            result = (f"=== CBC篡改测试 ===\n\n"
-                     f"原始密文块:\n")
-            
-            for i, block in enumerate(ciphertext_blocks):
+        self.cancel_job('cbc')
+        # 篡改第一个密文块（翻转最低位）
+        r = self.run_operation(self.ops.cbc_tamper_test, self.cbc_ciphertext.get(1.0, tk.END),
+                               self.cbc_key.get(), self.cbc_iv.get(), 0, 0x0001)
+        if r is None:
+            return
+        
+        # 显示对比结果
+        result = ("=== CBC篡改测试 ===\n\n"
+                 "原始密文块:\n")
+        
+        for i, block in enumerate(r['ciphertext']):
+            result += f"  C{i} = {block:04X}\n"
+        
+        result += "\n篡改密文块（C0翻转最低位）:\n"
+        for i, block in enumerate(r['tampered_ciphertext']):
+            if i == r['index']:
+                result += f"  C{i} = {block:04X} ← 已篡改\n"
+            else:
                 result += f"  C{i} = {block:04X}\n"
-            
-            result += f"\n篡改密文块（C0翻转最低位）:\n"
-            for i, block in enumerate(tampered_blocks):
-                if i == 0:
-                    result += f"  C{i} = {block:04X} ← 已篡改\n"
-                else:
-                    result += f"  C{i} = {block:04X}\n"
-            
-            result += f"\n原始明文: {original_plaintext}\n"
-            result += f"原始明文块:\n"
-            for i, block in enumerate(original_plaintext_blocks):
+        
+        result += f"\n原始明文: {r['original_plaintext']}\n"
+        result += "原始明文块:\n"
+        for i, block in enumerate(r['original_blocks']):
+            result += f"  P{i} = {block:04X}\n"
+        
+        result += f"\n篡改后明文: {r['tampered_plaintext']}\n"
+        result += "篡改后明文块:\n"
+        for i, block in enumerate(r['tampered_blocks']):
+            if i in r['affected']:
+                result += f"  P{i} = {block:04X} ← 受影响\n"
+            else:
                 result += f"  P{i} = {block:04X}\n"
-            
-            result += f"\n篡改后明文: {tampered_plaintext}\n"
-            result += f"篡改后明文块:\n"
-            for i, block in enumerate(tampered_plaintext_blocks):
-                if block != original_plaintext_blocks[i]:
-                    result += f"  P{i} = {block:04X} ← 受影响\n"
-                else:
-                    result += f"  P{i} = {block:04X}\n"
-            
-            result += f"\n分析：\n"
-            result += f"篡改C0影响了P0和P1的解密结果\n"
-            result += f"这展示了CBC模式的错误传播特性\n"
-            
-            self.cbc_result.delete(1.0, tk.END)
-            self.cbc_result.insert(tk.END, result)
-            
-        except Exception as e:
-            messagebox.showerror("错误", f"篡改测试失败: {str(e)}")
+        
+        result += "\n分析：\n"
+        result += "篡改C0影响了P0和P1的解密结果\n"
+        result += "这展示了CBC模式的错误传播特性\n"
+        
+        self.cbc_result.delete(1.0, tk.END)
+        self.cbc_result.insert(tk.END, result)
     
     def cbc_clear(self):
         """清空CBC界面"""
+        self.cancel_job('cbc')
         self.cbc_plaintext.delete(1.0, tk.END)
         self.cbc_key.delete(0, tk.END)
         self.cbc_iv.delete(0, tk.END)
@@ -1348,7 +1556,7 @@ class SAESGUI:
 def main():
     """主函数"""
     root = tk.Tk()
-    app = SAESGUI(root)
+    SAESGUI(root)
     root.mainloop()
 
 
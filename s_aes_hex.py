@@ -0,0 +1,131 @@
+"""
+S-AES 16进制文本编解码
+在“空白分隔的16进制块文本”、原始字节（大端序）和16位块数组之间批量转换：
+格式化用 bytes.hex，解析用 bytes.fromhex，都在C层完成，不逐块调用 int()/format；
+解析是严格的（每块1~4个16进制数字），出错时指出第几个块和在文本中的字符位置
+"""
+
+import re
+import sys
+from array import array
+
+_TOKEN = re.compile(r'\S+')
+_VALID_BLOCK = re.compile(r'[0-9A-Fa-f]{1,4}\Z')
+
+
+class HexParseError(ValueError):
+    """
+    16进制块解析错误
+    index: 出错的块序号（从0开始，含start_index偏移）
+    token: 出错的文本
+    offset: 出错文本在输入中的字符位置
+    """
+
+    def __init__(self, index, token, offset):
+        self.index = index
+        self.token = token
+        self.offset = offset
+        super().__init__(f"第{index + 1}个块（位置{offset}）不是有效的16位16进制数: {token!r}")
+
+
+def bytes_to_blocks(data):
+    """大端序字节（长度为偶数）转为16位块数组"""
+    blocks = array('H')
+    blocks.frombytes(data)
+    if sys.byteorder == 'little':
+        blocks.byteswap()
+    return blocks
+
+
+def blocks_to_bytes(blocks):
+    """16位块数组转为大端序字节"""
+    data = blocks if isinstance(blocks, array) and blocks.typecode == 'H' else array('H', blocks)
+    if sys.byteorder == 'little':
+        data = array('H', data)
+        data.byteswap()
+    return data.tobytes()
+
+
+def format_blocks(blocks, per_line=None):
+    """
+    块序列格式化为大写16进制文本，块之间以空格分隔
+    per_line: 每行的块数，None表示不换行
+    """
+    data = blocks_to_bytes(blocks)
+    if per_line is None:
+        return data.hex(' ', 2).upper()
+    step = 2 * per_line
+    return '\n'.join([data[i:i + step].hex(' ', 2).upper() for i in range(0, len(data), step)])
+
+
+def _locate_error(text, start_index):
+    """逐块检查，找出第一个无效的块并抛出HexParseError"""
+    for i, match in enumerate(_TOKEN.finditer(text)):
+        if not _VALID_BLOCK.match(match.group()):
+            raise HexParseError(start_index + i, match.group(), match.start())
+
+
+def parse_blocks(text, start_index=0):
+    """
+    解析空白分隔的16进制块文本，返回array('H')
+    每块1~4个16进制数字；start_index 用于分段解析时让错误中的块序号从整体计数
+    """
+    # 最常见的规范格式（每块4位、块之间单个空白字符，如format_blocks的输出）：
+    # 长度为5n-1、每隔5个字符是空白，且 bytes.fromhex 恰好得到2n个字节，则无需拆分
+    stripped = text.strip()
+    n = (len(stripped) + 1) // 5
+    if n and len(stripped) == 5 * n - 1 and (n == 1 or stripped[4::5].isspace()):
+        try:
+            data = bytes.fromhex(stripped)
+        except ValueError:
+            data = b''
+        if len(data) == 2 * n:
+            return bytes_to_blocks(data)
+
+    tokens = text.split()
+    if not tokens:
+        return array('H')
+    lengths = set(map(len, tokens))
+    if lengths == {4}:
+        # 常见情况：全部为4位，拼接后一次 bytes.fromhex
+        try:
+            return bytes_to_blocks(bytes.fromhex(''.join(tokens)))
+        except ValueError:
+            _locate_error(text, start_index)
+    _locate_error(text, start_index)
+    return array('H', [int(token, 16) for token in tokens])
+
+
+def strip_zero_low_bytes(data):
+    """
+    去掉大端序块字节（长度为偶数）中每个块为0的低字节，与 SAES.blocks_to_string 的规则一致
+    """
+    if b'\0' not in data[1::2]:
+        return data
+    return bytes([b for i, b in enumerate(data) if b or not i & 1])
+
+
+def format_bytes(data, sep=''):
+    """原始字节格式化为大写16进制文本"""
+    return data.hex(sep).upper() if sep else data.hex().upper()
+
+
+def parse_bytes(text):
+    """
+    解析16进制字节文本（允许字节之间有空白），返回bytes
+    出错时抛出HexParseError，index为出错的字节序号
+    """
+    try:
+        return bytes.fromhex(text)
+    except ValueError:
+        pass
+    digits = 0
+    for match in _TOKEN.finditer(text):
+        token = match.group()
+        for k, char in enumerate(token):
+            if char not in '0123456789abcdefABCDEF':
+                raise HexParseError(digits // 2, token, match.start() + k)
+            digits += 1
+        if len(token) % 2:
+            raise HexParseError(digits // 2, token, match.start())
+    raise HexParseError(digits // 2, '', len(text))
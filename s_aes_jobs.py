@@ -0,0 +1,183 @@
+"""
+S-AES 批处理运行器
+从JSON或CSV任务文件读取大量操作（操作名见 s_aes_ops.OPERATIONS），
+并行执行后把结果写成JSON或CSV，可在CI或服务器上无界面运行
+
+任务文件格式：
+- JSON：任务对象列表，或 {"jobs": [...]}；每个任务形如
+  {"id": "t1", "op": "basic_encrypt", "plaintext": "1234", "key": "5678"}
+- CSV：首行为列名，必须有op列，其余列为参数，空单元格表示不提供
+
+用法：
+    python s_aes_jobs.py jobs.json -o results.json [-w 工作进程数]
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from s_aes_hex import format_blocks
+from s_aes_ops import OPERATIONS, OperationError, SAESOperations
+
+# 中间相遇攻击结果中最多输出的候选密钥对数（可用任务字段limit覆盖）
+DEFAULT_CANDIDATE_LIMIT = 100
+
+_worker_ops = None
+
+
+def load_jobs(path):
+    """按扩展名读取JSON或CSV任务文件，返回任务字典列表"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if path.lower().endswith('.csv'):
+            jobs = [{k: v for k, v in row.items() if k and v not in (None, '')}
+                    for row in csv.DictReader(f)]
+        else:
+            data = json.load(f)
+            jobs = data.get('jobs', []) if isinstance(data, dict) else data
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise ValueError("任务文件应为任务对象列表")
+    return jobs
+
+
+def _format_value(value):
+    """结果中的整数按4位16进制输出，块序列输出为空格分隔的16进制串"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return f"{value:04X}"
+    if isinstance(value, (list, tuple)) and all(isinstance(v, int) for v in value):
+        return format_blocks(value)
+    return value
+
+
+def format_result(op, result, limit=DEFAULT_CANDIDATE_LIMIT):
+    """把操作结果转为可写入JSON/CSV的字典"""
+    output = {}
+    for name, value in result.items():
+        if name == 'candidates':
+            output[name] = ' '.join(f"{k1:04X}{k2:04X}" for k1, k2 in value[:limit])
+        elif name in ('count', 'index'):
+            output[name] = value
+        elif name == 'affected':
+            output[name] = ' '.join(str(i) for i in value)
+        else:
+            output[name] = _format_value(value)
+    return output
+
+
+def run_job(job, ops=None, index=0):
+    """
+    执行单个任务，返回结果记录：
+    {'id', 'op', 'ok', 'result' 或 'error', 'seconds'}
+    """
+    ops = ops if ops is not None else SAESOperations()
+    job_id = job.get('id', index)
+    op = job.get('op')
+    start = time.perf_counter()
+    record = {'id': job_id, 'op': op}
+    try:
+        params = {k: v for k, v in job.items() if k not in ('id', 'op', 'limit')}
+        # 部分操作（如中间相遇攻击）会打印进度，转到标准错误，避免混入标准输出的结果
+        with contextlib.redirect_stdout(sys.stderr):
+            result = ops.run(op, params)
+        limit = int(job.get('limit', DEFAULT_CANDIDATE_LIMIT))
+        record['ok'] = True
+        record['result'] = format_result(op, result, limit)
+    except (OperationError, ValueError, TypeError) as e:
+        record['ok'] = False
+        record['error'] = str(e)
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+
+def _init_worker():
+    global _worker_ops
+    _worker_ops = SAESOperations()
+
+
+def _run_indexed(item):
+    index, job = item
+    return run_job(job, _worker_ops, index)
+
+
+def run_jobs(jobs, workers=None, progress=None):
+    """
+    并行执行任务列表，结果与任务顺序一致
+    workers: 工作进程数，默认为CPU核数；为1或任务很少时在当前进程中顺序执行
+    progress(已完成数, 总数): 可选进度回调
+    """
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    items = list(enumerate(jobs))
+    results = []
+    if workers <= 1 or len(items) <= 1:
+        ops = SAESOperations()
+        for index, job in items:
+            results.append(run_job(job, ops, index))
+            if progress is not None:
+                progress(len(results), len(items))
+        return results
+    # 每个工作进程只构造一次SAESOperations；分批提交减少进程间通信次数
+    chunksize = max(1, len(items) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        for record in executor.map(_run_indexed, items, chunksize=chunksize):
+            results.append(record)
+            if progress is not None:
+                progress(len(results), len(items))
+    return results
+
+
+def write_results(results, path):
+    """按扩展名把结果写成JSON或CSV（CSV中结果字段展开为列）"""
+    if path.lower().endswith('.csv'):
+        columns = ['id', 'op', 'ok', 'error', 'seconds']
+        for record in results:
+            for name in record.get('result', {}):
+                if name not in columns:
+                    columns.append(name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            for record in results:
+                row = {k: v for k, v in record.items() if k != 'result'}
+                row.update(record.get('result', {}))
+                writer.writerow(row)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="S-AES 批处理运行器")
+    parser.add_argument('jobs', nargs='?', help="任务文件（.json 或 .csv）")
+    parser.add_argument('-o', '--output', help="结果文件（.json 或 .csv），默认输出JSON到标准输出")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="工作进程数，默认为CPU核数")
+    parser.add_argument('--list-ops', action='store_true', help="列出支持的操作及参数")
+    args = parser.parse_args(argv)
+
+    if args.list_ops:
+        for op, params in OPERATIONS.items():
+            names = ', '.join(name if required else f"[{name}]" for name, _, _, required in params)
+            print(f"{op}: {names}")
+        return 0
+    if not args.jobs:
+        parser.error("需要指定任务文件")
+
+    jobs = load_jobs(args.jobs)
+    start = time.perf_counter()
+    results = run_jobs(jobs, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    if args.output:
+        write_results(results, args.output)
+    else:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    failed = sum(1 for record in results if not record['ok'])
+    print(f"完成 {len(results)} 个任务，失败 {failed} 个，耗时 {elapsed:.2f} 秒", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""
+S-AES 消息认证
+CMAC（基于S-AES的OMAC1）以及“先加密后认证”（Encrypt-then-MAC）模式：
+加密和计算标签在同一遍扫描中完成，数据只读一次；另提供多条消息的批量验证和吞吐量对比
+
+CMAC按NIST SP 800-38B的构造缩到16位分组：
+    L = E_K(0)，K1 = dbl(L)，K2 = dbl(K1)，dbl为GF(2^16)上乘x，约化多项式 x^16+x^5+x^3+x^2+1
+    最后一个块完整时与K1异或，否则补 0x80 0x00... 后与K2异或
+注意标签只有16位，伪造成功概率为2^-16，只适合教学演示
+
+Encrypt-then-MAC：认证的数据为 IV块（ECB为0）|| 全部密文块，加密密钥和认证密钥必须不同；
+明文按PKCS#7填充（见 s_aes_stream），密文块数和最后一块的填充值一起确定明文长度，
+标签覆盖全部密文，因此也认证了明文长度，以0字节结尾的明文同样能原样还原
+"""
+
+import hmac
+import time
+from array import array
+from functools import lru_cache
+from s_aes_batch import get_batch_engine
+from s_aes_hex import blocks_to_bytes, bytes_to_blocks
+from s_aes_stream import StreamDecryptor, StreamEncryptor
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# GF(2^16) 约化多项式 x^16 + x^5 + x^3 + x^2 + 1 的低16位
+RB = 0x002D
+
+# 一次处理的块数（或批量验证的总块数）达到该值时，先构建密钥的完整码本，每块只需一次查表
+CODEBOOK_THRESHOLD = 0x4000
+
+
+class AuthenticationError(ValueError):
+    """认证标签不匹配"""
+
+
+def _double(value):
+    """GF(2^16)上乘x"""
+    value <<= 1
+    if value & 0x10000:
+        value ^= 0x10000 | RB
+    return value
+
+
+def cmac_subkeys(key):
+    """返回CMAC子密钥 (K1, K2)"""
+    k1 = _double(get_batch_engine().encrypt_block(0, key))
+    return k1, _double(k1)
+
+
+def _final_block(data, subkeys):
+    """最后一个块（1~2字节或空）按CMAC规则填充并与子密钥异或"""
+    k1, k2 = subkeys
+    if len(data) == 2:
+        return ((data[0] << 8) | data[1]) ^ k1
+    if len(data) == 1:
+        return ((data[0] << 8) | 0x80) ^ k2
+    return 0x8000 ^ k2
+
+
+@lru_cache(maxsize=8)
+def _codebook(key):
+    """密钥的完整加密码本（array('H')，下标为明文块），按密钥缓存"""
+    codebook = get_batch_engine().codebook(key)
+    return codebook if isinstance(codebook, array) else array('H', codebook.tobytes())
+
+
+def _tags_equal(a, b):
+    return hmac.compare_digest((a & 0xFFFF).to_bytes(2, 'big'), (b & 0xFFFF).to_bytes(2, 'big'))
+
+
+class CMAC:
+    """
+    流式CMAC
+    update(data) 可多次调用；最后1~2个字节留到 digest() 时按最后一个块处理
+    """
+
+    def __init__(self, key):
+        engine = get_batch_engine()
+        self.key = key & 0xFFFF
+        self._t1, self._t2 = engine.enc_round1, engine.enc_round2
+        self._round_keys = engine.expand_key(self.key)
+        self._subkeys = cmac_subkeys(self.key)
+        self._state = 0
+        self._pending = b''
+
+    def _absorb(self, blocks):
+        state = self._state
+        if len(blocks) >= CODEBOOK_THRESHOLD:
+            codebook = _codebook(self.key)
+            for block in blocks:
+                state = codebook[state ^ block]
+        else:
+            t1, t2 = self._t1, self._t2
+            k0, k1, k2 = self._round_keys
+            for block in blocks:
+                state = t2[t1[state ^ block ^ k0] ^ k1] ^ k2
+        self._state = state
+
+    def update(self, data):
+        data = self._pending + bytes(data)
+        # 保留最后一个（可能不完整的）块，直到确定它是消息的最后一块
+        keep = 2 - len(data) % 2 if data else 0
+        usable = len(data) - keep
+        self._absorb(bytes_to_blocks(data[:usable]))
+        self._pending = data[usable:]
+        return self
+
+    def digest(self):
+        """返回16位标签（不影响继续update）"""
+        t1, t2 = self._t1, self._t2
+        k0, k1, k2 = self._round_keys
+        last = _final_block(self._pending, self._subkeys)
+        return t2[t1[self._state ^ last ^ k0] ^ k1] ^ k2
+
+    def verify(self, tag):
+        """标签是否匹配（常量时间比较）"""
+        return _tags_equal(self.digest(), tag)
+
+
+def cmac(data, key):
+    """计算字节串的CMAC标签"""
+    return CMAC(key).update(data).digest()
+
+
+# ============== 先加密后认证 ==============
+
+class AuthenticatedEncryptor(StreamEncryptor):
+    """
+    Encrypt-then-MAC 流式加密器
+    用法与StreamEncryptor相同（固定使用PKCS#7填充）；finalize() 之后 tag 为认证标签
+    CBC模式下加密链和认证链在同一个循环里推进：前一个密文块既是加密的链接值，
+    也是认证链待吸收的块；ECB模式先批量加密本段，再把密文送入认证链
+    """
+
+    def __init__(self, key, mac_key, mode='cbc', iv=None):
+        super().__init__(key, mode, iv, 'pkcs7')
+        if (mac_key & 0xFFFF) == self.key:
+            raise ValueError("认证密钥不能与加密密钥相同")
+        engine = get_batch_engine()
+        self.mac_key = mac_key & 0xFFFF
+        self._mac_keys = engine.expand_key(self.mac_key)
+        self._mac_subkeys = cmac_subkeys(self.mac_key)
+        self._mac_state = 0
+        # 认证链中尚未吸收的最后一个块（最后一块需与子密钥异或），初始为IV块
+        self._held = iv if mode == 'cbc' else 0
+        self.tag = None
+
+    def _encrypt(self, blocks):
+        engine = get_batch_engine()
+        t1, t2 = engine.enc_round1, engine.enc_round2
+        m0, m1, m2 = self._mac_keys
+        mac, held = self._mac_state, self._held
+        # 大段数据改用完整码本，两条链每块各一次查表
+        use_codebook = len(blocks) >= CODEBOOK_THRESHOLD
+        mac_codebook = _codebook(self.mac_key) if use_codebook else None
+        if self.mode == 'cbc':
+            result = array('H', bytes(2 * len(blocks)))
+            if use_codebook:
+                codebook = _codebook(self.key)
+                for i, block in enumerate(blocks):
+                    mac = mac_codebook[mac ^ held]
+                    held = codebook[block ^ held]
+                    result[i] = held
+            else:
+                k0, k1, k2 = engine.expand_key(self.key)
+                for i, block in enumerate(blocks):
+                    mac = t2[t1[mac ^ held ^ m0] ^ m1] ^ m2
+                    held = t2[t1[block ^ held ^ k0] ^ k1] ^ k2
+                    result[i] = held
+            self.previous = held
+            self.blocks_done += len(blocks)
+        else:
+            result = super()._encrypt(blocks)
+            if len(result):
+                # 吸收上一段留下的块和本段除最后一块外的密文，本段最后一块留作待吸收块
+                pending = array('H', [held]) + result[:-1]
+                if use_codebook:
+                    for block in pending:
+                        mac = mac_codebook[mac ^ block]
+                else:
+                    for block in pending:
+                        mac = t2[t1[mac ^ block ^ m0] ^ m1] ^ m2
+                held = result[-1]
+        self._mac_state, self._held = mac, held
+        return result
+
+    def finalize(self):
+        tail = super().finalize()
+        engine = get_batch_engine()
+        m0, m1, m2 = self._mac_keys
+        last = self._held ^ self._mac_subkeys[0]
+        self.tag = engine.enc_round2[engine.enc_round1[self._mac_state ^ last ^ m0] ^ m1] ^ m2
+        return tail
+
+
+def _authenticated_bytes(blocks, mode, iv):
+    """Encrypt-then-MAC中被认证的字节：IV块 || 密文"""
+    return (iv if mode == 'cbc' else 0).to_bytes(2, 'big') + blocks_to_bytes(blocks)
+
+
+def ciphertext_tag(blocks, mac_key, mode='cbc', iv=None):
+    """计算密文块（连同IV）的认证标签"""
+    return cmac(_authenticated_bytes(blocks, mode, iv), mac_key)
+
+
+def seal(data, key, mac_key, mode='cbc', iv=None):
+    """加密并认证字节串，返回 (密文块array('H'), 标签)"""
+    encryptor = AuthenticatedEncryptor(key, mac_key, mode, iv)
+    blocks = encryptor.update(data)
+    blocks.extend(encryptor.finalize())
+    return blocks, encryptor.tag
+
+
+def open_sealed(blocks, tag, key, mac_key, mode='cbc', iv=None):
+    """
+    先验证标签再解密，返回明文字节
+    标签不匹配时抛出AuthenticationError，不输出任何明文；
+    标签正确但填充无效（加密密钥不对）时抛出ValueError
+    """
+    blocks = blocks if isinstance(blocks, array) and blocks.typecode == 'H' else array('H', blocks)
+    if not _tags_equal(ciphertext_tag(blocks, mac_key, mode, iv), tag):
+        raise AuthenticationError("认证失败：密文或标签已被篡改")
+    decryptor = StreamDecryptor(key, mode, iv, 'pkcs7')
+    return decryptor.update(blocks) + decryptor.finalize()
+
+
+# ============== 批量验证 ==============
+
+def cmac_batch(messages, key):
+    """
+    批量计算多条消息的CMAC标签，返回标签列表
+    总块数较多时改用完整码本；安装NumPy时把块数相同的消息排成矩阵，按列同时推进所有认证链
+    """
+    messages = [bytes(m) for m in messages]
+    total = sum(len(m) for m in messages) // 2
+    if total < CODEBOOK_THRESHOLD:
+        return [cmac(m, key) for m in messages]
+
+    engine = get_batch_engine()
+    subkeys = cmac_subkeys(key)
+    codebook = engine.codebook(key)
+    # 每条消息拆成“前面的完整块”和“已填充并与子密钥异或的最后一块”，按前者的块数分组
+    parts = []
+    groups = {}
+    for index, message in enumerate(messages):
+        cut = len(message) - (2 - len(message) % 2 if message else 0)
+        parts.append((message[:cut], _final_block(message[cut:], subkeys)))
+        groups.setdefault(cut // 2, []).append(index)
+
+    tags = [0] * len(messages)
+    for width, indices in groups.items():
+        if engine.use_numpy and len(indices) > 1:
+            body = b''.join(parts[i][0] for i in indices)
+            matrix = np.frombuffer(body, dtype='>u2').reshape(len(indices), width).astype(np.uint16)
+            state = np.zeros(len(indices), dtype=np.uint16)
+            for column in range(width):
+                state = codebook[state ^ matrix[:, column]]
+            last = np.array([parts[i][1] for i in indices], dtype=np.uint16)
+            for i, tag in zip(indices, codebook[state ^ last].tolist()):
+                tags[i] = tag
+        else:
+            for i in indices:
+                body, last = parts[i]
+                state = 0
+                for block in bytes_to_blocks(body):
+                    state = codebook[state ^ block]
+                tags[i] = int(codebook[state ^ last])
+    return tags
+
+
+def verify_batch(messages, tags, key):
+    """批量验证CMAC标签，返回与消息一一对应的布尔值列表"""
+    tags = list(tags)
+    if len(tags) != len(messages):
+        raise ValueError("消息数与标签数不一致")
+    return [_tags_equal(a, b) for a, b in zip(cmac_batch(messages, key), tags)]
+
+
+def verify_sealed_batch(records, mac_key, mode='cbc'):
+    """
+    批量验证Encrypt-then-MAC密文
+    records: (密文块, IV, 标签) 序列，ECB模式下IV可为None
+    """
+    records = list(records)
+    messages = [_authenticated_bytes(blocks, mode, iv) for blocks, iv, _ in records]
+    return verify_batch(messages, [tag for _, _, tag in records], mac_key)
+
+
+# ============== 性能对比 ==============
+
+def benchmark_encrypt_then_mac(size=1 << 20, mode='cbc', key=0x2D55, mac_key=0x1A2B, iv=0x0F0F, repeat=3):
+    """
+    对比单遍“加密+认证”与两遍（先加密、再对密文计算CMAC）的耗时
+    每种方法运行repeat次取最短时间；返回包含两种方法耗时、吞吐量（MB/s）和加速比的字典
+    """
+    import os
+    data = os.urandom(size)
+
+    def single_pass():
+        return seal(data, key, mac_key, mode, iv)
+
+    def two_pass():
+        encryptor = StreamEncryptor(key, mode, iv, 'pkcs7')
+        blocks = encryptor.update(data)
+        blocks.extend(encryptor.finalize())
+        return blocks, ciphertext_tag(blocks, mac_key, mode, iv)
+
+    def measure(func):
+        best, result = float('inf'), None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    # 排除一次性建表开销（轮函数表、码本、各引擎的按密钥缓存）
+    seal(data[:64], key, mac_key, mode, iv)
+    _codebook(key)
+    _codebook(mac_key)
+    single_time, (blocks, tag) = measure(single_pass)
+    two_pass_time, (two_pass_blocks, two_pass_tag) = measure(two_pass)
+
+    if two_pass_blocks != blocks or two_pass_tag != tag:
+        raise AssertionError("单遍与两遍的结果不一致")
+    megabytes = size / (1 << 20)
+    return {
+        'size': size,
+        'mode': mode,
+        'tag': tag,
+        'single_pass_time': single_time,
+        'two_pass_time': two_pass_time,
+        'single_pass_mbps': megabytes / single_time if single_time > 0 else float('inf'),
+        'two_pass_mbps': megabytes / two_pass_time if two_pass_time > 0 else float('inf'),
+        'speedup': two_pass_time / single_time if single_time > 0 else float('inf'),
+    }
@@ -0,0 +1,262 @@
+"""
+S-AES 多密钥批量加解密
+大量小消息各用不同的16位密钥加密时，不再逐条调用 encrypt_ascii/cbc_encrypt
+（每次都重新扩展密钥、逐块循环）：把一批 (密钥, IV, 数据) 记录的全部块拼接起来，
+按密钥分组批量扩展密钥，再一次向量化运算处理所有块，结果按输入顺序返回
+
+    ECB加密/解密、CBC解密：所有块互相独立，整批一次查表
+    CBC加密：同一条消息内是链式的，但不同消息互相独立——按消息长度从长到短排序后
+             逐列推进，每一步同时处理所有尚未结束的消息；剩下的消息很少时改为逐条查表
+未安装NumPy时按密钥分组：同一密钥的块拼接后一起加解密（块多时交给批量引擎），
+每个密钥只扩展一次
+"""
+
+import time
+from array import array
+from s_aes_batch import get_batch_engine
+from s_aes_hex import bytes_to_blocks
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MODES = ('ecb', 'cbc')
+
+# CBC加密逐列推进时，尚未结束的消息少于该数后改为逐条查表完成
+CBC_TAIL_ROWS = 32
+
+# 纯Python路径中同一密钥的块数达到该值才交给批量引擎（其按密钥建表的开销只对大批数据划算），
+# 否则直接用轮函数表逐块计算
+GROUP_ENGINE_BLOCKS = 0x400
+
+
+def _payload_blocks(payload):
+    """
+    记录中的数据转为16位块：字符串按UTF-8编码，字节串奇数长度时末尾补0
+    （与 SAES.string_to_blocks 一致），其余视为块序列
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        data = bytes(payload)
+        return bytes_to_blocks(data + b'\0' if len(data) % 2 else data)
+    if isinstance(payload, array) and payload.typecode == 'H':
+        return payload
+    return array('H', payload)
+
+
+def _prepare(records, mode):
+    if mode not in MODES:
+        raise ValueError(f"不支持的模式: {mode}")
+    keys, ivs, payloads = [], [], []
+    for index, (key, iv, payload) in enumerate(records):
+        if mode == 'cbc' and iv is None:
+            raise ValueError(f"第{index + 1}条记录缺少IV")
+        keys.append(key & 0xFFFF)
+        ivs.append((iv or 0) & 0xFFFF)
+        payloads.append(_payload_blocks(payload))
+    return keys, ivs, payloads
+
+
+# ============== NumPy：整批向量化 ==============
+
+def _flatten(payloads):
+    lengths = np.array([len(blocks) for blocks in payloads], dtype=np.int64)
+    starts = np.zeros(len(payloads), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    flat = np.frombuffer(b''.join(blocks.tobytes() for blocks in payloads), dtype=np.uint16)
+    return flat, lengths, starts
+
+
+def _split(flat, payloads, starts):
+    return [array('H', flat[start:start + len(blocks)].tobytes())
+            for blocks, start in zip(payloads, starts.tolist())]
+
+
+def _numpy_ecb(engine, keys, payloads, decrypt):
+    flat, lengths, starts = _flatten(payloads)
+    schedule = engine.expand_keys(np.repeat(np.array(keys, dtype=np.uint16), lengths))
+    run = engine.decrypt_blocks_keyed if decrypt else engine.encrypt_blocks_keyed
+    return _split(run(flat, schedule), payloads, starts)
+
+
+def _numpy_cbc_decrypt(engine, keys, ivs, payloads):
+    flat, lengths, starts = _flatten(payloads)
+    schedule = engine.expand_keys(np.repeat(np.array(keys, dtype=np.uint16), lengths))
+    # 每个块与前一个密文块异或，消息的第一个块与该消息的IV异或
+    previous = np.empty_like(flat)
+    previous[1:] = flat[:-1]
+    nonempty = lengths > 0
+    previous[starts[nonempty]] = np.array(ivs, dtype=np.uint16)[nonempty]
+    return _split(engine.decrypt_blocks_keyed(flat, schedule) ^ previous, payloads, starts)
+
+
+def _numpy_cbc_encrypt(engine, keys, ivs, payloads):
+    flat, lengths, starts = _flatten(payloads)
+    out = np.empty_like(flat)
+    order = np.argsort(-lengths, kind='stable')
+    row_lengths, row_starts = lengths[order], starts[order]
+    k0, k1, k2 = engine.expand_keys(np.array(keys, dtype=np.uint16)[order])
+    state = np.array(ivs, dtype=np.uint16)[order]
+    ascending = row_lengths[::-1]
+    rows = len(order)
+    column = 0
+    width = int(row_lengths[0]) if rows else 0
+    while column < width:
+        active = rows - int(np.searchsorted(ascending, column, side='right'))
+        if active < CBC_TAIL_ROWS:
+            break
+        index = row_starts[:active] + column
+        value = engine.encrypt_blocks_keyed(flat[index] ^ state[:active],
+                                            (k0[:active], k1[:active], k2[:active]))
+        state[:active] = value
+        out[index] = value
+        column += 1
+
+    # 剩下少数较长的消息逐条查表完成
+    if column < width:
+        t1, t2 = engine.enc_round1, engine.enc_round2
+        active = rows - int(np.searchsorted(ascending, column, side='right'))
+        for row in range(active):
+            start, length = int(row_starts[row]), int(row_lengths[row])
+            rk0, rk1, rk2 = int(k0[row]), int(k1[row]), int(k2[row])
+            previous = int(state[row])
+            tail = flat[start + column:start + length].tolist()
+            for i, block in enumerate(tail):
+                previous = t2[t1[block ^ previous ^ rk0] ^ rk1] ^ rk2
+                tail[i] = previous
+            out[start + column:start + length] = tail
+    return _split(out, payloads, starts)
+
+
+# ============== 纯Python：按密钥分组 ==============
+
+def _group_by_key(keys):
+    groups = {}
+    for index, key in enumerate(keys):
+        groups.setdefault(key, []).append(index)
+    return groups
+
+
+def _grouped_ecb(engine, keys, payloads, decrypt):
+    from s_aes_engine import decrypt_blocks, encrypt_blocks
+    run = decrypt_blocks if decrypt else encrypt_blocks
+    results = [None] * len(payloads)
+    for key, indices in _group_by_key(keys).items():
+        joined = array('H')
+        for index in indices:
+            joined.extend(payloads[index])
+        if len(joined) >= GROUP_ENGINE_BLOCKS:
+            done = array('H', run(joined, key))
+        elif decrypt:
+            done = engine.decrypt_blocks(joined, key)
+        else:
+            done = engine.encrypt_blocks(joined, key)
+        position = 0
+        for index in indices:
+            size = len(payloads[index])
+            results[index] = done[position:position + size]
+            position += size
+    return results
+
+
+def _grouped_cbc_encrypt(engine, keys, ivs, payloads):
+    t1, t2 = engine.enc_round1, engine.enc_round2
+    results = [None] * len(payloads)
+    for key, indices in _group_by_key(keys).items():
+        k0, k1, k2 = engine.expand_key(key)
+        for index in indices:
+            result = array('H', payloads[index])
+            previous = ivs[index]
+            for i, block in enumerate(result):
+                previous = t2[t1[block ^ previous ^ k0] ^ k1] ^ k2
+                result[i] = previous
+            results[index] = result
+    return results
+
+
+def _grouped_cbc_decrypt(engine, keys, ivs, payloads):
+    results = _grouped_ecb(engine, keys, payloads, decrypt=True)
+    for index, decrypted in enumerate(results):
+        previous = ivs[index]
+        for i, block in enumerate(payloads[index]):
+            decrypted[i] ^= previous
+            previous = block
+    return results
+
+
+# ============== 对外接口 ==============
+
+def encrypt_records(records, mode='ecb', engine=None):
+    """
+    批量加密 (密钥, IV, 数据) 记录，返回与输入顺序一致的密文块列表（每项为array('H')）
+    数据可以是字符串（UTF-8，与 encrypt_ascii 相同）、字节串或16位块序列；ECB模式下IV可为None
+    """
+    engine = engine if engine is not None else get_batch_engine()
+    keys, ivs, payloads = _prepare(records, mode)
+    if not payloads:
+        return []
+    if engine.use_numpy:
+        if mode == 'ecb':
+            return _numpy_ecb(engine, keys, payloads, decrypt=False)
+        return _numpy_cbc_encrypt(engine, keys, ivs, payloads)
+    if mode == 'ecb':
+        return _grouped_ecb(engine, keys, payloads, decrypt=False)
+    return _grouped_cbc_encrypt(engine, keys, ivs, payloads)
+
+
+def decrypt_records(records, mode='ecb', engine=None):
+    """
+    批量解密 (密钥, IV, 密文块) 记录，返回与输入顺序一致的明文块列表（每项为array('H')）
+    可用 SAES.blocks_to_string 转回字符串
+    """
+    engine = engine if engine is not None else get_batch_engine()
+    keys, ivs, payloads = _prepare(records, mode)
+    if not payloads:
+        return []
+    if engine.use_numpy:
+        if mode == 'ecb':
+            return _numpy_ecb(engine, keys, payloads, decrypt=True)
+        return _numpy_cbc_decrypt(engine, keys, ivs, payloads)
+    if mode == 'ecb':
+        return _grouped_ecb(engine, keys, payloads, decrypt=True)
+    return _grouped_cbc_decrypt(engine, keys, ivs, payloads)
+
+
+def benchmark_records(n_records=10000, size=16, mode='cbc', seed=None):
+    """
+    对比逐条调用 SAES.encrypt_ascii/cbc_encrypt 与 encrypt_records 的耗时
+    每条记录为size个字符的ASCII字符串，密钥和IV随机
+    返回包含两种方法耗时、每秒记录数和加速比的字典
+    """
+    import random
+    rng = random.Random(seed)
+    engine = get_batch_engine()
+    saes = engine.saes
+    records = [(rng.randint(0, 0xFFFF), rng.randint(0, 0xFFFF),
+                ''.join(chr(rng.randint(32, 126)) for _ in range(size)))
+               for _ in range(n_records)]
+
+    start = time.perf_counter()
+    if mode == 'cbc':
+        expected = [saes.cbc_encrypt(saes.string_to_blocks(text), key, iv) for key, iv, text in records]
+    else:
+        expected = [saes.encrypt_ascii(text, key) for key, _, text in records]
+    naive_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = encrypt_records(records, mode, engine)
+    batch_time = time.perf_counter() - start
+
+    if [list(blocks) for blocks in results] != [list(blocks) for blocks in expected]:
+        raise AssertionError("批量结果与逐条调用不一致")
+    return {
+        'records': n_records,
+        'size': size,
+        'mode': mode,
+        'naive_time': naive_time,
+        'batch_time': batch_time,
+        'records_per_second': n_records / batch_time if batch_time > 0 else float('inf'),
+        'speedup': naive_time / batch_time if batch_time > 0 else float('inf'),
+    }
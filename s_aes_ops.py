@@ -0,0 +1,320 @@
+"""
+S-AES 操作层（与界面无关）
+图形界面中的各项功能（基本加解密、ASCII、双重加密、中间相遇攻击、三重加密、CBC及篡改测试）
+以及认证加密（Encrypt-then-MAC）
+都在这里实现：参数校验、运算和中间结果都不依赖Tk控件，
+图形界面和批处理（s_aes_jobs）共用同一套实现
+"""
+
+import random
+import re
+from s_aes import SAES
+from s_aes_engine import decrypt_blocks, encrypt_blocks
+from s_aes_hex import HexParseError, format_bytes, parse_blocks
+from s_aes_mac import open_sealed, seal
+
+
+_HEX_DIGITS = re.compile(r'[0-9A-Fa-f]+\Z')
+
+
+class OperationError(ValueError):
+    """参数无效等可向用户直接展示的错误"""
+
+
+class MissingInputError(OperationError):
+    """缺少必需的输入"""
+
+
+def parse_hex16(value, name):
+    """
+    解析16位值：可以是整数或16进制字符串
+    为空时抛出MissingInputError，格式或范围无效时抛出OperationError
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        number = value
+    else:
+        text = '' if value is None else str(value).strip()
+        if not text:
+            raise MissingInputError(f"请输入{name}")
+        if not _HEX_DIGITS.match(text):
+            raise OperationError(f"{name}不是有效的16进制数字: {text}")
+        number = int(text, 16)
+    if not 0 <= number <= 0xFFFF:
+        raise OperationError(f"{name}必须是16位（0000-FFFF）")
+    return number
+
+
+def parse_hex_blocks(value, name):
+    """解析16进制块序列：空白分隔的字符串（每块1~4个16进制数字），或整数/字符串组成的列表"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        raise MissingInputError(f"请输入{name}")
+    if isinstance(value, str):
+        try:
+            return list(parse_blocks(value))
+        except HexParseError as e:
+            raise OperationError(f"{name}的第{e.index + 1}个块（位置{e.offset}）"
+                                 f"不是有效的16位16进制数: {e.token}")
+    parts = list(value)
+    if not parts:
+        raise MissingInputError(f"请输入{name}")
+    blocks = []
+    for index, part in enumerate(parts):
+        try:
+            blocks.append(parse_hex16(part, name))
+        except OperationError:
+            raise OperationError(f"{name}的第{index + 1}个块不是有效的16位16进制数: {part}")
+    return blocks
+
+
+def parse_text(value, name):
+    """解析非空字符串（去掉首尾空白，与界面行为一致）"""
+    text = '' if value is None else str(value).strip()
+    if not text:
+        raise MissingInputError(f"请输入{name}")
+    return text
+
+
+# 各操作的参数：(参数名, 类型, 显示名, 是否必需)
+# 类型：'hex16' 16位值，'blocks' 16进制块序列，'text' 字符串，'int' 十进制整数
+OPERATIONS = {
+    'basic_encrypt': (('plaintext', 'hex16', '明文', True), ('key', 'hex16', '密钥', True)),
+    'basic_decrypt': (('ciphertext', 'hex16', '密文', True), ('key', 'hex16', '密钥', True)),
+    'ascii_encrypt': (('plaintext', 'text', '明文', True), ('key', 'hex16', '密钥', True)),
+    'ascii_decrypt': (('ciphertext', 'blocks', '密文', True), ('key', 'hex16', '密钥', True)),
+    'double_encrypt': (('plaintext', 'hex16', '明文', True), ('key1', 'hex16', '密钥K1', True),
+                       ('key2', 'hex16', '密钥K2', True)),
+    'double_decrypt': (('ciphertext', 'hex16', '密文', True), ('key1', 'hex16', '密钥K1', True),
+                       ('key2', 'hex16', '密钥K2', True)),
+    'mitm_generate': (('seed', 'int', '随机种子', False),),
+    'mitm_attack': (('plaintext', 'hex16', '明文', True), ('ciphertext', 'hex16', '密文', True)),
+    'triple_encrypt': (('plaintext', 'hex16', '明文', True), ('key1', 'hex16', '密钥K1', True),
+                       ('key2', 'hex16', '密钥K2', True), ('key3', 'hex16', '密钥K3', False)),
+    'triple_decrypt': (('ciphertext', 'hex16', '密文', True), ('key1', 'hex16', '密钥K1', True),
+                       ('key2', 'hex16', '密钥K2', True), ('key3', 'hex16', '密钥K3', False)),
+    'cbc_encrypt': (('plaintext', 'text', '明文', True), ('key', 'hex16', '密钥', True),
+                    ('iv', 'hex16', '初始向量IV', True)),
+    'cbc_decrypt': (('ciphertext', 'blocks', '密文', True), ('key', 'hex16', '密钥', True),
+                    ('iv', 'hex16', '初始向量IV', True)),
+    'cbc_tamper_test': (('ciphertext', 'blocks', '密文', True), ('key', 'hex16', '密钥', True),
+                        ('iv', 'hex16', '初始向量IV', True), ('index', 'int', '篡改块序号', False),
+                        ('mask', 'hex16', '翻转位掩码', False)),
+    'etm_encrypt': (('plaintext', 'text', '明文', True), ('key', 'hex16', '密钥', True),
+                    ('mac_key', 'hex16', '认证密钥', True), ('iv', 'hex16', '初始向量IV', True)),
+    'etm_decrypt': (('ciphertext', 'blocks', '密文', True), ('key', 'hex16', '密钥', True),
+                    ('mac_key', 'hex16', '认证密钥', True), ('iv', 'hex16', '初始向量IV', True),
+                    ('tag', 'hex16', '认证标签', True)),
+}
+
+_PARSERS = {
+    'hex16': parse_hex16,
+    'blocks': parse_hex_blocks,
+    'text': parse_text,
+}
+
+
+def _parse_int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise OperationError(f"{name}必须是整数: {value}")
+
+
+def parse_params(op, params):
+    """按OPERATIONS中的定义解析参数字典；可选参数为空时不传"""
+    if op not in OPERATIONS:
+        raise OperationError(f"不支持的操作: {op}")
+    parsed = {}
+    for param, kind, label, required in OPERATIONS[op]:
+        value = params.get(param)
+        if not required and (value is None or (isinstance(value, str) and not value.strip())):
+            continue
+        parser = _PARSERS.get(kind, _parse_int)
+        parsed[param] = parser(value, label)
+    return parsed
+
+
+class SAESOperations:
+    """
+    S-AES 各项功能的无界面实现
+    方法参数为已解析的数值（也接受16进制字符串），返回包含结果和中间值的字典
+    """
+
+    def __init__(self, saes=None):
+        self.saes = saes if saes is not None else SAES()
+
+    def run(self, op, params):
+        """按操作名执行，params为未解析的参数字典（如批处理任务中的字段）"""
+        parsed = parse_params(op, params)
+        return getattr(self, op)(**parsed)
+
+    # ============== 基本加解密 ==============
+
+    def basic_encrypt(self, plaintext, key):
+        plaintext, key = parse_hex16(plaintext, '明文'), parse_hex16(key, '密钥')
+        return {'plaintext': plaintext, 'key': key,
+                'ciphertext': self.saes.encrypt(plaintext, key)}
+
+    def basic_decrypt(self, ciphertext, key):
+        ciphertext, key = parse_hex16(ciphertext, '密文'), parse_hex16(key, '密钥')
+        return {'ciphertext': ciphertext, 'key': key,
+                'plaintext': self.saes.decrypt(ciphertext, key)}
+
+    # ============== ASCII字符串加解密 ==============
+
+    # ASCII加解密与 SAES.encrypt_ascii/decrypt_ascii 结果相同，但经引擎注册表批量运算
+    # （大段文本首次处理时会做一次引擎基准测试，见 s_aes_engine）
+
+    def ascii_encrypt(self, plaintext, key):
+        plaintext, key = parse_text(plaintext, '明文'), parse_hex16(key, '密钥')
+        blocks = encrypt_blocks(self.saes.string_to_blocks(plaintext), key)
+        return {'plaintext': plaintext, 'key': key, 'ciphertext': list(blocks)}
+
+    def ascii_decrypt(self, ciphertext, key):
+        ciphertext, key = parse_hex_blocks(ciphertext, '密文'), parse_hex16(key, '密钥')
+        blocks = decrypt_blocks(ciphertext, key)
+        return {'ciphertext': ciphertext, 'key': key,
+                'plaintext': self.saes.blocks_to_string(blocks)}
+
+    # ============== 双重加密 ==============
+
+    def double_encrypt(self, plaintext, key1, key2):
+        plaintext = parse_hex16(plaintext, '明文')
+        key1, key2 = parse_hex16(key1, '密钥K1'), parse_hex16(key2, '密钥K2')
+        return {'plaintext': plaintext, 'key1': key1, 'key2': key2,
+                'middle': self.saes.encrypt(plaintext, key1),
+                'ciphertext': self.saes.double_encrypt(plaintext, key1, key2)}
+
+    def double_decrypt(self, ciphertext, key1, key2):
+        ciphertext = parse_hex16(ciphertext, '密文')
+        key1, key2 = parse_hex16(key1, '密钥K1'), parse_hex16(key2, '密钥K2')
+        return {'ciphertext': ciphertext, 'key1': key1, 'key2': key2,
+                'middle': self.saes.decrypt(ciphertext, key2),
+                'plaintext': self.saes.double_decrypt(ciphertext, key1, key2)}
+
+    # ============== 中间相遇攻击 ==============
+
+    def mitm_generate(self, seed=None):
+        """随机生成明文和两个密钥，返回双重加密的测试数据"""
+        rng = random.Random(seed) if seed is not None else random
+        plaintext = rng.randint(0, 0xFFFF)
+        key1 = rng.randint(0, 0xFFFF)
+        key2 = rng.randint(0, 0xFFFF)
+        return {'plaintext': plaintext, 'key1': key1, 'key2': key2,
+                'ciphertext': self.saes.double_encrypt(plaintext, key1, key2)}
+
+    def mitm_attack(self, plaintext, ciphertext):
+        """中间相遇攻击，candidates为CandidateKeySet"""
+        plaintext, ciphertext = parse_hex16(plaintext, '明文'), parse_hex16(ciphertext, '密文')
+        candidates = self.saes.meet_in_middle_attack(plaintext, ciphertext)
+        return {'plaintext': plaintext, 'ciphertext': ciphertext,
+                'count': len(candidates), 'candidates': candidates}
+
+    def verify_double_key(self, plaintext, ciphertext, key1, key2):
+        """检查密钥对能否把明文双重加密为密文"""
+        return self.saes.double_encrypt(plaintext, key1, key2) == ciphertext
+
+    # ============== 三重加密 ==============
+
+    def triple_encrypt(self, plaintext, key1, key2, key3=None):
+        """三重加密：不给key3时为32位模式 E_K1(D_K2(E_K1(P)))，否则为48位模式"""
+        plaintext = parse_hex16(plaintext, '明文')
+        key1, key2 = parse_hex16(key1, '密钥K1'), parse_hex16(key2, '密钥K2')
+        temp1 = self.saes.encrypt(plaintext, key1)
+        temp2 = self.saes.decrypt(temp1, key2)
+        result = {'plaintext': plaintext, 'key1': key1, 'key2': key2,
+                  'middle1': temp1, 'middle2': temp2}
+        if key3 is None:
+            result['mode'] = '32bit'
+            result['ciphertext'] = self.saes.triple_encrypt_32bit(plaintext, key1, key2)
+        else:
+            key3 = parse_hex16(key3, '密钥K3')
+            result['mode'] = '48bit'
+            result['key3'] = key3
+            result['ciphertext'] = self.saes.triple_encrypt_48bit(plaintext, key1, key2, key3)
+        return result
+
+    def triple_decrypt(self, ciphertext, key1, key2, key3=None):
+        """三重解密：不给key3时为32位模式，否则为48位模式"""
+        ciphertext = parse_hex16(ciphertext, '密文')
+        key1, key2 = parse_hex16(key1, '密钥K1'), parse_hex16(key2, '密钥K2')
+        result = {'ciphertext': ciphertext, 'key1': key1, 'key2': key2}
+        if key3 is None:
+            result['mode'] = '32bit'
+            result['plaintext'] = self.saes.triple_decrypt_32bit(ciphertext, key1, key2)
+        else:
+            key3 = parse_hex16(key3, '密钥K3')
+            result['mode'] = '48bit'
+            result['key3'] = key3
+            result['plaintext'] = self.saes.triple_decrypt_48bit(ciphertext, key1, key2, key3)
+        return result
+
+    # ============== CBC模式 ==============
+
+    def cbc_encrypt(self, plaintext, key, iv):
+        plaintext = parse_text(plaintext, '明文')
+        key, iv = parse_hex16(key, '密钥'), parse_hex16(iv, '初始向量IV')
+        plaintext_blocks = self.saes.string_to_blocks(plaintext)
+        return {'plaintext': plaintext, 'key': key, 'iv': iv,
+                'plaintext_blocks': plaintext_blocks,
+                'ciphertext': self.saes.cbc_encrypt(plaintext_blocks, key, iv)}
+
+    def cbc_decrypt(self, ciphertext, key, iv):
+        ciphertext = parse_hex_blocks(ciphertext, '密文')
+        key, iv = parse_hex16(key, '密钥'), parse_hex16(iv, '初始向量IV')
+        plaintext_blocks = self.saes.cbc_decrypt(ciphertext, key, iv)
+        return {'ciphertext': ciphertext, 'key': key, 'iv': iv,
+                'plaintext_blocks': plaintext_blocks,
+                'plaintext': self.saes.blocks_to_string(plaintext_blocks)}
+
+    def cbc_tamper_test(self, ciphertext, key, iv, index=0, mask=0x0001):
+        """
+        篡改测试：翻转第index个密文块中mask对应的位，比较篡改前后的解密结果
+        affected为解密结果发生变化的明文块序号
+        """
+        ciphertext = parse_hex_blocks(ciphertext, '密文')
+        key, iv = parse_hex16(key, '密钥'), parse_hex16(iv, '初始向量IV')
+        if len(ciphertext) < 2:
+            raise OperationError("密文块数量不足，请使用更长的明文")
+        if not 0 <= index < len(ciphertext):
+            raise OperationError(f"篡改块序号超出范围: {index}")
+        original_blocks = self.saes.cbc_decrypt(ciphertext, key, iv)
+        tampered = list(ciphertext)
+        tampered[index] ^= mask
+        tampered_blocks = self.saes.cbc_decrypt(tampered, key, iv)
+        return {'ciphertext': ciphertext, 'key': key, 'iv': iv, 'index': index, 'mask': mask,
+                'tampered_ciphertext': tampered,
+                'original_blocks': original_blocks,
+                'original_plaintext': self.saes.blocks_to_string(original_blocks),
+                'tampered_blocks': tampered_blocks,
+                'tampered_plaintext': self.saes.blocks_to_string(tampered_blocks),
+                'affected': [i for i, (a, b) in enumerate(zip(original_blocks, tampered_blocks))
+                             if a != b]}
+
+    # ============== 认证加密（CBC + CMAC，先加密后认证） ==============
+
+    def etm_encrypt(self, plaintext, key, mac_key, iv):
+        """CBC加密并计算密文的CMAC标签（同一遍完成）"""
+        plaintext = parse_text(plaintext, '明文')
+        key, mac_key = parse_hex16(key, '密钥'), parse_hex16(mac_key, '认证密钥')
+        iv = parse_hex16(iv, '初始向量IV')
+        if key == mac_key:
+            raise OperationError("认证密钥不能与加密密钥相同")
+        ciphertext, tag = seal(plaintext.encode('utf-8'), key, mac_key, 'cbc', iv)
+        return {'plaintext': plaintext, 'key': key, 'mac_key': mac_key, 'iv': iv,
+                'ciphertext': list(ciphertext), 'tag': tag}
+
+    def etm_decrypt(self, ciphertext, key, mac_key, iv, tag):
+        """先验证标签，通过后再CBC解密；验证失败或填充无效时抛出OperationError"""
+        ciphertext = parse_hex_blocks(ciphertext, '密文')
+        key, mac_key = parse_hex16(key, '密钥'), parse_hex16(mac_key, '认证密钥')
+        iv, tag = parse_hex16(iv, '初始向量IV'), parse_hex16(tag, '认证标签')
+        try:
+            data = open_sealed(ciphertext, tag, key, mac_key, 'cbc', iv)
+        except ValueError as e:
+            raise OperationError(str(e))
+        try:
+            plaintext = data.decode('utf-8')
+        except UnicodeDecodeError:
+            plaintext = format_bytes(data, ' ')
+        return {'ciphertext': ciphertext, 'key': key, 'mac_key': mac_key, 'iv': iv, 'tag': tag,
+                'verified': True, 'plaintext': plaintext}
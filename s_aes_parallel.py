@@ -0,0 +1,298 @@
+"""
+S-AES 并行批量执行器
+把大数组切分为适合缓存大小的分段，分发给线程、子解释器或进程执行，再按原顺序拼接
+执行方式自动选择：
+- 无GIL（free-threaded）的CPython：线程
+- 支持子解释器池（concurrent.futures.InterpreterPoolExecutor）：子解释器
+- 其他情况：进程
+只有一个CPU、或数据量不足以抵消分发开销（见 MIN_PARALLEL_BLOCKS）时自动改为串行；
+线程/子解释器/进程池在首次使用后保留复用，进程退出时关闭（也可调用 shutdown_executors）
+"""
+
+import atexit
+import concurrent.futures
+import os
+import sys
+import threading
+import time
+from array import array
+from s_aes_batch import get_batch_engine, mode_layers
+from s_aes_shm import SharedBlockBuffer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 每个分段的块数：32768块即64KB数据
+DEFAULT_CHUNK_BLOCKS = 0x8000
+
+# 自动选择时，数据少于该块数就串行执行：分发分段、挂接共享内存和汇总结果的开销
+# 高于多个工作者节省的时间。实测串行纯Python约2.5~6M块/秒、NumPy约50~170M块/秒；
+# 复用进程池的额外开销在纯Python、2^18块时约为串行耗时的1/3，在NumPy、2^22块时与计算本身相当
+# （NumPy几乎只受内存带宽限制），因此NumPy要到更大的数据量才值得并行
+MIN_PARALLEL_BLOCKS = 1 << 18
+MIN_PARALLEL_BLOCKS_NUMPY = 1 << 23
+
+# 可以按分段独立并行的方式；cbc_encrypt 是链式的，只能顺序执行
+PARALLEL_MODES = (
+    'encrypt', 'decrypt',
+    'double_encrypt', 'double_decrypt',
+    'triple_encrypt_32bit', 'triple_decrypt_32bit',
+    'triple_encrypt_48bit', 'triple_decrypt_48bit',
+    'cbc_decrypt',
+)
+
+
+def gil_disabled():
+    """当前解释器是否运行在无GIL模式"""
+    is_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_enabled is not None and not is_enabled()
+
+
+def choose_strategy():
+    """按运行环境选择并行方式：'thread'、'interpreter' 或 'process'"""
+    if gil_disabled():
+        return 'thread'
+    if hasattr(concurrent.futures, 'InterpreterPoolExecutor'):
+        return 'interpreter'
+    return 'process'
+
+
+def parallel_threshold():
+    """自动选择时值得并行的最少块数（取决于批量引擎是否使用NumPy）"""
+    return MIN_PARALLEL_BLOCKS_NUMPY if get_batch_engine().use_numpy else MIN_PARALLEL_BLOCKS
+
+
+def _make_executor(strategy, workers):
+    if strategy == 'thread':
+        return concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    if strategy == 'interpreter':
+        return concurrent.futures.InterpreterPoolExecutor(max_workers=workers)
+    if strategy == 'process':
+        return concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    raise ValueError(f"不支持的并行方式: {strategy}")
+
+
+# 按 (并行方式, 工作者数) 复用的执行器
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(strategy, workers):
+    """取得（必要时创建）可复用的执行器"""
+    with _executors_lock:
+        executor = _executors.get((strategy, workers))
+        if executor is None:
+            executor = _make_executor(strategy, workers)
+            _executors[(strategy, workers)] = executor
+        return executor
+
+
+def _discard_executor(strategy, workers, executor):
+    """执行器损坏（如工作进程异常退出）时不再复用"""
+    with _executors_lock:
+        if _executors.get((strategy, workers)) is executor:
+            del _executors[(strategy, workers)]
+    executor.shutdown(wait=False)
+
+
+def shutdown_executors():
+    """关闭所有复用的执行器"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
+
+
+atexit.register(shutdown_executors)
+
+
+def _run_tasks(strategy, workers, func, tasks):
+    """在复用的执行器上运行任务，按提交顺序返回结果"""
+    executor = _get_executor(strategy, workers)
+    try:
+        futures = [executor.submit(func, *task) for task in tasks]
+        return [future.result() for future in futures]
+    except concurrent.futures.BrokenExecutor:
+        _discard_executor(strategy, workers, executor)
+        raise
+
+
+def _native_blocks(engine, data):
+    """
+    把分段的原始字节转为批量引擎的原生类型：启用NumPy时为uint16数组（零拷贝），否则为array('H')
+    """
+    if engine.use_numpy:
+        return np.frombuffer(data, dtype=np.uint16)
+    blocks = array('H')
+    blocks.frombytes(data)
+    return blocks
+
+
+def _run_chunk(mode, keys, previous, data):
+    """
+    在工作线程/解释器/进程中处理一个分段
+    data为分段的原始字节，返回 (结果字节, 耗时, 工作者标识)
+    previous仅用于cbc_decrypt：该分段前一个密文块（首段为IV）
+    """
+    start = time.perf_counter()
+    engine = get_batch_engine()
+    result = _process_blocks(engine, mode, keys, previous, _native_blocks(engine, data))
+    worker = f"{os.getpid()}:{threading.get_ident()}"
+    return result.tobytes(), time.perf_counter() - start, worker
+
+
+def _run_chunk_shared(mode, keys, previous, in_name, out_name, total, lo, hi):
+    """
+    共享内存版本：按名称挂接输入/输出缓冲区，只读写[lo, hi)区间
+    返回 (耗时, 工作者标识)
+    """
+    start = time.perf_counter()
+    engine = get_batch_engine()
+    with SharedBlockBuffer.attach(in_name, total) as source, \
+            SharedBlockBuffer.attach(out_name, total) as target:
+        _process_shared(engine, mode, keys, previous, source, target, lo, hi)
+    worker = f"{os.getpid()}:{threading.get_ident()}"
+    return time.perf_counter() - start, worker
+
+
+def _process_shared(engine, mode, keys, previous, source, target, lo, hi):
+    """
+    直接在共享内存的[lo, hi)区间上运算：启用NumPy时输入是共享内存上的零拷贝视图，
+    结果按原生格式写回输出缓冲区
+    视图必须在关闭共享内存之前释放
+    """
+    view = source.view[lo:hi]
+    blocks = None
+    try:
+        blocks = np.frombuffer(view, dtype=np.uint16) if engine.use_numpy else array('H', view)
+        target.write(lo, _process_blocks(engine, mode, keys, previous, blocks))
+    finally:
+        blocks = None
+        view.release()
+
+
+def _process_blocks(engine, mode, keys, previous, blocks):
+    """
+    对一个分段执行指定方式的运算
+    blocks为NumPy数组时整段向量化，返回NumPy数组；否则返回array('H')
+    """
+    if mode == 'cbc_decrypt':
+        decrypted = engine.decrypt_blocks(blocks, keys)
+        if engine.use_numpy and isinstance(blocks, np.ndarray):
+            chained = np.empty_like(decrypted)
+            if len(chained):
+                chained[0] = previous
+                chained[1:] = blocks[:-1]
+            return decrypted ^ chained
+        chained = array('H', [previous]) + blocks[:-1]
+        return array('H', [d ^ c for d, c in zip(decrypted, chained)])
+    return engine.cascade_blocks(blocks, mode_layers(mode, keys))
+
+
+def _cbc_encrypt_blocks(engine, blocks, key, iv):
+    """CBC加密是链式的，只能顺序执行：扩展一次密钥后用轮函数表逐块计算"""
+    t1, t2 = engine.enc_round1, engine.enc_round2
+    k0, k1, k2 = engine.expand_key(key)
+    result = array('H', blocks)
+    previous = iv & 0xFFFF
+    for i, block in enumerate(result):
+        previous = t2[t1[block ^ previous ^ k0] ^ k1] ^ k2
+        result[i] = previous
+    return result
+
+
+class ParallelResult:
+    """
+    并行执行结果
+    blocks: 按输入顺序拼接的结果块（array('H')）
+    strategy/workers/chunks: 实际使用的并行方式、工作者数和分段数
+    worker_stats: {工作者标识: {'blocks', 'seconds', 'blocks_per_second'}}
+    """
+
+    def __init__(self, blocks, strategy, workers, chunks, elapsed, worker_stats):
+        self.blocks = blocks
+        self.strategy = strategy
+        self.workers = workers
+        self.chunks = chunks
+        self.elapsed = elapsed
+        self.worker_stats = worker_stats
+
+    @property
+    def blocks_per_second(self):
+        return len(self.blocks) / self.elapsed if self.elapsed > 0 else float('inf')
+
+    def __repr__(self):
+        return (f"ParallelResult(blocks={len(self.blocks)}, strategy={self.strategy!r}, "
+                f"workers={self.workers}, chunks={self.chunks}, "
+                f"blocks_per_second={self.blocks_per_second:.0f})")
+
+
+def encrypt_parallel(blocks, key, mode='encrypt', iv=None, workers=None,
+                     chunk_blocks=DEFAULT_CHUNK_BLOCKS, strategy=None):
+    """
+    并行批量加解密
+    blocks: 16位数据块序列
+    key: 密钥；多重加密方式传密钥元组，如 (k1, k2, k3)
+    mode: SAES中的方法名，见PARALLEL_MODES；'cbc_encrypt' 为链式运算，按顺序执行
+    iv: CBC模式的初始向量
+    strategy: 指定 'thread'/'interpreter'/'process'/'serial'，默认自动选择：
+              只有一个CPU、只有一个工作者或一个分段、或少于 parallel_threshold() 块时串行
+    返回ParallelResult
+    """
+    data = array('H', blocks)
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    start = time.perf_counter()
+
+    if mode == 'cbc_encrypt':
+        if iv is None:
+            raise ValueError("CBC模式需要提供IV")
+        result = _cbc_encrypt_blocks(get_batch_engine(), data, key, iv)
+        elapsed = time.perf_counter() - start
+        return ParallelResult(result, 'serial', 1, 1, elapsed, {
+            'main': {'blocks': len(data), 'seconds': elapsed,
+                     'blocks_per_second': len(data) / elapsed if elapsed > 0 else float('inf')}})
+    if mode not in PARALLEL_MODES:
+        raise ValueError(f"不支持的加密方式: {mode}")
+    if mode == 'cbc_decrypt' and iv is None:
+        raise ValueError("CBC模式需要提供IV")
+
+    bounds = [(lo, min(lo + chunk_blocks, len(data))) for lo in range(0, len(data), chunk_blocks)]
+    previous = [data[lo - 1] if lo else iv for lo, _ in bounds]
+
+    if strategy is None:
+        serial = (workers <= 1 or (os.cpu_count() or 1) <= 1 or len(bounds) <= 1
+                  or len(data) < parallel_threshold())
+        strategy = 'serial' if serial else choose_strategy()
+    if strategy in ('process', 'interpreter'):
+        # 跨进程/解释器时通过共享内存交换数据，工作者按名称挂接，不复制整块数组
+        with SharedBlockBuffer.from_blocks(data) as source, \
+                SharedBlockBuffer.create(len(data)) as target:
+            timings = _run_tasks(strategy, workers, _run_chunk_shared,
+                                 [(mode, key, prev, source.name, target.name, len(data), lo, hi)
+                                  for (lo, hi), prev in zip(bounds, previous)])
+            result = target.read()
+    else:
+        tasks = [(mode, key, prev, data[lo:hi].tobytes()) for (lo, hi), prev in zip(bounds, previous)]
+        if strategy == 'serial':
+            outputs = [_run_chunk(*task) for task in tasks]
+            workers = 1
+        else:
+            outputs = _run_tasks(strategy, workers, _run_chunk, tasks)
+        result = array('H')
+        for payload, _, _ in outputs:
+            result.frombytes(payload)
+        timings = [(seconds, worker) for _, seconds, worker in outputs]
+
+    worker_stats = {}
+    for (lo, hi), (seconds, worker) in zip(bounds, timings):
+        stats = worker_stats.setdefault(worker, {'blocks': 0, 'seconds': 0.0})
+        stats['blocks'] += hi - lo
+        stats['seconds'] += seconds
+    for stats in worker_stats.values():
+        stats['blocks_per_second'] = (stats['blocks'] / stats['seconds']
+                                      if stats['seconds'] > 0 else float('inf'))
+    elapsed = time.perf_counter() - start
+    return ParallelResult(result, strategy, workers, len(bounds), elapsed, worker_stats)
@@ -0,0 +1,115 @@
+"""
+S-AES 共享内存块缓冲区
+基于 multiprocessing.shared_memory，让进程池中的工作进程按名称挂接输入/输出块数组，
+直接在共享内存上读写，避免把整型列表序列化后来回传递
+"""
+
+import sys
+from array import array
+from multiprocessing import shared_memory
+
+BLOCK_BYTES = 2
+
+
+class SharedBlockBuffer:
+    """
+    16位块数组的共享内存缓冲区
+    创建者（owner）负责在用完后释放（unlink），挂接者只关闭自己的映射
+    推荐用with语句管理生命周期：正常结束或出错时都会关闭，创建者还会释放共享内存
+    """
+
+    def __init__(self, shm, length, owner):
+        self._shm = shm
+        self.length = length
+        self.owner = owner
+        self._view = shm.buf[:length * BLOCK_BYTES].cast('H')
+
+    @classmethod
+    def create(cls, length):
+        """新建一块可容纳length个块的共享内存（内容为0）"""
+        shm = shared_memory.SharedMemory(create=True, size=max(length, 1) * BLOCK_BYTES)
+        return cls(shm, length, owner=True)
+
+    @classmethod
+    def from_blocks(cls, blocks):
+        """新建共享内存并写入blocks"""
+        data = blocks if isinstance(blocks, array) and blocks.typecode == 'H' else array('H', blocks)
+        buffer = cls.create(len(data))
+        try:
+            buffer._view[:] = data
+        except BaseException:
+            buffer.close()
+            raise
+        return buffer
+
+    @classmethod
+    def attach(cls, name, length):
+        """按名称挂接已存在的共享内存（通常在工作进程中调用）"""
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # 3.13之前挂接也会登记到resource_tracker；进程池的工作进程与创建者
+            # 共用同一个resource_tracker，重复登记无副作用，由创建者统一释放
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, length, owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def view(self):
+        """共享内存上的memoryview（格式'H'），读写都不复制数据"""
+        return self._view
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        return self._view[index]
+
+    def __setitem__(self, index, value):
+        self._view[index] = value
+
+    def read(self, start=0, stop=None):
+        """将[start, stop)区间复制为array('H')"""
+        stop = self.length if stop is None else stop
+        return array('H', self._view[start:stop].tobytes())
+
+    def write(self, start, blocks):
+        """从start处写入blocks；array('H')、NumPy uint16数组等格式为'H'的缓冲区直接复制，不做转换"""
+        if isinstance(blocks, array) and blocks.typecode == 'H':
+            data = blocks
+        else:
+            try:
+                data = memoryview(blocks)
+            except TypeError:
+                data = None
+            if data is None or data.format != 'H' or data.ndim != 1:
+                data = array('H', blocks)
+        self._view[start:start + len(data)] = data
+
+    def to_numpy(self):
+        """零拷贝映射为NumPy uint16数组（需在close之前释放）"""
+        import numpy as np
+        return np.frombuffer(self._shm.buf, dtype=np.uint16, count=self.length)
+
+    def close(self):
+        """关闭映射；创建者同时释放共享内存"""
+        if self._shm is None:
+            return
+        self._view.release()
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
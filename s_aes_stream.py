@@ -0,0 +1,292 @@
+"""
+S-AES 分段流式加解密
+把任意长度的字节流按2字节分组，分段送入ECB/CBC加解密，处理跨分段的奇数字节、
+CBC链接以及末尾的填充；可直接在文件之间流式处理（密文为空白分隔的16进制块文本），
+不需要把全部数据读入内存或界面控件
+
+填充方式：
+    'zero'  奇数长度时末尾补一个0字节（与 SAES.string_to_blocks 一致），解密时去掉最后一块
+            低字节的0；只适用于不以0字节结尾的数据（如文本）
+    'pkcs7' 按PKCS#7补1或2个字节（值为补充的字节数，偶数长度时补一整块0x0202），
+            解密时按填充值精确去掉，任意二进制数据都能原样还原；文件加解密默认使用
+"""
+
+import os
+import uuid
+from array import array
+from s_aes_batch import get_batch_engine
+from s_aes_hex import HexParseError, blocks_to_bytes, bytes_to_blocks, format_blocks, parse_blocks
+
+# 每个分段的块数：16384块即32KB数据
+DEFAULT_CHUNK_BLOCKS = 0x4000
+
+# 写入16进制文本时每行的块数（过长的行会让文本控件变慢）
+HEX_BLOCKS_PER_LINE = 32
+
+# 一个16进制块最多的字符数
+MAX_BLOCK_CHARS = 4
+
+MODES = ('ecb', 'cbc')
+
+PADDINGS = ('zero', 'pkcs7')
+
+
+def format_hex_blocks(blocks, per_line=HEX_BLOCKS_PER_LINE):
+    """把块格式化为16进制文本，块之间以空格分隔，每per_line个块换行"""
+    return format_blocks(blocks, per_line)
+
+
+class _BlockCipherStream:
+    """ECB/CBC分段运算的公共部分"""
+
+    def __init__(self, key, mode='ecb', iv=None, padding='zero'):
+        if mode not in MODES:
+            raise ValueError(f"不支持的模式: {mode}")
+        if mode == 'cbc' and iv is None:
+            raise ValueError("CBC模式需要提供IV")
+        if padding not in PADDINGS:
+            raise ValueError(f"不支持的填充方式: {padding}")
+        self.key = key & 0xFFFF
+        self.mode = mode
+        self.padding = padding
+        self.previous = iv
+        self.blocks_done = 0
+
+    def _encrypt(self, blocks):
+        """加密一段完整的块，CBC模式下延续上一段的链"""
+        if self.mode == 'ecb':
+            from s_aes_engine import encrypt_blocks
+            result = array('H', encrypt_blocks(blocks, self.key))
+        else:
+            # CBC加密是顺序链式的，逐块查表
+            engine = get_batch_engine()
+            t1, t2 = engine.enc_round1, engine.enc_round2
+            k0, k1, k2 = engine.expand_key(self.key)
+            result = array('H', bytes(2 * len(blocks)))
+            previous = self.previous
+            for i, block in enumerate(blocks):
+                previous = t2[t1[block ^ previous ^ k0] ^ k1] ^ k2
+                result[i] = previous
+            self.previous = previous
+        self.blocks_done += len(blocks)
+        return result
+
+    def _decrypt(self, blocks):
+        """解密一段完整的块；CBC各块的分组解密相互独立，先批量解密再与前一密文块异或"""
+        from s_aes_engine import decrypt_blocks
+        result = array('H', decrypt_blocks(blocks, self.key))
+        if self.mode == 'cbc' and len(blocks):
+            chained = array('H', [self.previous]) + blocks[:-1]
+            result = array('H', [d ^ c for d, c in zip(result, chained)])
+            self.previous = blocks[-1]
+        self.blocks_done += len(blocks)
+        return result
+
+
+class StreamEncryptor(_BlockCipherStream):
+    """
+    字节流加密器
+    update(data) 返回本次能凑成完整块的密文块；末尾不足2字节的部分留到下次，
+    finalize() 按padding填充后加密最后一块（'zero'只在奇数长度时补0）
+    """
+
+    def __init__(self, key, mode='ecb', iv=None, padding='zero'):
+        super().__init__(key, mode, iv, padding)
+        self._pending = b''
+
+    def update(self, data):
+        data = self._pending + bytes(data)
+        usable = len(data) & ~1
+        self._pending = data[usable:]
+        return self._encrypt(bytes_to_blocks(data[:usable]))
+
+    def finalize(self):
+        pending, self._pending = self._pending, b''
+        if self.padding == 'pkcs7':
+            block = (pending[0] << 8) | 0x01 if pending else 0x0202
+        elif pending:
+            block = pending[0] << 8
+        else:
+            return array('H')
+        return self._encrypt(array('H', [block]))
+
+
+class StreamDecryptor(_BlockCipherStream):
+    """
+    密文块流解密器
+    update(blocks) 返回解密得到的字节；最后一个块暂不输出，
+    finalize() 按padding去掉最后一个块中的填充；'pkcs7'填充无效时抛出ValueError
+    """
+
+    def __init__(self, key, mode='ecb', iv=None, padding='zero'):
+        super().__init__(key, mode, iv, padding)
+        self._last = None
+
+    def update(self, blocks):
+        blocks = blocks if isinstance(blocks, array) and blocks.typecode == 'H' else array('H', blocks)
+        if not len(blocks):
+            return b''
+        plain = self._decrypt(blocks)
+        if self._last is not None:
+            plain.insert(0, self._last)
+        self._last = plain.pop()
+        return blocks_to_bytes(plain)
+
+    def finalize(self):
+        last, self._last = self._last, None
+        if self.padding == 'pkcs7':
+            if last == 0x0202:
+                return b''
+            if last is None or last & 0xFF != 0x01:
+                raise ValueError("填充无效：密文不完整，或密钥、模式、IV不正确")
+            return bytes((last >> 8,))
+        if last is None:
+            return b''
+        if last & 0xFF:
+            return bytes((last >> 8, last & 0xFF))
+        return bytes((last >> 8,))
+
+
+class HexBlockParser:
+    """
+    分段解析空白分隔的16进制块文本
+    feed(text) 返回本段中完整的块，被分段截断的最后一个词留到下一段（只检查新文本的末尾，
+    留下的部分不超过一个块的长度，超出时立即报错，不会无限累积）；
+    遇到非法的块时抛出 s_aes_hex.HexParseError（ValueError的子类），块序号从整体计数
+    """
+
+    def __init__(self):
+        self._tail = ''
+        self.count = 0
+
+    def _parse(self, text):
+        blocks = parse_blocks(text, self.count)
+        self.count += len(blocks)
+        return blocks
+
+    def feed(self, text):
+        # 末尾没有空白时，最后一个词可能被截断，留到下一段；只需向前查看一个块的长度
+        end = len(text)
+        cut = end
+        while cut and end - cut <= MAX_BLOCK_CHARS and not text[cut - 1].isspace():
+            cut -= 1
+        if cut and text[cut - 1].isspace():
+            head, self._tail = self._tail + text[:cut], text[cut:]
+            return self._parse(head)
+        text = self._tail + text
+        if len(text) <= MAX_BLOCK_CHARS:
+            self._tail = text
+            return array('H')
+        # 末尾的词已超过一个块的长度，必然无效：解析整段以报告准确的块序号和位置
+        self._tail = ''
+        self._parse(text)
+        raise HexParseError(self.count, text[-MAX_BLOCK_CHARS - 1:], len(text) - MAX_BLOCK_CHARS - 1)
+
+    def finalize(self):
+        tail, self._tail = self._tail, ''
+        return self._parse(tail)
+
+
+def iter_encrypt_blocks(data, key, mode='ecb', iv=None, chunk_blocks=DEFAULT_CHUNK_BLOCKS):
+    """对内存中的字节分段加密，逐段产出密文块数组"""
+    encryptor = StreamEncryptor(key, mode, iv)
+    step = 2 * chunk_blocks
+    for start in range(0, len(data), step):
+        yield encryptor.update(data[start:start + step])
+    tail = encryptor.finalize()
+    if len(tail):
+        yield tail
+
+
+def _write_atomically(target, mode, write, **kwargs):
+    """
+    在目标文件所在目录的临时文件中执行 write(文件对象)，返回True时用 os.replace 替换目标文件；
+    返回False（被取消）或出错时删除临时文件，目标文件保持原样。返回是否已完成
+    """
+    directory, name = os.path.split(os.path.abspath(target))
+    temp = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.part")
+    try:
+        with open(temp, mode.replace('w', 'x'), **kwargs) as dst:
+            completed = write(dst)
+        if completed:
+            os.replace(temp, target)
+        return completed
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def encrypt_file_to_hex(source, target, key, mode='ecb', iv=None,
+                        chunk_blocks=DEFAULT_CHUNK_BLOCKS, progress=None, cancelled=None,
+                        padding='pkcs7'):
+    """
+    流式加密文件：读取source（二进制），把密文块以16进制文本写入target
+    默认使用PKCS#7填充，以0字节结尾的二进制文件也能原样解密
+    progress(已处理字节数) 在每段完成后调用；cancelled() 返回True时提前停止
+    先写入同目录的临时文件，完成后才替换target；返回写出的密文块数，被取消时不写target并返回None
+    """
+    encryptor = StreamEncryptor(key, mode, iv, padding)
+
+    def write(dst):
+        done = 0
+        separator = ''
+        with open(source, 'rb') as src:
+            while True:
+                if cancelled is not None and cancelled():
+                    return False
+                data = src.read(2 * chunk_blocks)
+                blocks = encryptor.update(data) if data else encryptor.finalize()
+                if len(blocks):
+                    dst.write(separator + format_hex_blocks(blocks))
+                    separator = '\n'
+                if not data:
+                    break
+                done += len(data)
+                if progress is not None:
+                    progress(done)
+        dst.write('\n')
+        return True
+
+    if not _write_atomically(target, 'w', write, encoding='ascii', newline='\n'):
+        return None
+    return encryptor.blocks_done
+
+
+def decrypt_hex_file(source, target, key, mode='ecb', iv=None,
+                     chunk_blocks=DEFAULT_CHUNK_BLOCKS, progress=None, cancelled=None,
+                     padding='pkcs7'):
+    """
+    流式解密文件：读取16进制块文本source，把明文字节写入target
+    padding须与加密时一致；PKCS#7填充无效时抛出ValueError，文本不是合法的16进制块（含非ASCII字符）时抛出HexParseError
+    progress(已读取字节数) 在每段完成后调用；cancelled() 返回True时提前停止
+    先写入同目录的临时文件，完成后才替换target；返回解密的块数，被取消或出错时不写target，取消时返回None
+    """
+    decryptor = StreamDecryptor(key, mode, iv, padding)
+    parser = HexBlockParser()
+
+    def write(dst):
+        done = 0
+        with open(source, 'rb') as src:
+            while True:
+                if cancelled is not None and cancelled():
+                    return False
+                raw = src.read(5 * chunk_blocks)
+                try:
+                    text = raw.decode('ascii')
+                except UnicodeDecodeError as e:
+                    # 16进制块文本只应含ASCII字符，与其他解析错误一样报告为HexParseError
+                    before = raw[:e.start]
+                    index = parser.count + len(before.split()) - (1 if before[-1:].strip() else 0)
+                    raise HexParseError(index, raw[e.start:e.end].decode('latin-1'), done + e.start) from None
+                if not text:
+                    dst.write(decryptor.update(parser.finalize()))
+                    dst.write(decryptor.finalize())
+                    return True
+                dst.write(decryptor.update(parser.feed(text)))
+                done += len(text)
+                if progress is not None:
+                    progress(done)
+
+    if not _write_atomically(target, 'wb', write):
+        return None
+    return decryptor.blocks_done
@@ -0,0 +1,17 @@
+"""
+测试公共配置
+各模块位于仓库根目录（不是安装的包），把根目录加入导入路径；
+引擎基准测试的结果写到临时目录，不影响用户的 ~/.cache
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def _engine_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('SAES_ENGINE_CACHE', str(tmp_path / 'engine_calibration.json'))
@@ -0,0 +1,100 @@
+"""密码分析工具"""
+
+import pytest
+
+from s_aes_analysis import (
+    avalanche_matrix, cbc_error_propagation, cipher_difference_counts, cipher_differential_statistics,
+    codebook_digest, cycle_structure, difference_distribution_table, differential_uniformity,
+    linear_approximation_table, linearity, mode_codebook, permutation_summary, permutation_survey, sbox_table,
+)
+
+
+def test_sbox_is_permutation():
+    assert sorted(sbox_table()) == list(range(16))
+    inverse = sbox_table(inverse=True)
+    assert [inverse[s] for s in sbox_table()] == list(range(16))
+
+
+def test_difference_distribution_table():
+    ddt = difference_distribution_table()
+    assert ddt[0] == (16,) + (0,) * 15
+    for row in ddt:
+        assert sum(row) == 16
+        assert all(v % 2 == 0 for v in row)
+    assert differential_uniformity() == max(max(row) for row in ddt[1:])
+
+
+def test_linear_approximation_table():
+    lat = linear_approximation_table()
+    assert lat[0] == (8,) + (0,) * 15
+    assert all(lat[a][0] == 0 for a in range(1, 16))
+    assert linearity() == max(abs(v) for row in lat[1:] for v in row)
+
+
+def test_cipher_difference_counts():
+    counts = cipher_difference_counts(0x2D55, 0x0001)
+    assert sum(counts) == 0x10000
+    # 加密是置换，非零输入差分不会得到零输出差分
+    assert counts[0] == 0
+    assert cipher_difference_counts(0x2D55, 0)[0] == 0x10000
+
+
+def test_cipher_differential_statistics():
+    stats = cipher_differential_statistics(0x0001, [0x2D55, 0xA73B], top=3)
+    assert stats['keys'] == 2
+    assert sum(stats['total']) == 2 * 0x10000
+    assert len(stats['best']) == 3
+    assert stats['best'][0][1] >= stats['best'][-1][1]
+    assert stats['max_probability'] == stats['best'][0][1] / (2 * 0x10000)
+
+
+def test_avalanche_matrix_counts_bit_flips():
+    result = avalanche_matrix('encrypt', keys=[0x2D55])
+    assert result['trials'] == 0x10000
+    codebook = mode_codebook('encrypt', 0x2D55)
+    # 逐个明文核对一个比特对：翻转输入比特3时输出比特5的翻转次数
+    expected = sum(((codebook[p] ^ codebook[p ^ 0x0008]) >> 5) & 1 for p in range(0x10000))
+    assert result['counts'][3][5] == expected
+    assert 0.0 <= result['min'] <= result['mean'] <= result['max'] <= 1.0
+
+
+def test_avalanche_matrix_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        avalanche_matrix('cbc')
+    with pytest.raises(ValueError):
+        avalanche_matrix('double', keys='all')
+
+
+def test_cbc_error_propagation_is_limited_to_two_blocks():
+    result = cbc_error_propagation(samples=2, messages=256, length=3, seed=1)
+    assert result['trials'] == 2 * 256
+    p0, p1, p2 = result['matrices']
+    for i in range(16):
+        assert any(p0[i])
+        # P_1 = D(C_1) ⊕ C_0：恰好翻转同一比特
+        assert p1[i] == [1.0 if j == i else 0.0 for j in range(16)]
+        assert not any(p2[i])
+
+
+def test_cycle_structure_of_known_permutations():
+    lengths, fixed_points = cycle_structure(range(0x10000))
+    assert lengths == {1: 0x10000}
+    assert len(fixed_points) == 0x10000
+    lengths, fixed_points = cycle_structure([x ^ 1 for x in range(0x10000)])
+    assert lengths == {2: 0x8000}
+    assert fixed_points == []
+
+
+def test_permutation_summary():
+    summary = permutation_summary(0x2D55)
+    assert sum(length * count for length, count in summary['cycle_lengths'].items()) == 0x10000
+    assert summary['cycles'] == sum(summary['cycle_lengths'].values())
+    assert all(summary['order'] % length == 0 for length in summary['cycle_lengths'])
+    assert summary['digest'] == codebook_digest(mode_codebook('encrypt', 0x2D55))
+
+
+def test_permutation_survey():
+    survey = permutation_survey([0x0000, 0x2D55, 0x2D55, 0xA73B], workers=1)
+    assert [s['key'] for s in survey['summaries']] == [0x0000, 0x2D55, 0xA73B]
+    assert survey['total_fixed_points'] == sum(len(s['fixed_points']) for s in survey['summaries'])
+    assert sum(survey['cycle_count_histogram'].values()) == 3
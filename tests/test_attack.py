@@ -0,0 +1,66 @@
+"""密钥恢复攻击"""
+
+import pytest
+
+from s_aes import SAES
+from s_aes_attack import cbc_batch_attack, cbc_known_plaintext_attack, ciphertext_only_attack, recover_key
+
+KEY = 0x3A94
+
+
+@pytest.fixture(scope='module')
+def saes():
+    return SAES()
+
+
+def test_recover_key_unique(saes):
+    result = recover_key([(p, saes.encrypt(p, KEY)) for p in (0x0001, 0x0002, 0x0003)])
+    assert result.found
+    assert result.key == KEY
+    assert result.candidates == [KEY]
+    assert result.stats['survivors'][-1] == 1
+
+
+def test_recover_key_requires_pairs():
+    with pytest.raises(ValueError):
+        recover_key([])
+
+
+def test_brute_force_attack_delegates(saes):
+    pairs = [(0x6F6B, saes.encrypt(0x6F6B, KEY)), (0x1234, saes.encrypt(0x1234, KEY))]
+    assert saes.brute_force_attack(pairs).key == KEY
+
+
+def test_ciphertext_only_attack_recovers_text(saes):
+    text = "The quick brown fox jumps over the lazy dog"
+    result = ciphertext_only_attack(saes.encrypt_ascii(text, KEY), workers=1)
+    assert result.key == KEY
+    assert result.candidates[0] == (KEY, result.candidates[0][1], text)
+
+
+def test_ciphertext_only_attack_rejects_empty():
+    with pytest.raises(ValueError):
+        ciphertext_only_attack([], workers=1)
+
+
+def test_cbc_attack_recovers_key_and_iv(saes):
+    plaintext = [0x0001, 0x0002, 0x0003, 0x0004]
+    ciphertext = saes.cbc_encrypt(plaintext, KEY, 0x5555)
+    result = cbc_known_plaintext_attack(plaintext, ciphertext)
+    assert result.key == KEY
+    assert result.stats['iv'] == 0x5555
+
+
+def test_cbc_attack_with_known_iv_needs_one_block(saes):
+    ciphertext = saes.cbc_encrypt([0x4142, 0x4344], KEY, 0x0F0F)
+    result = cbc_known_plaintext_attack([0x4142, 0x4344], ciphertext, iv=0x0F0F)
+    assert result.key == KEY
+    with pytest.raises(ValueError):
+        cbc_known_plaintext_attack([0x4142], ciphertext[:1])
+
+
+def test_cbc_batch_attack_keeps_order(saes):
+    plaintext = [0x1111, 0x2222, 0x3333]
+    keys = (0x0102, 0xBEEF)
+    messages = [(plaintext, saes.cbc_encrypt(plaintext, key, key ^ 0xFFFF)) for key in keys]
+    assert [r.key for r in cbc_batch_attack(messages)] == list(keys)
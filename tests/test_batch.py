@@ -0,0 +1,98 @@
+"""批量查表引擎与 SAES 参考实现的一致性"""
+
+import random
+from array import array
+
+import pytest
+
+from s_aes import SAES
+from s_aes_batch import COMPOSE_THRESHOLD, KEY_SPACE, MODE_LAYERS, SAESBatch, mode_layers, np
+
+SAMPLE_KEYS = (0x0000, 0xFFFF, 0x2D55, 0xA73B, 0x8000)
+
+
+@pytest.fixture(scope='module', params=[False, True], ids=['python', 'numpy'])
+def batch(request):
+    if request.param and np is None:
+        pytest.skip("未安装NumPy")
+    return SAESBatch(use_numpy=request.param)
+
+
+@pytest.fixture(scope='module')
+def saes():
+    return SAES()
+
+
+def test_expand_key_matches_reference(batch, saes):
+    for key in SAMPLE_KEYS + tuple(random.Random(1).randrange(KEY_SPACE) for _ in range(50)):
+        assert list(batch.expand_key(key)) == saes.key_expansion(key)
+
+
+def test_blocks_match_reference(batch, saes):
+    rng = random.Random(2)
+    blocks = array('H', [rng.randrange(0x10000) for _ in range(200)])
+    for key in SAMPLE_KEYS:
+        encrypted = batch.encrypt_blocks(blocks, key)
+        assert list(encrypted) == [saes.encrypt(b, key) for b in blocks]
+        assert list(batch.decrypt_blocks(encrypted, key)) == list(blocks)
+
+
+def test_numpy_input_returns_numpy(batch):
+    if not batch.use_numpy:
+        pytest.skip("只适用于NumPy引擎")
+    blocks = np.arange(1000, dtype=np.uint16)
+    encrypted = batch.encrypt_blocks(blocks, 0x2D55)
+    assert isinstance(encrypted, np.ndarray)
+    assert list(encrypted) == list(batch.encrypt_blocks(array('H', range(1000)), 0x2D55))
+
+
+def test_all_keys_sweep(batch, saes):
+    results = batch.encrypt_all_keys(0x1234)
+    assert len(results) == KEY_SPACE
+    for key in SAMPLE_KEYS:
+        assert results[key] == saes.encrypt(0x1234, key)
+    decrypted = batch.decrypt_all_keys(0x1234, 0x2D00, 0x2E00)
+    assert decrypted[0x55] == saes.decrypt(0x1234, 0x2D55)
+
+
+def test_match_keys(batch, saes):
+    ciphertext = saes.encrypt(0x6F6B, 0xA73B)
+    keys = batch.match_keys(0x6F6B, ciphertext)
+    assert 0xA73B in keys
+    assert batch.match_keys(0x6F6B, ciphertext, [0x0001, 0xA73B]) == [0xA73B]
+
+
+def test_multi_layer_modes(batch, saes):
+    blocks = array('H', [0x0000, 0x1234, 0xFFFF])
+    assert list(batch.double_encrypt_blocks(blocks, 1, 2)) == [saes.double_encrypt(b, 1, 2) for b in blocks]
+    assert list(batch.triple_encrypt_48bit_blocks(blocks, 1, 2, 3)) == [
+        saes.triple_encrypt_48bit(b, 1, 2, 3) for b in blocks]
+    encrypted = batch.triple_encrypt_32bit_blocks(blocks, 7, 9)
+    assert list(batch.triple_decrypt_32bit_blocks(encrypted, 7, 9)) == list(blocks)
+
+
+@pytest.mark.parametrize('mode', sorted(MODE_LAYERS))
+def test_mode_layers_match_saes_methods(batch, saes, mode):
+    keys = (0x2D55, 0xA73B, 0x1234)
+    n_keys = 1 if mode in ('encrypt', 'decrypt') else (3 if mode.endswith('48bit') else 2)
+    method = getattr(saes, mode)
+    blocks = array('H', [0x0000, 0x6F6B, 0xFFFF])
+    expected = [method(b, *keys[:n_keys]) for b in blocks]
+    assert list(batch.cascade_blocks(blocks, mode_layers(mode, keys[:n_keys]))) == expected
+
+
+def test_compile_layers_merges_whitening(batch):
+    layers = mode_layers('triple_encrypt_48bit', (1, 2, 3))
+    initial, steps = batch.compile_layers(layers)
+    assert initial == 1
+    assert len(steps) == 2 * len(layers)
+    with pytest.raises(ValueError):
+        batch.compile_layers([(1, 'X')])
+
+
+def test_composed_codebook_path_matches_pipeline(batch):
+    layers = mode_layers('double_encrypt', (0x0F0F, 0xF0F0))
+    blocks = array('H', (i * 7 & 0xFFFF for i in range(COMPOSE_THRESHOLD)))
+    composed = batch.cascade_blocks(blocks, layers)
+    pipelined = batch.run_steps(blocks, *batch.compile_layers(layers))
+    assert list(composed) == list(pipelined)
@@ -0,0 +1,41 @@
+"""bytes.translate 整段查表的批量ECB引擎"""
+
+import random
+from array import array
+
+import pytest
+
+from s_aes import SAES
+from s_aes_bulk import SAESBulk
+
+
+@pytest.fixture(scope='module')
+def bulk():
+    # 分段较小，让测试数据跨越多个分段
+    return SAESBulk(chunk_bytes=64)
+
+
+def test_bytes_match_reference(bulk):
+    saes = SAES()
+    rng = random.Random(5)
+    data = bytes(rng.randrange(256) for _ in range(1000))
+    for key in (0x0000, 0x2D55, 0xFFFF):
+        encrypted = bulk.encrypt_bytes(data, key)
+        expected = b''.join(saes.encrypt(int.from_bytes(data[i:i + 2], 'big'), key).to_bytes(2, 'big')
+                            for i in range(0, len(data), 2))
+        assert encrypted == expected
+        assert bulk.decrypt_bytes(encrypted, key) == data
+
+
+def test_blocks_match_reference(bulk):
+    saes = SAES()
+    blocks = array('H', range(0, 0x10000, 101))
+    encrypted = bulk.encrypt_blocks(blocks, 0xA73B)
+    assert list(encrypted) == [saes.encrypt(b, 0xA73B) for b in blocks]
+    assert bulk.decrypt_blocks(encrypted, 0xA73B) == blocks
+
+
+def test_odd_length_rejected(bulk):
+    with pytest.raises(ValueError):
+        bulk.encrypt_bytes(b'abc', 0x2D55)
+    assert bulk.encrypt_bytes(b'', 0x2D55) == b''
@@ -0,0 +1,45 @@
+"""CandidateKeySet 与中间相遇攻击"""
+
+from array import array
+
+from s_aes import SAES, CandidateKeySet
+
+
+def test_pack_roundtrip():
+    value = CandidateKeySet.pack(0x1234, 0xABCD)
+    assert value == 0x1234ABCD
+    assert CandidateKeySet.unpack(value) == (0x1234, 0xABCD)
+
+
+def test_sorted_membership_and_slicing():
+    keys = CandidateKeySet.from_pairs([(3, 1), (1, 2), (2, 0xFFFF)])
+    assert keys.tolist() == [(1, 2), (2, 0xFFFF), (3, 1)]
+    assert (2, 0xFFFF) in keys
+    assert (2, 0xFFFE) not in keys
+    assert keys[0] == (1, 2)
+    assert keys[::-1] == keys
+    assert len(keys[1:]) == 2
+
+
+def test_intersection():
+    a = CandidateKeySet.from_pairs([(1, 1), (2, 2), (3, 3)])
+    b = CandidateKeySet.from_pairs([(2, 2), (3, 3), (4, 4)])
+    assert (a & b).tolist() == [(2, 2), (3, 3)]
+    assert a.intersection([(1, 1)]).tolist() == [(1, 1)]
+
+
+def test_zero_copy_exports():
+    keys = CandidateKeySet(array('I', [5, 1, 3]))
+    assert list(keys.packed()) == [1, 3, 5]
+    assert keys.to_memoryview().tolist() == [1, 3, 5]
+    assert len(keys.to_bytes()) == 3 * keys.packed().itemsize
+
+
+def test_meet_in_middle_contains_real_keys():
+    saes = SAES()
+    k1, k2 = 0x2D55, 0x1A2B
+    first = saes.meet_in_middle_attack(0x6F6B, saes.double_encrypt(0x6F6B, k1, k2))
+    assert isinstance(first, CandidateKeySet)
+    assert (k1, k2) in first
+    second = saes.meet_in_middle_attack(0x1234, saes.double_encrypt(0x1234, k1, k2))
+    assert (k1, k2) in first & second
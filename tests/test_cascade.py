@@ -0,0 +1,58 @@
+"""N层级联加密"""
+
+from array import array
+
+import pytest
+
+from s_aes import SAES
+from s_aes_cascade import Cascade, invert_layers, simplify_layers
+
+LAYERS = [(0x2D55, 'E'), (0xA73B, 'D'), (0x1234, 'E'), (0x0F0F, 'E')]
+
+
+def reference(block, layers):
+    saes = SAES()
+    for key, direction in layers:
+        block = saes.encrypt(block, key) if direction == 'E' else saes.decrypt(block, key)
+    return block
+
+
+def test_simplify_and_invert_layers():
+    assert simplify_layers([(1, 'E'), (2, 'E'), (2, 'D'), (1, 'D')]) == []
+    assert simplify_layers([(1, 'E'), (1, 'E')]) == [(1, 'E'), (1, 'E')]
+    assert invert_layers([(1, 'E'), (2, 'D')]) == [(2, 'E'), (1, 'D')]
+    with pytest.raises(ValueError):
+        simplify_layers([(1, 'X')])
+
+
+@pytest.mark.parametrize('compose', [False, True, 'auto'])
+def test_cascade_matches_layer_by_layer(compose):
+    cascade = Cascade(LAYERS, compose=compose)
+    blocks = array('H', [0x0000, 0x1234, 0x6F6B, 0xFFFF])
+    encrypted = cascade.encrypt_blocks(blocks)
+    assert list(encrypted) == [reference(b, LAYERS) for b in blocks]
+    assert list(cascade.decrypt_blocks(encrypted)) == list(blocks)
+    assert cascade.inverse().encrypt(encrypted[1]) == 0x1234
+
+
+def test_auto_compose_after_threshold():
+    cascade = Cascade(LAYERS)
+    assert not cascade.plan()['codebook']
+    blocks = array('H', range(0x10000))
+    expected = cascade.encrypt_blocks(blocks)
+    while not cascade.plan()['codebook']:
+        assert list(cascade.encrypt_blocks(blocks)) == list(expected)
+    assert list(cascade.encrypt_blocks(blocks)) == list(expected)
+
+
+def test_cancelling_layers_is_identity():
+    cascade = Cascade([(5, 'E'), (5, 'D')], compose=True)
+    assert cascade.plan()['effective_layers'] == 0
+    assert cascade.encrypt(0xBEEF) == 0xBEEF
+
+
+def test_stream_chunks():
+    cascade = Cascade(LAYERS)
+    chunks = [array('H', [1, 2]), array('H', [3])]
+    encrypted = list(cascade.encrypt_stream(chunks))
+    assert [list(c) for c in cascade.decrypt_stream(encrypted)] == [[1, 2], [3]]
@@ -0,0 +1,45 @@
+"""复合码本的LRU缓存"""
+
+from array import array
+
+from s_aes import SAES
+from s_aes_batch import CodebookCache, mode_layers
+
+TABLE_BYTES = 2 * 0x10000
+
+
+def test_builds_after_traffic_threshold():
+    cache = CodebookCache(build_threshold=100)
+    blocks = array('H', range(60))
+    expected = [SAES().double_encrypt(b, 1, 2) for b in blocks]
+    assert list(cache.apply_mode(blocks, 'double_encrypt', (1, 2))) == expected
+    assert cache.stats()['builds'] == 0
+    assert cache.stats()['blocks_via_pipeline'] == 60
+    # 累计流量达到阈值后构建码本，之后直接命中
+    assert list(cache.apply_mode(blocks, 'double_encrypt', (1, 2))) == expected
+    assert list(cache.apply_mode(blocks, 'double_encrypt', (1, 2))) == expected
+    stats = cache.stats()
+    assert stats['builds'] == 1
+    assert stats['hits'] == 1
+    assert stats['blocks_via_table'] == 120
+
+
+def test_lru_eviction_respects_max_bytes():
+    cache = CodebookCache(max_bytes=TABLE_BYTES, build_threshold=1)
+    first = mode_layers('double_encrypt', (1, 2))
+    second = mode_layers('double_encrypt', (3, 4))
+    cache.get(first)
+    cache.get(second)
+    stats = cache.stats()
+    assert stats['entries'] == 1
+    assert stats['evictions'] == 1
+    assert stats['bytes_used'] <= TABLE_BYTES
+    cache.clear()
+    assert cache.stats()['entries'] == 0
+
+
+def test_cached_codebook_inverts():
+    cache = CodebookCache(build_threshold=1)
+    encrypt = cache.get(mode_layers('triple_encrypt_48bit', (1, 2, 3)))
+    decrypt = cache.get(mode_layers('triple_decrypt_48bit', (1, 2, 3)))
+    assert all(decrypt[encrypt[x]] == x for x in range(0, 0x10000, 97))
@@ -0,0 +1,131 @@
+"""二进制容器格式"""
+
+import io
+import os
+
+import pytest
+
+from s_aes import SAES
+from s_aes_container import (
+    HEADER_SIZE, ContainerError, ContainerReader, ContainerWriter, decrypt_file, derive_segment_iv,
+    encrypt_file,
+)
+from s_aes_hex import blocks_to_bytes, bytes_to_blocks
+
+KEY = 0x2D55
+IV = 0x5555
+DATA = os.urandom(1001)
+
+
+def build(data=DATA, mode='ecb', chunk_size=64):
+    buffer = io.BytesIO()
+    with ContainerWriter(buffer, KEY, mode, IV if mode != 'ecb' else None, key_id=7,
+                         chunk_size=chunk_size) as writer:
+        writer.write(data[:100])
+        writer.write(data[100:])
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('mode', ['ecb', 'cbc', 'scbc'])
+def test_roundtrip_and_random_read(mode):
+    reader = ContainerReader(io.BytesIO(build(mode=mode)))
+    assert (reader.mode, reader.key_id, reader.length, reader.chunk_count) == (mode, 7, len(DATA), 16)
+    assert b''.join(reader.iter_chunks(KEY)) == DATA
+    assert reader.read(KEY, 60, 200) == DATA[60:260]
+    assert reader.read(KEY, 1000) == DATA[1000:]
+    assert reader.read(KEY, 2000) == b''
+
+
+def test_empty_input():
+    reader = ContainerReader(io.BytesIO(build(b'')))
+    assert reader.length == 0
+    assert reader.read(KEY) == b''
+
+
+def test_chunk_crc_detects_tampering():
+    raw = bytearray(build())
+    raw[HEADER_SIZE + 70] ^= 0x01
+    reader = ContainerReader(io.BytesIO(bytes(raw)))
+    assert reader.read_chunk(0, KEY) == DATA[:64]
+    with pytest.raises(ContainerError, match='第1个分段'):
+        reader.read_chunk(1, KEY)
+
+
+@pytest.mark.parametrize('position', [5, -10, -40])
+def test_header_footer_and_index_crc(position):
+    raw = bytearray(build())
+    raw[position] ^= 0x01
+    with pytest.raises(ContainerError):
+        ContainerReader(io.BytesIO(bytes(raw)))
+
+
+def test_rejects_foreign_and_truncated_files():
+    with pytest.raises(ContainerError):
+        ContainerReader(io.BytesIO(b'not a container at all, just some text'))
+    with pytest.raises(ContainerError):
+        ContainerReader(io.BytesIO(build()[:-1]))
+
+
+def test_writer_validates_arguments():
+    with pytest.raises(ValueError):
+        ContainerWriter(io.BytesIO(), KEY, 'ctr')
+    with pytest.raises(ValueError):
+        ContainerWriter(io.BytesIO(), KEY, 'cbc')
+    with pytest.raises(ValueError):
+        ContainerWriter(io.BytesIO(), KEY, chunk_size=63)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_file_roundtrip(tmp_path, workers):
+    source, container, target = tmp_path / 'plain.bin', tmp_path / 'data.saes', tmp_path / 'plain.out'
+    source.write_bytes(DATA)
+    assert encrypt_file(source, container, KEY, 'cbc', IV, chunk_size=128) == len(DATA)
+    progress = []
+    assert decrypt_file(str(container), target, KEY, workers=workers, progress=progress.append) == len(DATA)
+    assert target.read_bytes() == DATA
+    assert progress[-1] == len(DATA)
+
+
+def test_parallel_decrypt_reports_tampering(tmp_path):
+    source, container = tmp_path / 'plain.bin', tmp_path / 'data.saes'
+    source.write_bytes(DATA)
+    encrypt_file(source, container, KEY, chunk_size=128)
+    raw = bytearray(container.read_bytes())
+    raw[HEADER_SIZE + 500] ^= 0x80
+    container.write_bytes(bytes(raw))
+    with pytest.raises(ContainerError):
+        decrypt_file(str(container), tmp_path / 'plain.out', KEY, workers=2)
+
+
+def test_segments_are_standard_cbc_messages():
+    raw = build(mode='scbc')
+    reader = ContainerReader(io.BytesIO(raw))
+    saes = SAES()
+    for i in (0, 15):
+        offset, plain_len, _, iv, _ = reader.index[i]
+        assert iv == derive_segment_iv(KEY, IV, i)
+        plain = DATA[i * 64:i * 64 + plain_len]
+        expected = saes.cbc_encrypt(list(bytes_to_blocks(plain + b'\0' * (plain_len % 2))), KEY, iv)
+        assert raw[offset:offset + 2 * len(expected)] == blocks_to_bytes(expected)
+
+
+def test_append_segment_validation():
+    writer = ContainerWriter(io.BytesIO(), KEY, 'scbc', IV, chunk_size=4)
+    with pytest.raises(ValueError):
+        writer.append_segment(b'\0' * 2, 4)
+    writer.append_segment(b'\0' * 2, 1)
+    with pytest.raises(ValueError):
+        writer.append_segment(b'\0' * 4, 4)
+    with pytest.raises(ValueError):
+        ContainerWriter(io.BytesIO(), KEY).append_segment(b'', 0)
+
+
+def test_parallel_segment_encryption_matches_serial(tmp_path):
+    source = tmp_path / 'plain.bin'
+    source.write_bytes(DATA)
+    serial, parallel = tmp_path / 'serial.saes', tmp_path / 'parallel.saes'
+    encrypt_file(source, serial, KEY, 'scbc', IV, chunk_size=128, workers=1)
+    encrypt_file(source, parallel, KEY, 'scbc', IV, chunk_size=128, workers=2)
+    assert serial.read_bytes() == parallel.read_bytes()
+    decrypt_file(str(parallel), tmp_path / 'plain.out', KEY, workers=2)
+    assert (tmp_path / 'plain.out').read_bytes() == DATA
@@ -0,0 +1,61 @@
+"""线程安全的共享加密上下文"""
+
+import threading
+from array import array
+
+import pytest
+
+from s_aes import SAES
+from s_aes_context import SAESContext
+
+
+@pytest.fixture(scope='module')
+def context():
+    return SAESContext()
+
+
+@pytest.fixture(scope='module')
+def saes():
+    return SAES()
+
+
+def test_immutable(context):
+    with pytest.raises(AttributeError):
+        context.foo = 1
+    with pytest.raises(AttributeError):
+        del context._engine
+
+
+def test_matches_saes(context, saes):
+    for key in (0x0000, 0x2D55, 0xFFFF):
+        assert context.key_expansion(key) == saes.key_expansion(key)
+        assert context.encrypt(0x6F6B, key) == saes.encrypt(0x6F6B, key)
+        assert context.decrypt(0x6F6B, key) == saes.decrypt(0x6F6B, key)
+    assert context.triple_encrypt_48bit(0x1234, 1, 2, 3) == saes.triple_encrypt_48bit(0x1234, 1, 2, 3)
+    assert context.encrypt_ascii("Hello", 0x2D55) == saes.encrypt_ascii("Hello", 0x2D55)
+    assert context.cbc_encrypt([1, 2, 3], 0x2D55, 0x5555) == saes.cbc_encrypt([1, 2, 3], 0x2D55, 0x5555)
+    assert context.cbc_decrypt(context.cbc_encrypt([1, 2, 3], 0x2D55, 0x5555), 0x2D55, 0x5555) == [1, 2, 3]
+
+
+def test_codebook_path_matches_pipeline():
+    context = SAESContext(codebook_threshold=16)
+    blocks = array('H', range(100))
+    assert list(context.mode_blocks(blocks, 'double_encrypt', (1, 2))) == [
+        SAES().double_encrypt(b, 1, 2) for b in blocks]
+
+
+def test_shared_between_threads(context, saes):
+    blocks = array('H', range(0, 0x10000, 13))
+    expected = list(context.encrypt_blocks(blocks, 0xA73B))
+    results = []
+
+    def work():
+        results.append(list(context.encrypt_blocks(blocks, 0xA73B)))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [expected] * 4
+    assert expected[:3] == [saes.encrypt(b, 0xA73B) for b in blocks[:3]]
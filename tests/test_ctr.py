@@ -0,0 +1,86 @@
+"""CTR模式与密钥流预生成池"""
+
+import os
+
+import pytest
+
+from s_aes import SAES
+from s_aes_ctr import COUNTER_SPACE, CTRKeystreamPool, ctr_decrypt, ctr_encrypt, ctr_keystream
+
+KEY = 0x2D55
+NONCE = 0xFFF0
+
+
+def test_keystream_matches_reference_and_wraps_counter():
+    saes = SAES()
+    stream = ctr_keystream(KEY, NONCE, 0, 64)
+    expected = b''.join(saes.encrypt((NONCE + i) & 0xFFFF, KEY).to_bytes(2, 'big') for i in range(32))
+    assert stream == expected
+    assert ctr_keystream(KEY, NONCE, 3, 10) == expected[3:13]
+
+
+def test_offset_decrypt():
+    data = os.urandom(101)
+    ciphertext = ctr_encrypt(data, KEY, NONCE)
+    assert ctr_decrypt(ciphertext, KEY, NONCE) == data
+    assert ctr_decrypt(ciphertext[33:70], KEY, NONCE, offset=33) == data[33:70]
+
+
+def test_counter_space_limit():
+    assert len(ctr_keystream(KEY, NONCE, 2 * COUNTER_SPACE - 2, 2)) == 2
+    with pytest.raises(ValueError):
+        ctr_keystream(KEY, NONCE, 2 * COUNTER_SPACE - 1, 2)
+
+
+def test_pool_continues_offsets():
+    data = os.urandom(5000)
+    with CTRKeystreamPool(ahead_bytes=1024) as pool:
+        pool.prepare(KEY, NONCE)
+        assert pool.wait_idle(timeout=10)
+        pieces = [data[:7], data[7:1500], data[1500:]]
+        ciphertext = b''.join(pool.encrypt(KEY, NONCE, piece) for piece in pieces)
+        stats = pool.stats()
+    assert ciphertext == ctr_encrypt(data, KEY, NONCE)
+    assert stats['hits'] >= 1
+    assert stats['bytes_from_pool'] + stats['bytes_generated_inline'] == len(data)
+
+
+def test_pool_refuses_to_reuse_one_shot_nonce():
+    with CTRKeystreamPool() as pool:
+        first = pool.encrypt(KEY, 0x1234, b'first message')
+        assert first == ctr_encrypt(b'first message', KEY, 0x1234)
+        with pytest.raises(ValueError):
+            pool.encrypt(KEY, 0x1234, b'second message')
+        # 重新登记后从上次的位置继续
+        pool.prepare(KEY, 0x1234)
+        second = pool.encrypt(KEY, 0x1234, b'second message')
+        assert second == ctr_encrypt(b'second message', KEY, 0x1234, offset=len(b'first message'))
+
+
+def test_pool_remembers_released_and_evicted_pairs():
+    with CTRKeystreamPool(max_entries=1) as pool:
+        pool.prepare(KEY, 1)
+        pool.encrypt(KEY, 1, b'abcd')
+        pool.release(KEY, 1)
+        with pytest.raises(ValueError):
+            pool.encrypt(KEY, 1, b'abcd')
+
+        pool.prepare(KEY, 2)
+        pool.encrypt(KEY, 2, b'xy')
+        pool.prepare(KEY, 3)
+        assert pool.stats()['entries_evicted'] == 1
+        with pytest.raises(ValueError):
+            pool.encrypt(KEY, 2, b'xy')
+        pool.prepare(KEY, 2)
+        assert pool.encrypt(KEY, 2, b'zw') == ctr_encrypt(b'zw', KEY, 2, offset=2)
+        assert pool.stats()['used_pairs'] == 3
+
+
+def test_pool_rejects_exhausted_pair():
+    with CTRKeystreamPool(ahead_bytes=0) as pool:
+        pool.prepare(KEY, 9)
+        pool.encrypt(KEY, 9, bytes(2 * COUNTER_SPACE))
+        with pytest.raises(ValueError):
+            pool.encrypt(KEY, 9, b'x')
+        with pytest.raises(ValueError):
+            pool.prepare(KEY, 9)
@@ -0,0 +1,96 @@
+"""引擎注册表"""
+
+import random
+from array import array
+
+import pytest
+
+import s_aes_engine
+from s_aes import SAES
+from s_aes_engine import (
+    CALIBRATION_MIN_BLOCKS, DEFAULT_ENGINE, KNOWN_ANSWERS, EngineRegistry, NumpyEngine,
+    ReferenceEngine, TableEngine, TranslateEngine, self_test,
+)
+
+ENGINES = {
+    'reference': ReferenceEngine,
+    'table': TableEngine,
+    'translate': TranslateEngine,
+    'numpy': NumpyEngine,
+}
+
+
+class BrokenEngine:
+    def encrypt_blocks(self, blocks, key):
+        return array('H', blocks)
+
+    def decrypt_blocks(self, blocks, key):
+        return array('H', blocks)
+
+
+def make_registry(tmp_path):
+    registry = EngineRegistry(cache_path=str(tmp_path / 'calibration.json'))
+    for name, factory in ENGINES.items():
+        registry.register(name, factory, available=lambda name=name: name in s_aes_engine.available_engines())
+    return registry
+
+
+def test_known_answers_match_reference():
+    saes = SAES()
+    for plaintext, key, ciphertext in KNOWN_ANSWERS:
+        assert saes.encrypt(plaintext, key) == ciphertext
+        assert saes.decrypt(ciphertext, key) == plaintext
+
+
+@pytest.mark.parametrize('name', sorted(ENGINES))
+def test_engine_matches_reference(name):
+    if name not in s_aes_engine.available_engines():
+        pytest.skip(f"{name} 引擎不可用")
+    engine = ENGINES[name]()
+    self_test(engine)
+    saes = SAES()
+    rng = random.Random(4)
+    blocks = array('H', [rng.randrange(0x10000) for _ in range(300)])
+    encrypted = engine.encrypt_blocks(blocks, 0xA73B)
+    assert [int(c) for c in encrypted] == [saes.encrypt(b, 0xA73B) for b in blocks]
+    assert [int(p) for p in engine.decrypt_blocks(encrypted, 0xA73B)] == list(blocks)
+
+
+def test_self_test_rejects_broken_engine(tmp_path):
+    with pytest.raises(AssertionError):
+        self_test(BrokenEngine())
+    registry = make_registry(tmp_path)
+    registry.register('broken', BrokenEngine)
+    with pytest.raises(RuntimeError):
+        registry.get('broken')
+    assert 'broken' not in registry.verified()
+    with pytest.raises(KeyError):
+        registry.get('missing')
+
+
+def test_small_inputs_skip_calibration(tmp_path):
+    registry = make_registry(tmp_path)
+    assert registry.select('encrypt', CALIBRATION_MIN_BLOCKS) == DEFAULT_ENGINE
+    assert not (tmp_path / 'calibration.json').exists()
+
+
+def test_calibration_is_cached(tmp_path):
+    registry = make_registry(tmp_path)
+    choices = registry.calibrate(repeat=1)
+    assert (tmp_path / 'calibration.json').exists()
+    assert set(choices) == {'encrypt', 'decrypt'}
+    assert registry.select('decrypt', 10 ** 6) in registry.verified()
+    # 新的注册表在环境不变时直接复用缓存
+    assert make_registry(tmp_path).calibrate() == choices
+
+
+def test_pin_and_dispatch(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.pin('reference')
+    assert registry.pinned == 'reference'
+    assert registry.select('encrypt', 10 ** 6) == 'reference'
+    assert list(registry.encrypt_blocks(iter([0x0000]), 0x0000)) == [0x07B4]
+    registry.unpin()
+    assert registry.pinned is None
+    with pytest.raises(ValueError):
+        registry.select('sign', 1)
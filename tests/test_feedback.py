@@ -0,0 +1,76 @@
+"""OFB/CFB 模式"""
+
+import os
+
+import pytest
+
+from s_aes import SAES
+from s_aes_feedback import (
+    CFBStream, OFBKeystream, OFBStream, cfb_decrypt, cfb_encrypt, get_keystream, ofb_decrypt,
+    ofb_encrypt,
+)
+
+KEY = 0x2D55
+IV = 0x0F0F
+
+
+def reference_keystream(n_blocks):
+    saes = SAES()
+    state, blocks = IV, []
+    for _ in range(n_blocks):
+        state = saes.encrypt(state, KEY)
+        blocks.append(state)
+    return blocks
+
+
+def test_ofb_keystream_matches_reference():
+    keystream = OFBKeystream(KEY, IV)
+    assert list(keystream.blocks(0, 20)) == reference_keystream(20)
+    assert list(keystream.blocks(5, 3)) == reference_keystream(8)[5:]
+    data = bytes(40)
+    assert ofb_encrypt(data, KEY, IV) == b''.join(b.to_bytes(2, 'big') for b in reference_keystream(20))
+
+
+def test_ofb_period_wraps_around():
+    keystream = OFBKeystream(KEY, IV, prefetch=True)
+    assert keystream.wait(timeout=60)
+    period = keystream.period
+    assert 1 <= period <= 0x10000
+    # 周期的最后一块回到IV，之后从头重复
+    assert list(keystream.blocks(period - 1, 3)) == [IV] + list(keystream.blocks(0, 2))
+    assert keystream.keystream_bytes(2 * period + 1, 5) == keystream.keystream_bytes(1, 5)
+
+
+def test_ofb_stream_seek_and_roundtrip():
+    data = os.urandom(301)
+    ciphertext = ofb_encrypt(data, KEY, IV)
+    assert ofb_decrypt(ciphertext, KEY, IV) == data
+    stream = OFBStream(KEY, IV)
+    stream.seek(101)
+    assert stream.update(ciphertext[101:150]) == data[101:150]
+    assert stream.position == 150
+    assert get_keystream(KEY, IV) is get_keystream(KEY, IV)
+
+
+def test_cfb_matches_reference():
+    saes = SAES()
+    data = os.urandom(41)
+    ciphertext = cfb_encrypt(data, KEY, IV)
+    assert len(ciphertext) == len(data)
+    previous = IV
+    for i in range(0, 40, 2):
+        block = int.from_bytes(data[i:i + 2], 'big') ^ saes.encrypt(previous, KEY)
+        assert ciphertext[i:i + 2] == block.to_bytes(2, 'big')
+        previous = block
+    assert ciphertext[40] == data[40] ^ (saes.encrypt(previous, KEY) >> 8)
+    assert cfb_decrypt(ciphertext, KEY, IV) == data
+
+
+@pytest.mark.parametrize('step', [1, 3, 8])
+def test_cfb_stream_chunking(step):
+    data = os.urandom(77)
+    ciphertext = cfb_encrypt(data, KEY, IV)
+    for decrypt, source, expected in ((False, data, ciphertext), (True, ciphertext, data)):
+        stream = CFBStream(KEY, IV, decrypt=decrypt)
+        output = b''.join(stream.update(source[i:i + step]) for i in range(0, len(source), step))
+        assert output + stream.finalize() == expected
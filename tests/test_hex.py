@@ -0,0 +1,66 @@
+"""16进制文本编解码"""
+
+from array import array
+
+import pytest
+
+from s_aes_hex import (
+    HexParseError, blocks_to_bytes, bytes_to_blocks, format_blocks, format_bytes, parse_blocks,
+    parse_bytes,
+)
+
+
+def test_bytes_and_blocks_are_big_endian():
+    assert blocks_to_bytes([0x1234, 0xABCD]) == b'\x12\x34\xab\xcd'
+    assert bytes_to_blocks(b'\x12\x34\xab\xcd') == array('H', [0x1234, 0xABCD])
+
+
+def test_format_blocks():
+    assert format_blocks([0x1234, 0x000A, 0xFFFF]) == '1234 000A FFFF'
+    assert format_blocks([1, 2, 3], per_line=2) == '0001 0002\n0003'
+    assert format_blocks([]) == ''
+
+
+@pytest.mark.parametrize('text,expected', [
+    ('1234 ABCD', [0x1234, 0xABCD]),
+    ('  1234\n\tabcd  ', [0x1234, 0xABCD]),
+    ('1 23 456 7890', [0x1, 0x23, 0x456, 0x7890]),
+    ('', []),
+    ('FFFF', [0xFFFF]),
+])
+def test_parse_blocks(text, expected):
+    assert list(parse_blocks(text)) == expected
+
+
+def test_format_parse_roundtrip():
+    blocks = array('H', range(0, 0x10000, 255))
+    assert parse_blocks(format_blocks(blocks, per_line=32)) == blocks
+
+
+@pytest.mark.parametrize('text,index,token,offset', [
+    ('1234 12345 ABCD', 1, '12345', 5),
+    ('1234 ABCG', 1, 'ABCG', 5),
+    ('0x12 1234', 0, '0x12', 0),
+])
+def test_parse_blocks_reports_position(text, index, token, offset):
+    with pytest.raises(HexParseError) as info:
+        parse_blocks(text)
+    assert (info.value.index, info.value.token, info.value.offset) == (index, token, offset)
+    assert isinstance(info.value, ValueError)
+
+
+def test_parse_blocks_start_index():
+    with pytest.raises(HexParseError) as info:
+        parse_blocks('1234 XX', start_index=10)
+    assert info.value.index == 11
+
+
+def test_bytes_text():
+    assert format_bytes(b'\x01\xab') == '01AB'
+    assert format_bytes(b'\x01\xab', ' ') == '01 AB'
+    assert parse_bytes('01 ab') == b'\x01\xab'
+    with pytest.raises(HexParseError) as info:
+        parse_bytes('01 a')
+    assert info.value.index == 1
+    with pytest.raises(HexParseError):
+        parse_bytes('01 zz')
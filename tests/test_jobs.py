@@ -0,0 +1,62 @@
+"""批处理运行器"""
+
+import csv
+import json
+
+from s_aes_jobs import format_result, load_jobs, main, run_job, run_jobs, write_results
+
+JOBS = [
+    {'id': 'a', 'op': 'basic_encrypt', 'plaintext': '0000', 'key': '0000'},
+    {'id': 'b', 'op': 'ascii_encrypt', 'plaintext': 'Hi', 'key': '2D55'},
+    {'id': 'c', 'op': 'basic_decrypt', 'ciphertext': 'ZZZZ', 'key': '0000'},
+    {'id': 'd', 'op': 'no_such_op'},
+]
+
+
+def test_run_job_records_errors():
+    ok = run_job(JOBS[0])
+    assert ok['ok'] and ok['result']['ciphertext'] == '07B4'
+    failed = run_job(JOBS[2])
+    assert not failed['ok'] and '密文' in failed['error']
+
+
+def test_run_jobs_keeps_order():
+    progress = []
+    results = run_jobs(JOBS, workers=1, progress=lambda done, total: progress.append((done, total)))
+    assert [r['id'] for r in results] == ['a', 'b', 'c', 'd']
+    assert [r['ok'] for r in results] == [True, True, False, False]
+    assert progress[-1] == (4, 4)
+
+
+def test_format_result_limits_candidates():
+    result = {'count': 3, 'candidates': [(1, 2), (3, 4), (5, 6)], 'flag': True, 'blocks': [1, 0xABCD]}
+    output = format_result('mitm_attack', result, limit=2)
+    assert output == {'count': 3, 'candidates': '00010002 00030004', 'flag': True, 'blocks': '0001 ABCD'}
+
+
+def test_json_and_csv_files(tmp_path):
+    json_jobs = tmp_path / 'jobs.json'
+    json_jobs.write_text(json.dumps({'jobs': JOBS[:2]}), encoding='utf-8')
+    assert load_jobs(str(json_jobs)) == JOBS[:2]
+
+    csv_jobs = tmp_path / 'jobs.csv'
+    with open(csv_jobs, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['id', 'op', 'plaintext', 'key'])
+        writer.writeheader()
+        writer.writerows(JOBS[:2])
+    assert load_jobs(str(csv_jobs)) == JOBS[:2]
+
+    output = tmp_path / 'results.csv'
+    write_results(run_jobs(load_jobs(str(csv_jobs)), workers=1), str(output))
+    with open(output, encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]['ciphertext'] == '07B4'
+
+
+def test_main_exit_code(tmp_path, capsys):
+    jobs = tmp_path / 'jobs.json'
+    jobs.write_text(json.dumps(JOBS[:1]), encoding='utf-8')
+    assert main([str(jobs), '-w', '1']) == 0
+    assert json.loads(capsys.readouterr().out)[0]['result']['ciphertext'] == '07B4'
+    jobs.write_text(json.dumps(JOBS), encoding='utf-8')
+    assert main([str(jobs), '-w', '1', '-o', str(tmp_path / 'out.json')]) == 1
@@ -0,0 +1,125 @@
+"""CMAC 与先加密后认证"""
+
+import os
+
+import pytest
+
+from s_aes import SAES
+from s_aes_mac import (
+    CODEBOOK_THRESHOLD, CMAC, AuthenticationError, cmac, cmac_batch, cmac_subkeys, open_sealed,
+    seal, verify_batch, verify_sealed_batch,
+)
+from s_aes_ops import OperationError, SAESOperations
+
+KEY = 0x2D55
+MAC_KEY = 0x1A2B
+IV = 0x0F0F
+
+
+def reference_cmac(data, key):
+    """按SP 800-38B逐块计算的CMAC，作为对照"""
+    saes = SAES()
+
+    def double(value):
+        value <<= 1
+        return (value ^ 0x1002D) if value & 0x10000 else value
+
+    k1 = double(saes.encrypt(0, key))
+    k2 = double(k1)
+    blocks = [data[i:i + 2] for i in range(0, len(data), 2)] or [b'']
+    state = 0
+    for block in blocks[:-1]:
+        state = saes.encrypt(state ^ int.from_bytes(block, 'big'), key)
+    last = blocks[-1]
+    if len(last) == 2:
+        last = int.from_bytes(last, 'big') ^ k1
+    else:
+        last = int.from_bytes((last + b'\x80\x00')[:2], 'big') ^ k2
+    return saes.encrypt(state ^ last, key)
+
+
+@pytest.mark.parametrize('data', [b'', b'a', b'ab', b'abc', b'hello world!', bytes(range(256))])
+def test_cmac_matches_reference(data):
+    assert cmac(data, KEY) == reference_cmac(data, KEY)
+
+
+def test_cmac_subkeys():
+    k1, k2 = cmac_subkeys(KEY)
+    assert k2 == ((k1 << 1) & 0xFFFF) ^ (0x2D if k1 & 0x8000 else 0)
+
+
+def test_streaming_and_codebook_paths_agree():
+    data = os.urandom(2 * CODEBOOK_THRESHOLD + 3)
+    mac = CMAC(KEY)
+    for start in range(0, len(data), 999):
+        mac.update(data[start:start + 999])
+    assert mac.digest() == cmac(data, KEY)
+    assert mac.verify(cmac(data, KEY))
+    small = CMAC(KEY)
+    for start in range(0, len(data), 7):
+        small.update(data[start:start + 7])
+    assert small.digest() == mac.digest()
+
+
+@pytest.mark.parametrize('mode', ['cbc', 'ecb'])
+@pytest.mark.parametrize('data', [b'', b'x', b'text\x00', b'\x00\x00\x00\x00'])
+def test_seal_roundtrip_keeps_trailing_nuls(mode, data):
+    iv = IV if mode == 'cbc' else None
+    blocks, tag = seal(data, KEY, MAC_KEY, mode, iv)
+    assert open_sealed(blocks, tag, KEY, MAC_KEY, mode, iv) == data
+
+
+def test_seal_large_data_uses_same_tag_as_two_pass():
+    data = os.urandom(3 * CODEBOOK_THRESHOLD + 1)
+    blocks, tag = seal(data, KEY, MAC_KEY, 'cbc', IV)
+    assert tag == cmac(IV.to_bytes(2, 'big') + b''.join(b.to_bytes(2, 'big') for b in blocks), MAC_KEY)
+    assert open_sealed(blocks, tag, KEY, MAC_KEY, 'cbc', IV) == data
+
+
+def test_open_sealed_rejects_tampering():
+    blocks, tag = seal(b'attack at dawn', KEY, MAC_KEY, 'cbc', IV)
+    tampered = list(blocks)
+    tampered[1] ^= 0x0100
+    with pytest.raises(AuthenticationError):
+        open_sealed(tampered, tag, KEY, MAC_KEY, 'cbc', IV)
+    with pytest.raises(AuthenticationError):
+        open_sealed(blocks, tag ^ 1, KEY, MAC_KEY, 'cbc', IV)
+    with pytest.raises(AuthenticationError):
+        open_sealed(blocks, tag, KEY, MAC_KEY, 'cbc', IV ^ 1)
+    with pytest.raises(AuthenticationError):
+        open_sealed(blocks[:-1], tag, KEY, MAC_KEY, 'cbc', IV)
+
+
+def test_seal_requires_distinct_keys():
+    with pytest.raises(ValueError):
+        seal(b'data', KEY, KEY)
+
+
+def test_batch_verification():
+    messages = [os.urandom(n) for n in (0, 1, 2, 33, 33, 33, 2 * CODEBOOK_THRESHOLD)]
+    tags = [cmac(m, KEY) for m in messages]
+    assert cmac_batch(messages, KEY) == tags
+    assert cmac_batch(messages[:4], KEY) == tags[:4]
+    tags[3] ^= 1
+    assert verify_batch(messages, tags, KEY) == [True, True, True, False, True, True, True]
+    with pytest.raises(ValueError):
+        verify_batch(messages, tags[:-1], KEY)
+
+
+def test_verify_sealed_batch():
+    records = []
+    for i, data in enumerate([b'one', b'two!', b'three']):
+        blocks, tag = seal(data, KEY, MAC_KEY, 'cbc', IV + i)
+        records.append((blocks, IV + i, tag))
+    records.append((records[0][0], IV + 9, records[0][2]))
+    assert verify_sealed_batch(records, MAC_KEY) == [True, True, True, False]
+
+
+def test_operations_encrypt_then_mac():
+    ops = SAESOperations()
+    result = ops.etm_encrypt('sealed text', KEY, MAC_KEY, IV)
+    assert ops.etm_decrypt(result['ciphertext'], KEY, MAC_KEY, IV, result['tag'])['plaintext'] == 'sealed text'
+    with pytest.raises(OperationError):
+        ops.etm_decrypt(result['ciphertext'], KEY, MAC_KEY, IV, result['tag'] ^ 1)
+    with pytest.raises(OperationError):
+        ops.etm_encrypt('text', KEY, KEY, IV)
@@ -0,0 +1,79 @@
+"""多密钥批量加解密"""
+
+import random
+from array import array
+
+import pytest
+
+from s_aes import SAES
+from s_aes_batch import SAESBatch, np
+from s_aes_multikey import (
+    CBC_TAIL_ROWS, GROUP_ENGINE_BLOCKS, benchmark_records, decrypt_records, encrypt_records,
+)
+
+
+@pytest.fixture(scope='module', params=[False, True], ids=['python', 'numpy'])
+def engine(request):
+    if request.param and np is None:
+        pytest.skip("未安装NumPy")
+    return SAESBatch(use_numpy=request.param)
+
+
+@pytest.fixture(scope='module')
+def records():
+    rng = random.Random(6)
+    result = [(rng.randrange(0x10000), rng.randrange(0x10000),
+               [rng.randrange(0x10000) for _ in range(rng.randrange(0, 12))])
+              for _ in range(4 * CBC_TAIL_ROWS)]
+    # 少数长消息与大量共用密钥的块，分别覆盖逐条查表收尾和整组交给批量引擎的路径
+    result.append((0x2D55, 0x0F0F, [rng.randrange(0x10000) for _ in range(200)]))
+    result.append((0x2D55, 0x0F0F, [rng.randrange(0x10000) for _ in range(GROUP_ENGINE_BLOCKS)]))
+    return result
+
+
+@pytest.fixture(scope='module')
+def saes():
+    return SAES()
+
+
+def test_expand_keys_and_keyed_blocks(engine, saes):
+    keys = [0x0000, 0x2D55, 0x2D55, 0xFFFF]
+    schedule = engine.expand_keys(keys)
+    assert [list(map(int, k)) for k in zip(*schedule)] == [saes.key_expansion(k) for k in keys]
+    blocks = array('H', [1, 2, 3, 4])
+    encrypted = engine.encrypt_blocks_keyed(blocks, schedule)
+    assert list(encrypted) == [saes.encrypt(b, k) for b, k in zip(blocks, keys)]
+    assert list(engine.decrypt_blocks_keyed(array('H', encrypted), schedule)) == list(blocks)
+
+
+@pytest.mark.parametrize('mode', ['ecb', 'cbc'])
+def test_records_match_saes(engine, saes, records, mode):
+    if mode == 'cbc':
+        expected = [saes.cbc_encrypt(blocks, key, iv) for key, iv, blocks in records]
+    else:
+        expected = [[saes.encrypt(b, key) for b in blocks] for key, _, blocks in records]
+    results = encrypt_records(records, mode, engine)
+    assert [list(r) for r in results] == expected
+    decrypted = decrypt_records([(key, iv, r) for (key, iv, _), r in zip(records, results)], mode, engine)
+    assert [list(d) for d in decrypted] == [blocks for _, _, blocks in records]
+
+
+def test_string_payloads_match_encrypt_ascii(engine, saes):
+    records = [(0x2D55, None, "Hello"), (0xA73B, None, "S-AES!"), (0x2D55, None, b'odd')]
+    results = encrypt_records(records, engine=engine)
+    assert list(results[0]) == saes.encrypt_ascii("Hello", 0x2D55)
+    assert list(results[1]) == saes.encrypt_ascii("S-AES!", 0xA73B)
+    assert saes.decrypt_ascii(list(results[2]), 0x2D55) == 'odd'
+
+
+def test_invalid_records(engine):
+    assert encrypt_records([], engine=engine) == []
+    with pytest.raises(ValueError):
+        encrypt_records([(1, None, [1])], 'cbc', engine)
+    with pytest.raises(ValueError):
+        encrypt_records([(1, 1, [1])], 'ctr', engine)
+
+
+def test_benchmark_checks_results():
+    result = benchmark_records(n_records=50, size=5, seed=1)
+    assert result['records'] == 50
@@ -0,0 +1,72 @@
+"""与界面无关的操作层"""
+
+import pytest
+
+from s_aes import SAES
+from s_aes_ops import MissingInputError, OperationError, SAESOperations, parse_hex16, parse_params
+
+
+@pytest.fixture(scope='module')
+def ops():
+    return SAESOperations()
+
+
+def test_parse_hex16():
+    assert parse_hex16('2d55', '密钥') == 0x2D55
+    assert parse_hex16(0xFFFF, '密钥') == 0xFFFF
+    with pytest.raises(MissingInputError):
+        parse_hex16('  ', '密钥')
+    with pytest.raises(OperationError):
+        parse_hex16('12345', '密钥')
+    with pytest.raises(OperationError):
+        parse_hex16('xyz', '密钥')
+    with pytest.raises(OperationError):
+        parse_hex16(True, '密钥')
+
+
+def test_parse_params_skips_empty_optional():
+    assert parse_params('triple_encrypt', {'plaintext': '1234', 'key1': '1', 'key2': '2', 'key3': ''}) == {
+        'plaintext': 0x1234, 'key1': 1, 'key2': 2}
+    with pytest.raises(OperationError):
+        parse_params('unknown', {})
+    with pytest.raises(MissingInputError):
+        parse_params('basic_encrypt', {'plaintext': '1234'})
+
+
+def test_basic_and_ascii(ops):
+    saes = SAES()
+    assert ops.run('basic_encrypt', {'plaintext': '0000', 'key': '0000'})['ciphertext'] == 0x07B4
+    result = ops.ascii_encrypt('Hello', '2D55')
+    assert result['ciphertext'] == saes.encrypt_ascii('Hello', 0x2D55)
+    assert ops.run('ascii_decrypt', {'ciphertext': ' '.join(f"{b:04X}" for b in result['ciphertext']),
+                                     'key': '2D55'})['plaintext'] == 'Hello'
+
+
+def test_blocks_error_reports_position(ops):
+    with pytest.raises(OperationError, match='第2个块'):
+        ops.run('ascii_decrypt', {'ciphertext': '1234 XYZ', 'key': '2D55'})
+
+
+def test_double_and_triple(ops):
+    saes = SAES()
+    result = ops.double_encrypt(0x1234, 1, 2)
+    assert result['middle'] == saes.encrypt(0x1234, 1)
+    assert ops.double_decrypt(result['ciphertext'], 1, 2)['plaintext'] == 0x1234
+    assert ops.verify_double_key(0x1234, result['ciphertext'], 1, 2)
+    encrypted = ops.triple_encrypt(0x1234, 1, 2, 3)
+    assert encrypted['mode'] == '48bit'
+    assert ops.triple_decrypt(encrypted['ciphertext'], 1, 2, 3)['plaintext'] == 0x1234
+    assert ops.triple_encrypt(0x1234, 1, 2)['ciphertext'] == saes.triple_encrypt_32bit(0x1234, 1, 2)
+
+
+def test_cbc_and_tamper(ops):
+    encrypted = ops.cbc_encrypt('CBC mode', '2D55', '5555')
+    assert ops.cbc_decrypt(encrypted['ciphertext'], 0x2D55, 0x5555)['plaintext'] == 'CBC mode'
+    tampered = ops.cbc_tamper_test(encrypted['ciphertext'], 0x2D55, 0x5555)
+    assert tampered['affected'] == [0, 1]
+    with pytest.raises(OperationError):
+        ops.cbc_tamper_test(encrypted['ciphertext'], 0x2D55, 0x5555, index=99)
+
+
+def test_mitm_generate_is_reproducible(ops):
+    assert ops.mitm_generate(seed=7) == ops.mitm_generate(seed=7)
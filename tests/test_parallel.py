@@ -0,0 +1,59 @@
+"""并行批量执行器"""
+
+import random
+from array import array
+
+import pytest
+
+from s_aes import SAES
+from s_aes_parallel import _get_executor, encrypt_parallel, parallel_threshold
+
+KEYS = (0x2D55, 0xA73B, 0x1234)
+
+
+@pytest.fixture(scope='module')
+def blocks():
+    rng = random.Random(3)
+    return array('H', [rng.randrange(0x10000) for _ in range(1000)])
+
+
+@pytest.mark.parametrize('strategy', ['serial', 'thread'])
+@pytest.mark.parametrize('mode,keys', [
+    ('encrypt', KEYS[0]), ('decrypt', KEYS[0]),
+    ('double_encrypt', KEYS[:2]), ('triple_encrypt_48bit', KEYS),
+])
+def test_matches_saes(blocks, strategy, mode, keys):
+    method = getattr(SAES(), mode)
+    keys_tuple = keys if isinstance(keys, tuple) else (keys,)
+    result = encrypt_parallel(blocks, keys, mode, workers=2, chunk_blocks=128, strategy=strategy)
+    assert result.chunks == 8
+    assert list(result.blocks) == [method(b, *keys_tuple) for b in blocks]
+    assert sum(stats['blocks'] for stats in result.worker_stats.values()) == len(blocks)
+
+
+@pytest.mark.parametrize('strategy', ['serial', 'thread'])
+def test_cbc_decrypt_chains_across_chunks(blocks, strategy):
+    saes = SAES()
+    ciphertext = saes.cbc_encrypt(list(blocks), KEYS[0], 0x5555)
+    assert list(encrypt_parallel(blocks, KEYS[0], 'cbc_encrypt', iv=0x5555).blocks) == ciphertext
+    result = encrypt_parallel(ciphertext, KEYS[0], 'cbc_decrypt', iv=0x5555,
+                              workers=2, chunk_blocks=100, strategy=strategy)
+    assert list(result.blocks) == list(blocks)
+
+
+def test_auto_strategy_is_serial_for_small_input(blocks):
+    assert len(blocks) < parallel_threshold()
+    result = encrypt_parallel(blocks, KEYS[0], workers=4, chunk_blocks=100)
+    assert result.strategy == 'serial'
+    assert result.workers == 1
+
+
+def test_executor_is_reused():
+    assert _get_executor('thread', 2) is _get_executor('thread', 2)
+
+
+def test_invalid_arguments(blocks):
+    with pytest.raises(ValueError):
+        encrypt_parallel(blocks, KEYS[0], 'cfb')
+    with pytest.raises(ValueError):
+        encrypt_parallel(blocks, KEYS[0], 'cbc_decrypt')
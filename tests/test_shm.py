@@ -0,0 +1,38 @@
+"""共享内存块缓冲区"""
+
+from array import array
+
+from s_aes import SAES
+from s_aes_parallel import encrypt_parallel
+from s_aes_shm import SharedBlockBuffer
+
+
+def test_roundtrip_and_attach():
+    with SharedBlockBuffer.from_blocks([1, 2, 3, 0xFFFF]) as owner:
+        assert owner.read() == array('H', [1, 2, 3, 0xFFFF])
+        with SharedBlockBuffer.attach(owner.name, len(owner)) as attached:
+            assert not attached.owner
+            attached.write(1, [7, 8])
+            attached[0] = 9
+        assert owner.read() == array('H', [9, 7, 8, 0xFFFF])
+        assert owner.read(1, 3) == array('H', [7, 8])
+
+
+def test_create_is_zeroed_and_close_is_idempotent():
+    buffer = SharedBlockBuffer.create(4)
+    assert buffer.read() == array('H', [0, 0, 0, 0])
+    buffer.close()
+    buffer.close()
+
+
+def test_empty_buffer():
+    with SharedBlockBuffer.from_blocks([]) as buffer:
+        assert len(buffer) == 0
+        assert buffer.read() == array('H')
+
+
+def test_process_strategy_uses_shared_memory():
+    blocks = array('H', range(0, 0x10000, 97))
+    result = encrypt_parallel(blocks, 0x2D55, workers=2, chunk_blocks=128, strategy='process')
+    assert result.strategy == 'process'
+    assert list(result.blocks) == [SAES().encrypt(b, 0x2D55) for b in blocks]
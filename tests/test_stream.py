@@ -0,0 +1,139 @@
+"""分段流式加解密"""
+
+import os
+
+import pytest
+
+from s_aes import SAES
+from s_aes_hex import HexParseError, blocks_to_bytes, strip_zero_low_bytes
+from s_aes_stream import (
+    HexBlockParser, StreamDecryptor, StreamEncryptor, decrypt_hex_file, encrypt_file_to_hex,
+    iter_encrypt_blocks,
+)
+
+KEY = 0x2D55
+IV = 0x5555
+
+
+def run_stream(data, mode, padding, step):
+    iv = IV if mode == 'cbc' else None
+    encryptor = StreamEncryptor(KEY, mode, iv, padding)
+    blocks = []
+    for start in range(0, len(data), step):
+        blocks.extend(encryptor.update(data[start:start + step]))
+    blocks.extend(encryptor.finalize())
+    decryptor = StreamDecryptor(KEY, mode, iv, padding)
+    plain = b''
+    for start in range(0, len(blocks), 3):
+        plain += decryptor.update(blocks[start:start + 3])
+    return blocks, plain + decryptor.finalize()
+
+
+@pytest.mark.parametrize('mode', ['ecb', 'cbc'])
+@pytest.mark.parametrize('data', [b'', b'a', b'ab', b'abc\x00', b'\x00\x00', b'text\x00\x00\x00'])
+def test_pkcs7_roundtrip_keeps_trailing_nuls(mode, data):
+    blocks, plain = run_stream(data, mode, 'pkcs7', 3)
+    assert plain == data
+    # PKCS#7总会补1或2个字节
+    assert len(blocks) == len(data) // 2 + 1
+
+
+@pytest.mark.parametrize('step', [1, 2, 5, 64])
+def test_chunking_does_not_change_ciphertext(step):
+    data = bytes(range(37))
+    saes = SAES()
+    blocks, plain = run_stream(data, 'cbc', 'pkcs7', step)
+    padded = [int.from_bytes(data[i:i + 2], 'big') for i in range(0, 36, 2)] + [(data[36] << 8) | 0x01]
+    assert blocks == saes.cbc_encrypt(padded, KEY, IV)
+    assert plain == data
+
+
+def test_zero_padding_matches_encrypt_ascii():
+    saes = SAES()
+    text = "Hello, S-AES!"
+    blocks = [b for chunk in iter_encrypt_blocks(text.encode(), KEY, chunk_blocks=2) for b in chunk]
+    assert blocks == saes.encrypt_ascii(text, KEY)
+    _, plain = run_stream(b'odd', 'ecb', 'zero', 2)
+    assert plain == b'odd'
+
+
+def test_invalid_pkcs7_padding_rejected():
+    decryptor = StreamDecryptor(KEY, padding='pkcs7')
+    decryptor.update(StreamEncryptor(KEY, padding='zero').update(b'ab'))
+    with pytest.raises(ValueError):
+        decryptor.finalize()
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        StreamEncryptor(KEY, mode='ctr')
+    with pytest.raises(ValueError):
+        StreamEncryptor(KEY, mode='cbc')
+    with pytest.raises(ValueError):
+        StreamEncryptor(KEY, padding='iso')
+
+
+def test_strip_zero_low_bytes():
+    assert strip_zero_low_bytes(b'ab') == b'ab'
+    assert strip_zero_low_bytes(blocks_to_bytes([0x6100, 0x6263, 0x6400])) == b'abcd'
+
+
+def test_hex_parser_handles_split_tokens():
+    parser = HexBlockParser()
+    blocks = []
+    for piece in ['12', '34 AB', 'CD\nEF', '01 ', '2', '']:
+        blocks.extend(parser.feed(piece))
+    blocks.extend(parser.finalize())
+    assert blocks == [0x1234, 0xABCD, 0xEF01, 0x0002]
+
+
+def test_hex_parser_rejects_overlong_token():
+    parser = HexBlockParser()
+    parser.feed('0001 ')
+    with pytest.raises(HexParseError) as info:
+        parser.feed('12345')
+    assert info.value.index == 1
+    parser = HexBlockParser()
+    parser.feed('12')
+    with pytest.raises(HexParseError):
+        parser.feed('345')
+
+
+def test_file_roundtrip(tmp_path):
+    source = tmp_path / 'plain.bin'
+    data = os.urandom(999) + b'\x00\x00'
+    source.write_bytes(data)
+    hex_path = tmp_path / 'cipher.txt'
+    target = tmp_path / 'plain.out'
+    n = encrypt_file_to_hex(source, hex_path, KEY, 'cbc', IV, chunk_blocks=16)
+    assert n == len(data) // 2 + 1
+    assert decrypt_hex_file(hex_path, target, KEY, 'cbc', IV, chunk_blocks=16) == n
+    assert target.read_bytes() == data
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['cipher.txt', 'plain.bin', 'plain.out']
+
+
+def test_cancelled_file_job_leaves_target_untouched(tmp_path):
+    source = tmp_path / 'plain.bin'
+    source.write_bytes(b'x' * 1000)
+    target = tmp_path / 'cipher.txt'
+    target.write_text('old')
+    calls = []
+
+    def cancelled():
+        calls.append(None)
+        return len(calls) > 2
+
+    assert encrypt_file_to_hex(source, target, KEY, chunk_blocks=16, cancelled=cancelled) is None
+    assert target.read_text() == 'old'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['cipher.txt', 'plain.bin']
+
+
+def test_non_ascii_hex_file_rejected(tmp_path):
+    source = tmp_path / 'cipher.txt'
+    source.write_bytes('0001 0002 密文'.encode('utf-8'))
+    target = tmp_path / 'plain.out'
+    with pytest.raises(HexParseError) as info:
+        decrypt_hex_file(source, target, KEY)
+    assert info.value.index == 2
+    assert info.value.offset == 10
+    assert not target.exists()